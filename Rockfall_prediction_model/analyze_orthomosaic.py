@@ -0,0 +1,105 @@
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from rockfall.batch import INPUT_COLUMNS
+from rockfall.engine import IMAGE_ANALYSIS_KEYS
+from rockfall.orthomosaic import (
+    DEFAULT_CELL_ANALYSIS_PIXELS, DEFAULT_CELL_PIXELS, OrthomosaicError, analyze_orthomosaic, grid_table, score_grid
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Analyze a large orthomosaic cell by cell into a georeferenced grid, optionally risk-scored."
+    )
+    parser.add_argument("image", type=Path, help="orthomosaic (.npy or uncompressed TIFF; other formats need rasterio)")
+    parser.add_argument("--output", type=Path,
+                        help="grid file, .csv, .npy or .parquet (default: <image>.grid.csv); "
+                             "its georeferencing is written next to it as <output>.json")
+    parser.add_argument("--cell", type=int, default=DEFAULT_CELL_PIXELS, help="grid cell side in source pixels")
+    parser.add_argument("--analysis-pixels", type=int, default=DEFAULT_CELL_ANALYSIS_PIXELS,
+                        help="cells are block-averaged to at most this many pixels before analysis")
+    parser.add_argument("--workers", type=int, help="analysis processes (default: CPU count)")
+    parser.add_argument("--site", help="site conditions as JSON (calculate_risk's arguments, or a path to a JSON "
+                                       "file); when given, every cell is risk-scored with the batch scorer")
+    return parser.parse_args()
+
+
+def write_table(table, path):
+    frame = pd.DataFrame(table)
+    if path.suffix == ".parquet":
+        frame.to_parquet(path, index=False)
+    elif path.suffix == ".npy":
+        np.save(path, frame.to_records(index=False, column_dtypes={"risk_level": "U8"}))
+    else:
+        frame.to_csv(path, index=False)
+
+
+def load_site(value):
+    # Checked up front: scoring only starts once the whole raster has been analyzed
+    try:
+        site = json.loads(Path(value).read_text() if Path(value).is_file() else value)
+    except ValueError as error:
+        raise SystemExit(f"❌ --site is not valid JSON: {error}")
+    if not isinstance(site, dict):
+        raise SystemExit("❌ --site must be a JSON object of calculate_risk's arguments")
+    missing = [name for name in INPUT_COLUMNS if name not in site]
+    if missing:
+        raise SystemExit(f"❌ --site is missing: {', '.join(missing)}")
+    for name in INPUT_COLUMNS:
+        if name == "rock_type":
+            site[name] = str(site[name])
+            continue
+        value = site[name]
+        try:
+            if isinstance(value, bool):
+                raise TypeError
+            site[name] = float(value)
+        except (TypeError, ValueError):
+            raise SystemExit(f"❌ --site field '{name}' must be a number, got {value!r}") from None
+    return site
+
+
+def main():
+    args = parse_args()
+    site = None
+    if args.site:
+        site = load_site(args.site)
+
+    def progress(done, total):
+        print(f"\r🧩 {done:,}/{total:,} cells", end="", flush=True)
+
+    try:
+        grid = analyze_orthomosaic(args.image, cell=args.cell, max_pixels=args.analysis_pixels, workers=args.workers,
+                                   progress=progress)
+    except OrthomosaicError as error:
+        raise SystemExit(f"❌ {error}")
+    print()
+    table = grid_table(grid)
+    if site is not None:
+        table = score_grid(table, site)
+
+    output = args.output or args.image.with_name(args.image.stem + ".grid.csv")
+    write_table(table, output)
+    metadata = {key: grid[key] for key in ("width", "height", "cell", "crs", "transform", "cell_transform")}
+    metadata.update(shape=list(grid["valid"].shape), columns=list(table), site=site)
+    output.with_name(output.name + ".json").write_text(json.dumps(metadata, indent=2))
+
+    rows, cols = grid["valid"].shape
+    analyzed = int(np.isfinite(grid[IMAGE_ANALYSIS_KEYS[0]]).sum())
+    print(f"🗺️ {grid['width']:,}x{grid['height']:,} px → {rows}x{cols} grid of {args.cell}-px cells "
+          f"({analyzed:,} analyzed, {rows * cols - analyzed:,} nodata)")
+    if grid["transform"] is None:
+        print("⚠️ No georeferencing found (GeoTIFF tags, world file or rasterio); x/y are pixel coordinates")
+    if site is not None:
+        levels, counts = np.unique(table["risk_level"][table["risk_level"] != ""], return_counts=True)
+        print("⚠️ Risk levels of analyzed cells:", ", ".join(f"{level} {count:,}" for level, count in zip(levels, counts)))
+    print("💾 Grid saved at:", output)
+
+
+if __name__ == "__main__":
+    main()
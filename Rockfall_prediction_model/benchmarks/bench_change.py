@@ -0,0 +1,85 @@
+"""
+Benchmark change detection on a large synthetic before/after photo pair.
+
+Writes two JPEGs of --megapixels showing the same rock face, the second one
+taken from a slightly shifted position with a fresh scar of light rock, then
+times compare_images end to end and checks the recovered shift and scar.
+
+Run from the Rockfall_prediction_model directory:
+    python -m benchmarks.bench_change --megapixels 40
+"""
+
+import argparse
+import math
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from rockfall.change import compare_images, load_change_copy
+
+# Shift of the after photo's content in photo pixels (rows, columns), as compare_images reports it
+SHIFT = (96, -152)
+
+
+def synthetic_pair(directory, megapixels, seed=0):
+    # Drawn at 1/4 scale and upsampled, so the benchmark itself stays light
+    width = int(math.sqrt(megapixels * 1e6 * 3 / 2))
+    height = int(width * 2 / 3)
+    margin = max(abs(value) for value in SHIFT) // 4 + 1
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height // 4 + 2 * margin, 0:width // 4 + 2 * margin]
+    rock = 0.45 + 0.08 * np.sin(x / 9 + y / 31) + 0.06 * rng.standard_normal(x.shape)
+    rock -= 0.3 * (np.abs((x + 2 * y) % 120 - 60) < 2)  # joint set
+    face = np.stack([rock, rock * 0.95, rock * 0.9], axis=-1)
+
+    before = face[margin:margin + height // 4, margin:margin + width // 4]
+    dy, dx = -SHIFT[0] // 4, -SHIFT[1] // 4
+    after = face[margin + dy:margin + dy + height // 4, margin + dx:margin + dx + width // 4].copy()
+    # Fresh, lighter rock where a block detached (in the before photo's coordinates)
+    scar = (slice(height // 10 - dy, height // 10 + height // 24 - dy), slice(width // 8 - dx, width // 8 + width // 20 - dx))
+    after[scar] = 0.8 + 0.04 * rng.standard_normal(after[scar].shape)
+    after *= 1.1  # brighter exposure
+
+    paths = []
+    for name, image in (("before", before), ("after", after)):
+        path = Path(directory) / f"{name}.jpg"
+        Image.fromarray((np.clip(image, 0, 1) * 255).astype(np.uint8)).resize((width, height)).save(path, quality=90)
+        paths.append(path)
+    return paths, (width, height)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--megapixels", type=float, default=40)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        (before, after), (width, height) = synthetic_pair(directory, args.megapixels)
+        print(f"📷 2 x {width}x{height} JPEG ({width * height / 1e6:.1f} MP)")
+
+        totals, decodes = [], []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            load_change_copy(before)
+            load_change_copy(after)
+            decodes.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            result = compare_images(before, after)
+            totals.append(time.perf_counter() - start)
+
+    scale = result["scale"]
+    dy, dx = result["shift"]
+    print(f"⏱️ compare_images: median {np.median(totals):.2f} s (decoding both working copies {np.median(decodes):.2f} s)")
+    print(f"🎯 shift {dy * scale:+.1f}, {dx * scale:+.1f} photo px (true {SHIFT[0]:+d}, {SHIFT[1]:+d}), "
+          f"correlation peak {result['registration_peak']:.3f}")
+    scar_share = (height // 24) * (width // 20) * 16 / (width * height)
+    print(f"🪨 scar area {result['metrics']['scar_area_share']:.2%} of the overlap (true ≈{scar_share:.2%}), "
+          f"changed {result['metrics']['changed_area_share']:.2%}, new_detachment {result['new_detachment']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Benchmark path-based model explanations: additivity and latency per row.
+
+Run from the Rockfall_prediction_model directory:
+    python -m benchmarks.bench_explain
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from rockfall.model import load_model, predict_risk, site_features
+
+SITE_ARGS = (6, 4, 0, 15, 1000, 50, 45, 30, "Granite", {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=200)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 10_000])
+    args = parser.parse_args()
+
+    model = load_model()
+    rng = np.random.default_rng(0)
+    low, high = [0, 0, 0, -20, 0, 1, 0, 0], [100, 50, 100, 40, 3000, 200, 90, 90]
+    rock_types = ["Granite", "Sandstone", "Shale", "Limestone", "Basalt"]
+    X = np.vstack([site_features(*rng.uniform(low, high), rock_types[i % len(rock_types)])
+                   for i in range(max(args.batch_sizes))])
+
+    bias, contributions = model.explain(X)
+    error = np.abs(bias + contributions.sum(axis=1) - model.predict_proba(X)).max()
+    print(f"🧮 bias {bias:.4f}, max |bias + Σ contributions - probability| = {error:.2e} over {len(X):,} rows")
+
+    for size in args.batch_sizes:
+        repeats = max(1, args.repeats // size)
+        start = time.perf_counter()
+        for _ in range(repeats):
+            model.explain(X[:size])
+        elapsed = (time.perf_counter() - start) / repeats
+        print(f"🌲 explain {size:>6,} rows: {elapsed * 1e3:8.2f} ms ({elapsed / size * 1e3:.3f} ms/row)")
+
+    samples = []
+    for _ in range(args.repeats):
+        start = time.perf_counter()
+        predict_risk(*SITE_ARGS, model=model)
+        samples.append(time.perf_counter() - start)
+    samples = np.array(samples) * 1e3
+    print(f"🔁 predict_risk with explanation: p50 {np.percentile(samples, 50):.2f} ms, "
+          f"p99 {np.percentile(samples, 99):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark the array-compiled forest against scikit-learn's predict_proba.
+
+Checks that both give bit-for-bit identical probabilities, then compares
+latency from single rows up to large batches.
+
+Run from the Rockfall_prediction_model directory:
+    python -m benchmarks.bench_forest
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from rockfall.forest import compile_forest
+from rockfall.model import FEATURE_NAMES, NUMERIC_FEATURES, load_model
+
+# Numeric feature ranges covering the training data's split thresholds
+LOW = np.array([0, 0, 0, 0, 0, 0, -20, -10, 0, 0, 0, 0])
+HIGH = np.array([700, 70, 360, 5, 60, 20, 40, 35, 25, 3.5, 4.5, 2200])
+
+
+def make_features(n, seed=0):
+    rng = np.random.default_rng(seed)
+    numeric = rng.uniform(LOW, HIGH, (n, len(NUMERIC_FEATURES)))
+    one_hot = rng.integers(0, 2, (n, len(FEATURE_NAMES) - len(NUMERIC_FEATURES)))
+    return np.column_stack([numeric, one_hot]).astype(np.float64)
+
+
+def best_of(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--parity-rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    estimator = load_model().estimator
+    start = time.perf_counter()
+    forest = compile_forest(estimator)
+    print(f"🔧 compiled {forest.n_trees} trees ({len(forest.feature):,} nodes, {forest.nbytes / 1e6:.2f} MB) "
+          f"in {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    features = make_features(args.parity_rows)
+    features[::7, 3] = np.nan  # exercise missing-value routing too
+    frame = pd.DataFrame(features, columns=list(FEATURE_NAMES))
+    assert np.array_equal(forest.predict_proba(features), estimator.predict_proba(frame))
+    print(f"✅ compiled forest matches scikit-learn bit for bit on {args.parity_rows:,} rows")
+
+    print(f"\n{'rows':>8} {'scikit-learn':>14} {'compiled':>12} {'speedup':>9}")
+    for rows in (1, 10, 100, 1_000, 10_000):
+        batch = make_features(rows, seed=rows)
+        batch_frame = pd.DataFrame(batch, columns=list(FEATURE_NAMES))
+        repeats = 20 if rows <= 100 else 3
+        sklearn_time = best_of(lambda: estimator.predict_proba(batch_frame), repeats)
+        compiled_time = best_of(lambda: forest.predict_proba(batch), repeats)
+        print(f"{rows:>8,} {sklearn_time * 1e3:>11.3f} ms {compiled_time * 1e3:>9.3f} ms "
+              f"{sklearn_time / compiled_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark slope image analysis on a large synthetic drone photo.
+
+Writes a synthetic JPEG of --megapixels (rock texture, joints and a vegetated
+band), then times analyze_image end to end and split into decoding the
+working copy and the tiled feature extraction.
+
+Run from the Rockfall_prediction_model directory:
+    python -m benchmarks.bench_imaging --megapixels 40
+"""
+
+import argparse
+import math
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from rockfall.imaging import analyze_image, load_working_copy, summarize_tiles, tile_features
+
+
+def synthetic_photo(path, megapixels, seed=0):
+    # Drawn at 1/4 scale and upsampled, so the benchmark itself stays light
+    width = int(math.sqrt(megapixels * 1e6 * 3 / 2))
+    height = int(width * 2 / 3)
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height // 4, 0:width // 4]
+    rock = 0.45 + 0.08 * np.sin(x / 9 + y / 31) + 0.06 * rng.standard_normal(x.shape)
+    rock -= 0.3 * (np.abs((x + 2 * y) % 120 - 60) < 2)  # joint set
+    image = np.stack([rock, rock * 0.95, rock * 0.9], axis=-1)
+    image[:, :width // 16, 1] += 0.25
+    image[:, :width // 16, 0] -= 0.1
+    Image.fromarray((np.clip(image, 0, 1) * 255).astype(np.uint8)).resize((width, height)).save(path, quality=90)
+    return width, height
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--megapixels", type=float, default=40)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "slope.jpg"
+        width, height = synthetic_photo(path, args.megapixels)
+        print(f"📷 {width}x{height} JPEG ({width * height / 1e6:.1f} MP, {path.stat().st_size / 2 ** 20:.1f} MiB)")
+
+        totals, decodes, features = [], [], []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            rgb = load_working_copy(path)
+            decoded = time.perf_counter()
+            scores = summarize_tiles(tile_features(rgb))
+            finished = time.perf_counter()
+            decodes.append(decoded - start)
+            features.append(finished - decoded)
+            start = time.perf_counter()
+            analyze_image(path)
+            totals.append(time.perf_counter() - start)
+
+    print(f"🗜️ working copy: {rgb.shape[1]}x{rgb.shape[0]} ({rgb.nbytes / 2 ** 20:.1f} MiB)")
+    print(f"⏱️ analyze_image: median {np.median(totals) * 1e3:.0f} ms "
+          f"(decode {np.median(decodes) * 1e3:.0f} ms, tiled features {np.median(features) * 1e3:.0f} ms)")
+    print("🔍", scores)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmark the Random Forest prediction path: load, first prediction and steady state.
+
+Run from the Rockfall_prediction_model directory (in a fresh process, so the
+load and first prediction are cold):
+    python -m benchmarks.bench_model
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from rockfall.model import feature_matrix, load_model, predict_risk, site_features
+
+SITE_ARGS = (6, 4, 0, 15, 1000, 50, 45, 30, "Granite", {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--predictions", type=int, default=500)
+    parser.add_argument("--batch-rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    model = load_model()
+    print(f"📦 load: {model.load_seconds * 1e3:.1f} ms")
+    for message in model.load_warnings:
+        print(f"   ⚠️ {message}")
+
+    start = time.perf_counter()
+    predict_risk(*SITE_ARGS, model=model)
+    print(f"🥶 first prediction (end to end): {(time.perf_counter() - start) * 1e3:.2f} ms")
+
+    samples = []
+    for _ in range(args.predictions):
+        start = time.perf_counter()
+        predict_risk(*SITE_ARGS, model=model)
+        samples.append(time.perf_counter() - start)
+    samples = np.array(samples) * 1e3
+    print(f"🔁 steady state (end to end, {args.predictions} predictions): "
+          f"p50 {np.percentile(samples, 50):.2f} ms, p99 {np.percentile(samples, 99):.2f} ms")
+
+    stats = model.latency_stats()
+    print(f"🌲 predict_proba only: first {stats['first_prediction_ms']:.2f} ms, "
+          f"steady p50 {stats['steady_state_p50_ms']:.2f} ms, p99 {stats['steady_state_p99_ms']:.2f} ms")
+
+    rng = np.random.default_rng(0)
+    rows = [
+        site_features(*rng.uniform([0, 0, 0, -20, 0, 1, 0, 0], [100, 50, 100, 40, 3000, 200, 90, 90]), "Shale")
+        for _ in range(args.batch_rows)
+    ]
+    features = feature_matrix(rows)
+    start = time.perf_counter()
+    model.predict_proba(features)
+    elapsed = time.perf_counter() - start
+    print(f"📊 batch of {args.batch_rows:,}: {elapsed * 1e3:.1f} ms ({elapsed / args.batch_rows * 1e6:.2f} µs/row)")
+
+
+if __name__ == "__main__":
+    main()
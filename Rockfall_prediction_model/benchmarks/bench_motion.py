@@ -0,0 +1,80 @@
+"""
+Benchmark falling-rock motion detection on a synthetic fixed-camera feed.
+
+Writes --seconds of --fps JPEG frames of a static rock wall (sensor noise, a
+slow lighting drift) through which a block falls, then times monitor() end to
+end (decoding included) and the detector alone on pre-decoded working frames,
+and checks the event found against the true fall.
+
+Run from the Rockfall_prediction_model directory:
+    python -m benchmarks.bench_motion --width 1920 --height 1080
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from rockfall.motion import MotionDetector, monitor, read_frames
+
+# The block falls from FALL_START for FALL_SECONDS, from 10% to 90% of the frame height
+FALL_START = 4.0
+FALL_SECONDS = 1.2
+
+
+def synthetic_feed(directory, width, height, fps, seconds, seed=0):
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    wall = 110 + 25 * np.sin(x / 37 + y / 91) + 15 * np.sin(y / 13) + 10 * rng.standard_normal((height, width))
+    radius = height // 30
+    column = width * 2 // 3
+    path = []
+    for index in range(int(seconds * fps)):
+        t = index / fps
+        frame = wall * (1 + 0.05 * t / seconds) + 3 * rng.standard_normal((height, width))
+        fall = (t - FALL_START) / FALL_SECONDS
+        if 0 <= fall <= 1:
+            centre = height * (0.1 + 0.8 * fall ** 2)  # accelerating
+            frame[(y - centre) ** 2 + (x - column) ** 2 < radius ** 2] = 40
+            path.append(centre)
+        Image.fromarray(np.clip(frame, 0, 255).astype(np.uint8)).save(Path(directory) / f"{index:06d}.jpg", quality=85)
+    return (column - radius, min(path) - radius, column + radius, max(path) + radius)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--fps", type=float, default=25.0)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        truth = synthetic_feed(directory, args.width, args.height, args.fps, args.seconds)
+        result = monitor(directory, fps=args.fps)
+        frames = list(read_frames(directory, args.fps))
+
+    detector = MotionDetector()
+    start = time.perf_counter()
+    for timestamp, frame, scale in frames:
+        detector.process(frame, timestamp, scale)
+    detect_seconds = time.perf_counter() - start
+
+    print(f"🎞️ {result['frames']} frames of {args.width}x{args.height} JPEG at {args.fps:g} fps "
+          f"({frames[0][1].shape[1]}x{frames[0][1].shape[0]} working frames)")
+    print(f"⏱️ end to end {result['fps']:.0f} fps ({1e3 / result['fps']:.1f} ms/frame), "
+          f"detection alone {len(frames) / detect_seconds:.0f} fps ({detect_seconds / len(frames) * 1e3:.2f} ms/frame); "
+          f"real time needs {args.fps:g} fps")
+    print(f"🎯 true fall {FALL_START:.2f}-{FALL_START + FALL_SECONDS:.2f} s, bbox {[int(v) for v in truth]}")
+    for event in result["events"]:
+        print(f"🪨 event {event['start']:.2f}-{event['end']:.2f} s, bbox {event['bbox']}, "
+              f"descent {event['descent']:.0f} px, falling {event['falling']}, clip {len(event['clip'])} frames")
+    if not result["events"]:
+        print("❌ no event detected")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark tiled orthomosaic analysis: throughput and peak memory vs image size.
+
+Writes a synthetic --size x --size RGB orthomosaic as an .npy file (band by
+band, so writing it stays light too), analyzes it cell by cell in a
+process pool and reports cells per second and the peak RSS of the parent and
+of the largest worker. Peak memory should not grow with --size.
+
+Run from the Rockfall_prediction_model directory:
+    python -m benchmarks.bench_orthomosaic --size 20000 --workers 4
+"""
+
+import argparse
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from rockfall.orthomosaic import DEFAULT_CELL_PIXELS, analyze_orthomosaic
+
+# Pixels generated per band while writing the synthetic image
+BAND_PIXELS = 1 << 21
+
+
+def synthetic_orthomosaic(path, size, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.arange(size)
+    band_rows = max(1, BAND_PIXELS // size)
+    with open(path, "wb") as output:
+        np.lib.format.write_array_header_1_0(output, {"descr": "|u1", "fortran_order": False,
+                                                      "shape": (size, size, 3)})
+        for start in range(0, size, band_rows):
+            y = np.arange(start, min(start + band_rows, size))[:, None]
+            rock = 0.45 + 0.08 * np.sin(x / 9 + y / 31) + 0.06 * rng.standard_normal((len(y), size))
+            rock -= 0.3 * (np.abs((x + 2 * y) % 120 - 60) < 2)  # joint set
+            band = np.stack([rock, rock * 0.95, rock * 0.9], axis=-1)
+            band[:, : size // 4, 1] += 0.25  # vegetated strip
+            band[:, -size // 8:] = 0  # nodata margin
+            (np.clip(band, 0, 1) * 255).astype(np.uint8).tofile(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=12_000, help="image side in pixels")
+    parser.add_argument("--cell", type=int, default=DEFAULT_CELL_PIXELS)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "orthomosaic.npy"
+        synthetic_orthomosaic(path, args.size)
+        print(f"🛰️ {args.size:,}x{args.size:,} px orthomosaic ({path.stat().st_size / 2 ** 30:.2f} GiB on disk)")
+        before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        start = time.perf_counter()
+        grid = analyze_orthomosaic(path, cell=args.cell, workers=args.workers)
+        elapsed = time.perf_counter() - start
+
+    cells = grid["valid"].size
+    print(f"⏱️ {cells:,} cells in {elapsed:.1f} s ({cells / elapsed:.1f} cells/s, "
+          f"{args.size ** 2 / elapsed / 1e6:.0f} MP/s)")
+    print(f"🧠 peak RSS: parent {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB "
+          f"(before analysis {before / 1024:.0f} MiB), largest worker "
+          f"{resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark model loading per worker: pickle vs memory-mapped registry version.
+
+Publishes the current model/rockfall_model.pkl into a temporary registry, then
+starts N fresh (spawned) worker processes per mode that load the model, score
+a batch and hold it while every worker reports its load time (cold, i.e. with
+imports, and of the model alone), RSS and PSS. PSS splits shared pages between
+workers, so the memory-mapped forest shows up as a small PSS per worker.
+
+Run from the Rockfall_prediction_model directory:
+    python -m benchmarks.bench_registry --workers 4
+"""
+
+import argparse
+import multiprocessing
+import tempfile
+import time
+import warnings
+
+import numpy as np
+
+
+def _worker(mode, registry_root, barrier, results):
+    start = time.perf_counter()
+    if mode == "pickle":
+        from rockfall.model import load_model
+        model = load_model()
+    else:
+        from rockfall.registry import ModelRegistry
+        model = ModelRegistry(registry_root).current()
+    load_seconds = time.perf_counter() - start
+
+    from rockfall.model import FEATURE_NAMES
+    from rockfall.profiling import memory_usage
+    X = np.random.default_rng(0).uniform(0, 100, (1000, len(FEATURE_NAMES)))
+    start = time.perf_counter()
+    model.predict_proba(X[:1])
+    first_seconds = time.perf_counter() - start
+    model.predict_proba(X)
+
+    # Measure while every worker of this mode holds its model
+    barrier.wait()
+    results.put({"load_seconds": load_seconds, "model_load_seconds": model.load_seconds,
+                 "first_seconds": first_seconds, **memory_usage()})
+    barrier.wait()
+
+
+def _run(mode, registry_root, workers):
+    context = multiprocessing.get_context("spawn")
+    barrier, results = context.Barrier(workers), context.Queue()
+    processes = [context.Process(target=_worker, args=(mode, registry_root, barrier, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    from rockfall.model import load_model
+    from rockfall.registry import ModelRegistry
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        estimator = load_model().estimator
+    with tempfile.TemporaryDirectory() as root:
+        registry = ModelRegistry(root)
+        version = registry.publish(estimator, activate=True)
+        print(f"📦 published {version}: {registry.metadata(version)['nbytes'] / 2 ** 20:.1f} MiB of node arrays")
+
+        for mode in ("pickle", "registry"):
+            samples = _run(mode, root, args.workers)
+            mean = lambda key: np.mean([sample[key] for sample in samples])
+            mib = lambda key: mean(key) / 2 ** 20
+            print(f"{'🥒' if mode == 'pickle' else '🗺️'} {mode:<8} ({args.workers} workers): "
+                  f"cold load {mean('load_seconds') * 1e3:7.1f} ms (model only {mean('model_load_seconds') * 1e3:6.1f} ms), "
+                  f"first prediction {mean('first_seconds') * 1e3:5.2f} ms, "
+                  f"RSS {mib('rss_bytes'):6.1f} MiB, PSS {mib('pss_bytes'):6.1f} MiB, "
+                  f"shared {mib('shared_bytes'):6.1f} MiB per worker")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Benchmark calculate_risk_batch against the scalar calculate_risk.
+
+Run from the Rockfall_prediction_model directory:
+    python -m benchmarks.bench_risk_batch
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from rockfall.batch import CONTRIBUTION_LABELS, calculate_risk_batch, risk_level_names
+from rockfall.engine import IMAGE_ANALYSIS_KEYS, IMAGE_INPUT_KEYS, ROCK_FACTORS, calculate_risk
+
+
+def make_inputs(n, seed=0):
+    """Random slider-like inputs; roughly half the rows carry (partial) image analysis."""
+    rng = np.random.default_rng(seed)
+    inputs = {
+        "rainfall": rng.integers(0, 101, n),
+        "snowfall": rng.integers(0, 51, n),
+        "wind_speed": rng.integers(0, 101, n),
+        "temperature": rng.integers(-20, 41, n),
+        "elevation": rng.integers(0, 3001, n),
+        "fracture_spacing": rng.integers(0, 201, n),
+        "fracture_orientation": rng.integers(0, 91, n),
+        "slope_angle": rng.integers(0, 91, n),
+        "rock_type": rng.choice(list(ROCK_FACTORS) + ["Unknown"], n),
+    }
+    has_image = rng.random(n) < 0.5
+    for key in IMAGE_INPUT_KEYS:
+        values = rng.integers(10, 95, n).astype(np.float64)
+        values[~has_image | (rng.random(n) < 0.1)] = np.nan
+        inputs[key] = values
+    return inputs
+
+
+def scenarios(inputs):
+    """Input variants: string vs categorical rock types, with and without image columns."""
+    no_image = {name: values for name, values in inputs.items() if name not in IMAGE_INPUT_KEYS}
+    change_only = {name: values for name, values in inputs.items() if name not in IMAGE_ANALYSIS_KEYS}
+    categorical = dict(no_image, rock_type=pd.Categorical(inputs["rock_type"]))
+    all_images = dict(categorical)
+    for key in IMAGE_INPUT_KEYS:
+        all_images[key] = np.nan_to_num(inputs[key], nan=50.0)
+    return {
+        "strings, mixed images": inputs,
+        "strings, no images": no_image,
+        "strings, change detection only": change_only,
+        "categorical, no images": categorical,
+        "categorical, all images": all_images,
+    }
+
+
+def row_arguments(inputs, i):
+    image_analysis = {
+        key: int(inputs[key][i]) for key in IMAGE_INPUT_KEYS
+        if key in inputs and not np.isnan(inputs[key][i])
+    }
+    return (
+        int(inputs["rainfall"][i]), int(inputs["snowfall"][i]), int(inputs["wind_speed"][i]),
+        int(inputs["temperature"][i]), int(inputs["elevation"][i]), int(inputs["fracture_spacing"][i]),
+        int(inputs["fracture_orientation"][i]), int(inputs["slope_angle"][i]), str(inputs["rock_type"][i]),
+        image_analysis
+    )
+
+
+def check_parity(inputs):
+    """Assert the batch result equals the scalar function row by row."""
+    risk, codes, confidence, contributions = calculate_risk_batch(inputs)
+    levels = risk_level_names(codes)
+    for i in range(len(risk)):
+        s_risk, s_level, s_confidence, s_contributions = calculate_risk(*row_arguments(inputs, i))
+        assert risk[i] == s_risk, (i, risk[i], s_risk)
+        assert levels[i] == s_level, (i, levels[i], s_level)
+        assert confidence[i] == s_confidence, (i, confidence[i], s_confidence)
+        for j, label in enumerate(CONTRIBUTION_LABELS):
+            if label in s_contributions:
+                assert contributions[i, j] == s_contributions[label], (i, label)
+            else:
+                assert np.isnan(contributions[i, j]), (i, label)
+
+
+def time_scalar(inputs, n):
+    rows = [row_arguments(inputs, i) for i in range(n)]
+    start = time.perf_counter()
+    for args in rows:
+        calculate_risk(*args)
+    return time.perf_counter() - start
+
+
+def time_batch(inputs, repeats=5):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        calculate_risk_batch(inputs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--scalar-rows", type=int, default=20_000,
+                        help="rows timed with the scalar loop (per-row cost is flat)")
+    args = parser.parse_args()
+
+    for inputs in scenarios(make_inputs(20_000, seed=1)).values():
+        check_parity(inputs)
+    print("✅ Batch results match calculate_risk exactly on 20,000 rows per input variant")
+
+    scalar_rows = args.scalar_rows
+    scalar_per_row = time_scalar(make_inputs(scalar_rows), scalar_rows) / scalar_rows
+    print(f"\n🐢 Scalar calculate_risk: {scalar_per_row * 1e6:.2f} µs/row")
+
+    results = {}
+    for n in args.sizes:
+        for name, inputs in scenarios(make_inputs(n)).items():
+            results.setdefault(name, []).append((n, time_batch(inputs)))
+
+    for name, timings in results.items():
+        print(f"\n⚡ calculate_risk_batch ({name})")
+        print(f"{'rows':>10} {'batch total':>14} {'µs/row':>10} {'speed-up':>10}")
+        for n, elapsed in timings:
+            per_row = elapsed / n
+            print(f"{n:>10,} {elapsed * 1e3:>11.2f} ms {per_row * 1e6:>10.4f} {scalar_per_row / per_row:>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
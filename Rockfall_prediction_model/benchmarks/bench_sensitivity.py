@@ -0,0 +1,70 @@
+"""
+Benchmark the vectorized sensitivity sweeps against the old nested calculate_risk loop.
+
+Run from the Rockfall_prediction_model directory:
+    python -m benchmarks.bench_sensitivity
+"""
+
+import time
+
+import numpy as np
+
+from rockfall.engine import calculate_risk
+from rockfall.sensitivity import interaction_map, sweep_factors
+
+BASE = {
+    "rainfall": 6, "snowfall": 4, "wind_speed": 0, "temperature": 15, "elevation": 1000,
+    "fracture_spacing": 50, "fracture_orientation": 45, "slope_angle": 30, "rock_type": "Limestone"
+}
+SWEPT = ["rainfall", "snowfall", "wind_speed", "temperature", "elevation", "fracture_spacing", "slope_angle"]
+
+
+def scalar_sweep(factors):
+    """The loop create_heat_maps used before the sweep engine."""
+    base_params = [BASE[name] for name in SWEPT]
+    matrix = []
+    for i in range(len(base_params)):
+        row = []
+        for variation in factors:
+            params = base_params.copy()
+            params[i] = params[i] * variation
+            risk, _, _, _ = calculate_risk(
+                params[0], params[1], params[2], params[3], params[4], params[5],
+                45, params[6], "Limestone", {}
+            )
+            row.append(risk)
+        matrix.append(row)
+    return np.array(matrix)
+
+
+def best_of(fn, repeats=5):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    factors = np.linspace(0.5, 1.5, 10)
+    assert np.array_equal(sweep_factors(BASE, factors), scalar_sweep(factors))
+    print("✅ sweep_factors matches the scalar loop exactly")
+
+    print(f"\n{'sensitivity grid':>18} {'scalar loop':>14} {'vectorized':>12}")
+    for resolution in (10, 100, 500, 5_000):
+        factors = np.linspace(0.5, 1.5, resolution)
+        scalar = best_of(lambda: scalar_sweep(factors), repeats=1 if resolution > 100 else 5)
+        vectorized = best_of(lambda: sweep_factors(BASE, factors))
+        print(f"{f'7 × {resolution}':>18} {scalar * 1e3:>11.2f} ms {vectorized * 1e3:>9.2f} ms")
+
+    print(f"\n{'interaction grid':>18} {'vectorized':>12}")
+    for resolution in (50, 100, 200, 400):
+        elapsed = best_of(lambda: interaction_map(
+            BASE, "rainfall", np.linspace(0, 100, resolution), "slope_angle", np.linspace(0, 90, resolution)
+        ))
+        print(f"{f'{resolution} × {resolution}':>18} {elapsed * 1e3:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark the scoring service endpoints in-process with Flask's test client.
+
+Run from the Rockfall_prediction_model directory:
+    python -m benchmarks.bench_service
+"""
+
+import argparse
+import csv
+import io
+import json
+import time
+
+import numpy as np
+
+from benchmarks.bench_risk_batch import make_inputs
+from rockfall.engine import IMAGE_ANALYSIS_KEYS
+from rockfall.service import create_app
+
+
+def make_rows(n, seed=0):
+    inputs = make_inputs(n, seed)
+    rows = []
+    for i in range(n):
+        row = {name: values[i].item() for name, values in inputs.items() if name not in IMAGE_ANALYSIS_KEYS}
+        image_analysis = {key: inputs[key][i].item() for key in IMAGE_ANALYSIS_KEYS if not np.isnan(inputs[key][i])}
+        if image_analysis:
+            row["image_analysis"] = image_analysis
+        rows.append(row)
+    return rows
+
+
+def rows_to_csv(rows):
+    buffer = io.StringIO()
+    fields = [name for name in rows[0] if name != "image_analysis"] + list(IMAGE_ANALYSIS_KEYS)
+    writer = csv.DictWriter(buffer, fieldnames=fields)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({**{k: v for k, v in row.items() if k != "image_analysis"}, **row.get("image_analysis", {})})
+    return buffer.getvalue()
+
+
+def percentile_ms(samples, q):
+    return np.percentile(samples, q) * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--batch-rows", type=int, default=10_000)
+    args = parser.parse_args()
+
+    client = create_app().test_client()
+
+    # Single-site latency
+    rows = make_rows(args.requests)
+    samples = []
+    for row in rows:
+        start = time.perf_counter()
+        response = client.post("/score", json=row)
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.get_json()
+    print(f"🎯 POST /score: p50 {percentile_ms(samples, 50):.3f} ms, p99 {percentile_ms(samples, 99):.3f} ms")
+
+    # Batch latency, JSON and CSV bodies
+    batch = make_rows(args.batch_rows, seed=1)
+    payloads = {
+        "JSON": dict(json=batch),
+        "CSV": dict(data=rows_to_csv(batch), content_type="text/csv"),
+    }
+    for name, payload in payloads.items():
+        start = time.perf_counter()
+        response = client.post("/score/batch", **payload)
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 200, response.get_data(as_text=True)[:200]
+        per_row = elapsed / len(batch) * 1e6
+        print(f"📦 POST /score/batch ({name}, {len(batch):,} rows): {elapsed * 1e3:.1f} ms total, {per_row:.2f} µs/row")
+
+    # The batch endpoint must agree with the single-site endpoint
+    result = client.post("/score/batch", json=batch[:200]).get_json()
+    for i, row in enumerate(batch[:200]):
+        single = client.post("/score", json=row).get_json()
+        assert single["risk_percentage"] == result["risk_percentage"][i]
+        assert single["risk_level"] == result["risk_level"][i]
+        assert single["mining_feasibility"] == result["mining_feasibility"][i]
+    print("✅ /score/batch matches /score on 200 rows")
+    print(json.dumps(client.post("/score", json=batch[0]).get_json(), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Benchmark Sobol sensitivity analysis of the risk model within a time budget.
+
+Run from the Rockfall_prediction_model directory:
+    python -m benchmarks.bench_sobol --evaluations 1000000 --time-budget 10
+"""
+
+import argparse
+import os
+
+from rockfall.sobol import BLOCK_SIZE, convergence_report, default_problem, sobol_indices
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--evaluations", type=int, default=1_000_000, help="model evaluations, N * (k + 2)")
+    parser.add_argument("--time-budget", type=float, default=10.0, help="seconds")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    k = len(default_problem())
+    n_samples = max(1, args.evaluations // (k + 2))
+    result = sobol_indices(
+        n_samples=n_samples, block_size=args.block_size, workers=args.workers,
+        time_budget=args.time_budget, seed=args.seed
+    )
+    print(convergence_report(result))
+    throughput = result["evaluations"] / result["elapsed"] / 1e6
+    print(f"\n⏱️ {args.workers} worker(s): {throughput:.1f} M evaluations/s")
+
+
+if __name__ == "__main__":
+    main()
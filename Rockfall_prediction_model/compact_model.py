@@ -0,0 +1,107 @@
+import argparse
+import json
+import warnings
+from pathlib import Path
+
+import joblib
+
+from rockfall.compaction import (
+    DEFAULT_MAX_DEPTHS, DEFAULT_MIN_SAMPLES_LEAF, DEFAULT_N_ESTIMATORS, DEFAULT_RECALL_TOLERANCE, FOREST_KINDS,
+    choose_candidate, fit_candidate, format_candidates, search_compact
+)
+from rockfall.features import schema_path
+from rockfall.model import MODEL_PATH
+from rockfall.training import DEFAULT_CHUNK_ROWS, _save_named
+
+# Default dataset location, next to this script
+DATA_PATH = Path(__file__).resolve().parent / "data" / "balanced_synthetic_rockfall_data.csv"
+
+
+def depth(value):
+    return None if value.lower() in ("none", "0") else int(value)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Search compact forests: Pareto front of recall vs size vs p99 latency, save the chosen one."
+    )
+    parser.add_argument("--data", type=Path, default=DATA_PATH, help="dataset file (default: %(default)s)")
+    parser.add_argument("--model", type=Path,
+                        help="also prune this fitted forest by keeping its first N trees (evaluate it on data it "
+                             "was not trained on)")
+    parser.add_argument("--output", type=Path, default=MODEL_PATH.with_name("rockfall_model.compact.pkl"),
+                        help="where to save the chosen model (default: %(default)s)")
+    parser.add_argument("--estimator", choices=FOREST_KINDS, default="random_forest")
+    parser.add_argument("--n-estimators", type=int, nargs="+", default=list(DEFAULT_N_ESTIMATORS))
+    parser.add_argument("--max-depth", type=depth, nargs="+", default=list(DEFAULT_MAX_DEPTHS),
+                        help="tree depths to try ('none' for unlimited)")
+    parser.add_argument("--min-samples-leaf", type=int, nargs="+", default=list(DEFAULT_MIN_SAMPLES_LEAF))
+    parser.add_argument("--recall-tolerance", type=float, default=DEFAULT_RECALL_TOLERANCE,
+                        help="event recall the chosen model may give up against the best candidate")
+    parser.add_argument("--min-recall", type=float, help="event recall the chosen model must reach")
+    parser.add_argument("--max-size-mib", type=float, help="artifact size budget")
+    parser.add_argument("--max-p99-ms", type=float, help="single-row p99 latency budget")
+    parser.add_argument("--max-rows", type=int, help="search on a random subset of this many rows")
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--n-jobs", type=int, default=-1, help="training threads (-1 = all cores)")
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--publish", action="store_true", help="also publish the chosen model to the registry")
+    parser.add_argument("--report", type=Path, help="write every candidate, the front and the choice as JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    base_model = None
+    if args.model:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            base_model = joblib.load(args.model)
+        if not hasattr(base_model, "estimators_"):
+            raise SystemExit(f"❌ {args.model} is not a forest; only forests can be pruned")
+
+    results, front, (X_train, y_train) = search_compact(
+        args.data,
+        kind=args.estimator,
+        n_estimators=args.n_estimators,
+        max_depths=args.max_depth,
+        min_samples_leaf=args.min_samples_leaf,
+        base_model=base_model,
+        max_rows=args.max_rows,
+        test_size=args.test_size,
+        chunk_rows=args.chunk_rows,
+        n_jobs=args.n_jobs,
+        random_state=args.random_state
+    )
+    chosen = choose_candidate(
+        results, front,
+        recall_tolerance=args.recall_tolerance,
+        min_recall=args.min_recall,
+        max_bytes=args.max_size_mib * 2 ** 20 if args.max_size_mib else None,
+        max_p99_ms=args.max_p99_ms
+    )
+
+    print(f"🗜️ {len(results)} candidates, {len(front)} on the Pareto front (★), chosen ▶:\n")
+    print(format_candidates(results, front, chosen))
+    if args.report:
+        args.report.write_text(json.dumps({"candidates": results, "pareto_front": front, "chosen": chosen}, indent=2))
+        print("\n📝 Report written to:", args.report)
+    if chosen is None:
+        raise SystemExit("❌ No candidate on the Pareto front meets the recall, size and latency budgets")
+
+    forest = fit_candidate(results[chosen], X_train, y_train, args.estimator, base_model, args.n_jobs,
+                           args.random_state)
+    _save_named(forest, args.output)
+    print("\n💾 Compact model saved at:", args.output)
+    print("🧾 Feature schema saved at:", schema_path(args.output))
+
+    if args.publish:
+        from rockfall.registry import get_registry
+        version = get_registry().publish(forest, metrics=results[chosen], data_path=args.data,
+                                         note=f"compact model from {args.output.name}")
+        print(f"📦 Published as {version} (activate it with: python manage_models.py activate {version})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from rockfall.change import CHANGE_PIXELS, CHANGE_TILE_PIXELS, ChangeDetectionError, detect_changes
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Detect new rockfall scars between repeat photos of the same slope face."
+    )
+    parser.add_argument("images", type=Path, nargs="+",
+                        help="two or more photos of the same face in chronological order; "
+                             "each is compared with the one before it")
+    parser.add_argument("--gsd", type=float, help="ground sampling distance (m per photo pixel) for areas in m²")
+    parser.add_argument("--working-pixels", type=int, default=CHANGE_PIXELS,
+                        help="photos are decoded at a reduced scale to at most this many pixels")
+    parser.add_argument("--tile", type=int, default=CHANGE_TILE_PIXELS, help="tile side in working-copy pixels")
+    parser.add_argument("--masks", type=Path,
+                        help="directory for change masks, one PNG per pair in the earlier photo's working copy "
+                             "(255: changed pixel in a scar tile, 96: other changed pixel)")
+    parser.add_argument("--report", type=Path, help="write the per-pair metrics as JSON")
+    return parser.parse_args()
+
+
+def save_mask(result, path):
+    top, left, height, width = result["overlap"]
+    tile = result["tile"]
+    rows, cols = result["scar"].shape
+    scar = np.zeros((height, width), dtype=bool)
+    scar[:rows * tile, :cols * tile] = np.kron(result["scar"], np.ones((tile, tile), dtype=bool))
+    mask = np.where(result["mask"], np.where(scar, 255, 96), 0).astype(np.uint8)
+    Image.fromarray(mask).save(path)
+
+
+def main():
+    args = parse_args()
+    if len(args.images) < 2:
+        raise SystemExit("❌ Change detection needs at least two photos")
+    try:
+        results = detect_changes(args.images, max_pixels=args.working_pixels, tile=args.tile, gsd=args.gsd)
+    except ChangeDetectionError as error:
+        raise SystemExit(f"❌ {error}")
+
+    report = []
+    if args.masks:
+        args.masks.mkdir(parents=True, exist_ok=True)
+    for before, after, result in zip(args.images, args.images[1:], results):
+        metrics = result["metrics"]
+        dy, dx = result["shift"]
+        area = (f"{metrics['scar_area_m2']:,.1f} m²" if metrics["scar_area_m2"] is not None
+                else f"{metrics['scar_area_px']:,.0f} px")
+        flag = "🚨 NEW DETACHMENT" if result["new_detachment"] else "✅ no new scar"
+        print(f"{flag}  {before.name} → {after.name}: scar {area} ({metrics['scar_area_share']:.2%} of the view), "
+              f"changed {metrics['changed_area_share']:.2%}, new_detachment {result['new_detachment']}, "
+              f"shift {round(dy * result['scale']):+d}, {round(dx * result['scale']):+d} px")
+        entry = {"before": str(before), "after": str(after), "new_detachment": result["new_detachment"],
+                 "shift_px": [dy * result["scale"], dx * result["scale"]],
+                 "registration_peak": result["registration_peak"], **metrics}
+        if args.masks:
+            entry["mask"] = str(args.masks / f"{before.stem}__{after.stem}.png")
+            save_mask(result, entry["mask"])
+        report.append(entry)
+
+    if args.report:
+        args.report.write_text(json.dumps(report, indent=2))
+        print("💾 Report saved at:", args.report)
+
+
+if __name__ == "__main__":
+    main()
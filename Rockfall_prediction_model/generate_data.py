@@ -0,0 +1,44 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+from rockfall.profiling import peak_rss
+from rockfall.synthetic import DEFAULT_CHUNK_ROWS, DEFAULT_WEIGHTS, RockfallPhysics, write_dataset
+
+# Default output: the dataset train_model.py reads
+OUTPUT_PATH = Path(__file__).resolve().parent / "data" / "balanced_synthetic_rockfall_data.csv"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate a synthetic rockfall dataset (CSV, NPY or Parquet).")
+    parser.add_argument("--rows", type=int, default=10_000, help="rows to generate (default: %(default)s)")
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH,
+                        help="output file; the format follows the suffix (default: %(default)s)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="rows generated per chunk")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--event-rate", type=float, default=0.5, help="share of rockfall events (0.5 = balanced)")
+    parser.add_argument("--sharpness", type=float, default=4.0, help="label sharpness of the logistic physical model")
+    parser.add_argument("--weights", type=json.loads, default=None,
+                        help=f"JSON object overriding physical model weights, keys: {', '.join(DEFAULT_WEIGHTS)}")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    physics = RockfallPhysics(args.weights, event_rate=args.event_rate, sharpness=args.sharpness, seed=args.seed)
+
+    start = time.perf_counter()
+    path = write_dataset(args.output, args.rows, chunk_rows=args.chunk_rows, seed=args.seed, physics=physics)
+    elapsed = time.perf_counter() - start
+
+    size = path.stat().st_size
+    print(f"✅ Generated {args.rows:,} rows in {elapsed:.2f} s ({args.rows / elapsed:,.0f} rows/s)")
+    print(f"💾 {path} ({size / 2 ** 20:,.1f} MiB)")
+    peak = peak_rss()
+    if peak is not None:
+        print(f"🧠 Peak RSS: {peak / 2 ** 20:,.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
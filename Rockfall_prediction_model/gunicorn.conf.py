@@ -0,0 +1,17 @@
+"""
+Gunicorn settings for the rockfall scoring service.
+
+The app is preloaded in the master so NumPy and the engine are imported once and
+shared copy-on-write by every forked worker.
+"""
+
+import multiprocessing
+import os
+
+bind = os.getenv("ROCKFALL_SERVICE_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("ROCKFALL_SERVICE_WORKERS", multiprocessing.cpu_count()))
+preload_app = True
+# Scoring is CPU-bound and each request is short; sync workers avoid thread contention
+worker_class = "sync"
+keepalive = 5
+timeout = 30
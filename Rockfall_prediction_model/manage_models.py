@@ -0,0 +1,62 @@
+import argparse
+import json
+import warnings
+from pathlib import Path
+
+import joblib
+
+from rockfall.model import model_encoder
+from rockfall.registry import REGISTRY_PATH, ModelRegistry
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Publish, list and activate versions in the model registry.")
+    parser.add_argument("--registry", type=Path, default=REGISTRY_PATH, help="registry directory (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    publish = commands.add_parser("publish", help="store a trained model (.pkl and its .features.json) as a new version")
+    publish.add_argument("model", type=Path)
+    publish.add_argument("--data", type=Path, help="training dataset, hashed into the metadata")
+    publish.add_argument("--report", type=Path, help="metrics JSON written by train_model.py or update_model.py")
+    publish.add_argument("--note")
+    publish.add_argument("--activate", action="store_true", help="serve the new version right away")
+
+    commands.add_parser("list", help="list versions")
+    activate = commands.add_parser("activate", help="serve a version (running servers swap within seconds)")
+    activate.add_argument("version")
+    show = commands.add_parser("show", help="print a version's metadata")
+    show.add_argument("version", nargs="?")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    registry = ModelRegistry(args.registry)
+
+    if args.command == "publish":
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            estimator = joblib.load(args.model)
+        metrics = json.loads(args.report.read_text()) if args.report else None
+        version = registry.publish(estimator, metrics=metrics, data_path=args.data,
+                                   activate=args.activate, note=args.note, encoder=model_encoder(args.model))
+        print(f"✅ Published {args.model} as {version}" + (" (active)" if args.activate else ""))
+    elif args.command == "list":
+        active = registry.active_version()
+        for version in registry.versions():
+            metadata = registry.metadata(version)
+            accuracy = metadata["metrics"].get("accuracy")
+            print(f"{'▶' if version == active else ' '} {version}  {metadata['created']}  {metadata['estimator']:<32} "
+                  f"{metadata['format']:<7} " + (f"accuracy {accuracy:.4f}" if accuracy is not None else ""))
+    elif args.command == "activate":
+        registry.activate(args.version)
+        print(f"✅ {args.version} is now active")
+    else:
+        version = args.version or registry.active_version()
+        if version is None:
+            raise SystemExit("❌ No version given and none is active")
+        print(json.dumps(registry.metadata(version), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+from PIL import Image, ImageDraw
+
+from rockfall.alerts import send_sms_alert
+from rockfall.motion import DIFFERENCE_THRESHOLD, MOTION_WIDTH, MotionSourceError, monitor
+
+# Load Twilio credentials and ALERT_TO_NUMBER from .env, as the dashboard does
+load_dotenv(dotenv_path=Path(__file__).resolve().parent / ".env")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Watch a fixed slope camera for falling rocks and alert on motion events."
+    )
+    parser.add_argument("source", help="video file, stream URL (needs OpenCV) or directory of frames")
+    parser.add_argument("--fps", type=float, help="frame rate of a frame directory (default 25) or override for videos")
+    parser.add_argument("--width", type=int, default=MOTION_WIDTH, help="working frame width in pixels")
+    parser.add_argument("--threshold", type=int, default=DIFFERENCE_THRESHOLD,
+                        help="gray-level difference (0-255) counted as motion")
+    parser.add_argument("--clips", type=Path, help="directory for an animated GIF clip of every event")
+    parser.add_argument("--alert-to", default=os.getenv("ALERT_TO_NUMBER", ""),
+                        help="send an SMS for every event to this number (default: ALERT_TO_NUMBER)")
+    parser.add_argument("--no-alerts", action="store_true", help="never send SMS alerts")
+    parser.add_argument("--falling-only", action="store_true", help="alert only on events that moved downwards")
+    parser.add_argument("--alert-cooldown", type=float, default=300,
+                        help="minimum seconds between SMS alerts")
+    parser.add_argument("--report", type=Path, help="write the event summaries as JSON")
+    return parser.parse_args()
+
+
+def save_clip(event, path, fps):
+    box = [value / event["scale"] for value in event["bbox"]]
+    frames = []
+    for _, frame in event["clip"]:
+        image = Image.fromarray(frame).convert("RGB")
+        ImageDraw.Draw(image).rectangle(box, outline=(255, 0, 0), width=2)
+        frames.append(image)
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=int(1000 / fps), loop=0)
+
+
+def main():
+    args = parse_args()
+    source_name = Path(args.source).name or args.source
+    if args.clips:
+        args.clips.mkdir(parents=True, exist_ok=True)
+    alert_to = "" if args.no_alerts else args.alert_to.strip()
+    last_alert = None
+
+    def on_event(event):
+        nonlocal last_alert
+        kind = "falling object" if event["falling"] else "motion"
+        x0, y0, x1, y1 = event["bbox"]
+        print(f"🪨 {kind} at {event['start']:.2f}-{event['end']:.2f} s, box ({x0}, {y0})-({x1}, {y1}), "
+              f"descent {event['descent']:.0f} px, {event['motion_frames']} frames")
+        if args.clips:
+            event["clip_path"] = str(args.clips / f"{source_name}_{event['start']:09.2f}s.gif")
+            save_clip(event, event["clip_path"], args.fps or 25)
+        if not alert_to or (args.falling_only and not event["falling"]):
+            return
+        if last_alert is not None and time.monotonic() - last_alert < args.alert_cooldown:
+            print("⏳ SMS alert skipped (cooldown)")
+            return
+        ok, error = send_sms_alert(alert_to, (
+            f"🚨 ROCKFALL CAMERA ALERT ({source_name}): {kind} detected at {event['start']:.1f} s, "
+            f"descending {event['descent']:.0f} px. Keep personnel clear of the slope and inspect the bench."
+        ))
+        if ok:
+            last_alert = time.monotonic()
+            print(f"📱 SMS alert sent to {alert_to}")
+        else:
+            print(f"❌ Failed to send SMS alert: {error}")
+
+    try:
+        # Clips are only needed inside on_event; dropping them keeps memory flat on live streams
+        result = monitor(args.source, fps=args.fps, width=args.width, on_event=on_event, keep_clips=False,
+                         threshold=args.threshold)
+    except MotionSourceError as error:
+        raise SystemExit(f"❌ {error}")
+
+    print(f"🎞️ {result['frames']:,} frames in {result['seconds']:.1f} s ({result['fps']:.0f} fps), "
+          f"{len(result['events'])} events")
+    if args.report:
+        args.report.write_text(json.dumps(result["events"], indent=2))
+        print("💾 Report saved at:", args.report)
+
+
+if __name__ == "__main__":
+    main()
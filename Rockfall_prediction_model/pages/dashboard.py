@@ -4,13 +4,29 @@ import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from PIL import Image
 import io
 import base64
 import os
 from dotenv import load_dotenv
 from pathlib import Path
-from twilio.rest import Client
+from PIL import Image
+
+from rockfall.cache import (
+    cache_stats,
+    cached_calculate_risk,
+    cached_determine_mining_feasibility,
+    get_cache,
+    memoize,
+    quantize
+)
+from rockfall.alerts import get_twilio_client, get_twilio_from_number, send_sms_alert
+from rockfall.change import compare_images
+from rockfall.engine import build_precaution_message, get_risk_category
+from rockfall.model import CATEGORICAL_FEATURES, DEFAULT_SITE, ModelSchemaError, predict_risk
+from rockfall.registry import RegistryError, serving_model
+from rockfall.sensitivity import SENSITIVITY_PARAMETERS, interaction_map, sweep_factors
+from rockfall.uploads import BATCH_WORKERS, content_hash, expand_uploads, get_upload_cache
+from rockfall.uncertainty import default_uncertainty, propagate_uncertainty
 
 # Load environment variables from the .env file located in the parent directory
 load_dotenv(dotenv_path=Path(__file__).resolve().parent.parent / ".env")
@@ -597,91 +613,58 @@ if 'uploaded_image' not in st.session_state:
     st.session_state.uploaded_image = None
 if 'image_analysis' not in st.session_state:
     st.session_state.image_analysis = {}
+if 'batch_results' not in st.session_state:
+    st.session_state.batch_results = []
 
-# Function to analyze uploaded image
-def analyze_image(uploaded_image):
-    # This is a placeholder function that simulates image analysis
-    # In a real application, you would use computer vision techniques here
-    
-    analysis_results = {
-        "slope_steepness": np.random.randint(30, 80),
-        "rock_fractures": np.random.randint(20, 90),
-        "vegetation_cover": np.random.randint(10, 80),
-        "rock_type_confidence": np.random.randint(60, 95),
-        "erosion_signs": np.random.randint(10, 70)
-    }
-    
-    return analysis_results
+# Samples drawn when Monte Carlo uncertainty propagation is enabled
+MONTE_CARLO_SAMPLES = 100_000
 
-############################################
-# Twilio SMS alert helpers
-############################################
+# Fixed seed, so reruns with the same inputs show the same confidence and feasibility
+MONTE_CARLO_SEED = 0
 
-def _get_twilio_client():
-    """Return an authenticated Twilio Client if credentials are set, else (None, error)."""
-    account_sid = os.getenv("TWILIO_ACCOUNT_SID")
-    auth_token = os.getenv("TWILIO_AUTH_TOKEN")
-    
-    # Check if credentials are missing or placeholder values
-    if not account_sid or not auth_token:
-        return None, "Missing TWILIO_ACCOUNT_SID or TWILIO_AUTH_TOKEN environment variables"
-    
-    # Check if credentials are still placeholder values
-    if (account_sid == "your_account_sid_here" or 
-        auth_token == "your_auth_token_here"):
-        return None, "Twilio credentials are placeholder values. Please update the .env file with valid credentials."
-    
-    # Check if Account SID has the proper format (starts with 'AC' and is 34 characters)
-    if not account_sid.startswith('AC') or len(account_sid) != 34:
-        return None, "Invalid TWILIO_ACCOUNT_SID format. Should start with 'AC' and be 34 characters long."
-    
+# Prediction engines selectable in the form
+HEURISTIC_ENGINE = "📐 Heuristic formula"
+MODEL_ENGINE = "🌲 Random Forest model"
+
+# Function to analyze uploaded image
+def analyze_image(uploaded_image):
+    """Content hash, downscaled preview and analysis of an upload, cached by content hash."""
+    # Hash each upload once per session; reruns only look the hash up
+    digests = st.session_state.setdefault("upload_digests", {})
+    digest = digests.get(uploaded_image.file_id)
+    if digest is not None:
+        cached = get_upload_cache().lookup(digest)
+        if cached is not None:
+            return (digest, *cached)
     try:
-        return Client(account_sid, auth_token), None
-    except Exception as e:
-        return None, f"Failed to create Twilio client: {str(e)}"
+        digest, preview, analysis = get_upload_cache().process(uploaded_image.getvalue(), digest)
+    except (OSError, ValueError, Image.DecompressionBombError) as error:
+        st.warning(f"⚠️ Image analysis failed, continuing without it: {error}")
+        return None, None, {}
+    digests[uploaded_image.file_id] = digest
+    return digest, preview, analysis
 
-def _get_twilio_from_number():
-    """Get the Twilio sender number from env var TWILIO_FROM_NUMBER."""
-    from_number = os.getenv("TWILIO_FROM_NUMBER")
-    # Check if it's missing or a placeholder value
-    if not from_number or from_number == "+1234567890":
-        return None
-    return from_number
 
-def send_sms_alert(to_number: str, message: str):
-    """Send an SMS using Twilio. Returns (ok: bool, error: Optional[str])."""
-    client, err = _get_twilio_client()
-    if err:
-        return False, err
-    from_number = _get_twilio_from_number()
-    if not from_number:
-        return False, "Missing TWILIO_FROM_NUMBER environment variable"
-    try:
-        client.messages.create(to=to_number, from_=from_number, body=message)
-        return True, None
-    except Exception as e:
-        return False, str(e)
+# Change detection results by (earlier, current) upload content hashes, shared by all sessions
+CHANGE_CACHE = get_cache("change_detection", 16, 0)
 
-def build_precaution_message(risk_level: str, risk_percentage: float, feasibility_status: str) -> str:
-    """Return a concise SMS message with risk, mining feasibility, and actionable precautions."""
-    base = f"Rockfall Risk: {risk_level} ({risk_percentage:.0f}%). Mining: {feasibility_status}. "
-    if risk_level == "CRITICAL":
-        steps = (
-            "Evacuate immediately; Close access; Notify authorities; Deploy monitoring."
-        )
-    elif risk_level == "HIGH":
-        steps = (
-            "Restrict access; Increase monitoring; Install warning signs; Prepare evacuation plan."
-        )
-    elif risk_level == "MODERATE":
-        steps = (
-            "Maintain monitoring; Set warnings; Inspect bi-weekly; Be vigilant after storms."
-        )
-    else:  # LOW
-        steps = (
-            "Continue standard monitoring; Maintain safety protocols; Review plans quarterly."
-        )
-    return base + "Precautions: " + steps
+
+def detect_change(previous_image, uploaded_image):
+    """Change detection between an earlier photo of the face and the current upload, cached by content hash."""
+    digests = st.session_state.setdefault("upload_digests", {})
+    key = tuple(digests.get(upload.file_id) or content_hash(upload.getvalue())
+                for upload in (previous_image, uploaded_image))
+    hit, change = CHANGE_CACHE.lookup(key)
+    if not hit:
+        try:
+            change = compare_images(io.BytesIO(previous_image.getvalue()), io.BytesIO(uploaded_image.getvalue()))
+        except (OSError, ValueError, Image.DecompressionBombError) as error:
+            st.warning(f"⚠️ Change detection failed, continuing without it: {error}")
+            return None
+        # The pixel mask is only needed for exported masks; the tile grids are enough here
+        change = {name: value for name, value in change.items() if name != "mask"}
+        CHANGE_CACHE.put(key, change)
+    return change
 
 ############################################
 # Alerts configuration (Sidebar)
@@ -697,8 +680,8 @@ st.session_state["alert_to_number"] = alert_to_number
 
 if enable_sms:
     # Provide quick diagnostics on credentials
-    client, cred_err = _get_twilio_client()
-    from_num = _get_twilio_from_number()
+    client, cred_err = get_twilio_client()
+    from_num = get_twilio_from_number()
     
     # Debug information
     account_sid = os.getenv("TWILIO_ACCOUNT_SID")
@@ -730,194 +713,72 @@ if enable_sms:
         st.sidebar.success(f"📱 SMS alerts ready!")
         st.sidebar.info(f"From: {from_num} → To: {alert_to_number or 'Not set'}")
 
-# Function to calculate risk
-def calculate_risk(rainfall, snowfall, wind_speed, temperature, elevation, 
-                   fracture_spacing, fracture_orientation, slope_angle, rock_type, image_analysis):
-    
-    # Adjust parameters based on image analysis if available
-    image_modifier = 1.0
-    if image_analysis:
-        # Use image analysis to adjust parameters
-        image_modifier = 1.0 + (image_analysis.get("slope_steepness", 50) / 100 - 0.5) * 0.3
-        fracture_spacing = fracture_spacing * (1.0 - image_analysis.get("rock_fractures", 50) / 200)
-        slope_angle = slope_angle * (1.0 + image_analysis.get("slope_steepness", 50) / 100)
-    
-    # Calculate individual factor contributions (0-100 scale)
-    rainfall_contrib = min(rainfall / 50 * 100, 100)  # 50mm rainfall = 100%
-    snowfall_contrib = min(snowfall / 30 * 100, 100)  # 30cm snowfall = 100%
-    wind_contrib = min(wind_speed / 80 * 100, 100)    # 80km/h wind = 100%
-    
-    # Temperature: lower temps increase risk (freeze-thaw cycles)
-    if temperature <= 0:
-        temp_contrib = 100  # Freezing temperatures = maximum risk
-    else:
-        temp_contrib = max(0, 100 - (temperature * 2))  # Higher temps decrease risk
-    
-    elevation_contrib = min(elevation / 2000 * 100, 100)  # 2000m elevation = 100%
-    
-    # Fracture density: closer spacing = higher density = higher risk
-    fracture_density = 100 / fracture_spacing if fracture_spacing > 0 else 100
-    fracture_contrib = min(fracture_density * 2, 100)  # Scale appropriately
-    
-    slope_contrib = min(slope_angle / 60 * 100, 100)  # 60° slope = 100%
-    
-    # Rock type factor (more susceptible rocks have higher risk)
-    rock_factors = {
-        "Limestone": 80,
-        "Sandstone": 60,
-        "Shale": 70,
-        "Granite": 30,
-        "Basalt": 40
-    }
-    rock_contrib = rock_factors.get(rock_type, 50)
-    
-    # Apply image analysis modifier
-    if image_analysis:
-        fracture_contrib *= image_modifier
-        slope_contrib *= image_modifier
-        rock_contrib *= (1.0 + (image_analysis.get("rock_type_confidence", 50) / 100 - 0.5) * 0.2)
-    
-    # Calculate individual contributions for display (as percentages)
-    contributions = {
-        "Rainfall Impact": rainfall_contrib,
-        "Snow/Ice Impact": snowfall_contrib,
-        "Fracture Density": fracture_contrib,
-        "Slope Geometry": slope_contrib,
-        "Elevation Effects": elevation_contrib,
-        "Wind Erosion": wind_contrib,
-        "Temperature Effects": temp_contrib
-    }
-    
-    # Add image analysis factors if available
-    if image_analysis:
-        contributions["Image Analysis: Slope"] = image_analysis.get("slope_steepness", 0)
-        contributions["Image Analysis: Fractures"] = image_analysis.get("rock_fractures", 0)
-    
-    # Calculate weighted risk score (0-100)
-    weights = {
-        'rainfall': 0.12,
-        'snowfall': 0.08,
-        'wind_speed': 0.05,
-        'temperature': 0.08,
-        'elevation': 0.08,
-        'fracture_density': 0.22,
-        'slope_angle': 0.18,
-        'rock_type': 0.05,
-        'image_analysis': 0.14 if image_analysis else 0
-    }
-    
-    weighted_risk = (
-        rainfall_contrib * weights['rainfall'] +
-        snowfall_contrib * weights['snowfall'] +
-        wind_contrib * weights['wind_speed'] +
-        temp_contrib * weights['temperature'] +
-        elevation_contrib * weights['elevation'] +
-        fracture_contrib * weights['fracture_density'] +
-        slope_contrib * weights['slope_angle'] +
-        rock_contrib * weights['rock_type']
-    )
-    
-    # Add image analysis contribution if available
-    if image_analysis:
-        image_risk = (
-            image_analysis.get("slope_steepness", 0) * 0.6 +
-            image_analysis.get("rock_fractures", 0) * 0.4
-        ) * weights['image_analysis']
-        weighted_risk += image_risk
-    
-    # Ensure risk is within bounds
-    weighted_risk = min(max(weighted_risk, 0), 100)
-    
-    # Determine risk level
-    if weighted_risk >= 75:
-        risk_level = "CRITICAL"
-        confidence = 85 + (len(image_analysis) * 2 if image_analysis else 0)
-    elif weighted_risk >= 50:
-        risk_level = "HIGH"
-        confidence = 80 + (len(image_analysis) * 2 if image_analysis else 0)
-    elif weighted_risk >= 25:
-        risk_level = "MODERATE"
-        confidence = 75 + (len(image_analysis) * 2 if image_analysis else 0)
-    else:
-        risk_level = "LOW"
-        confidence = 70 + (len(image_analysis) * 2 if image_analysis else 0)
-    
-    return weighted_risk, risk_level, confidence, contributions
-
-# Function to determine mining feasibility
-def determine_mining_feasibility(risk_level, risk_percentage, confidence):
-    """
-    Determine mining feasibility based on risk level, percentage, and confidence.
-    Returns: (feasibility_status, recommendation_message, css_class)
-    """
-    if risk_level == "LOW":
-        return "FIT", "✅ Low risk environment - Suitable for mining operations with standard safety protocols", "mining-fit"
-    elif risk_level == "MODERATE":
-        if confidence >= 70:
-            return "FIT", "✅ Moderate risk with high confidence - Mining approved with enhanced monitoring", "mining-fit"
-        else:
-            return "CONDITIONALLY FIT", "⚠️ Moderate risk with lower confidence - Additional geological assessment required before mining", "mining-conditional"
-    elif risk_level == "HIGH":
-        return "NOT FIT", "❌ High risk environment - Mining operations not recommended without major risk mitigation", "mining-not-fit"
-    else:  # CRITICAL
-        return "NOT FIT", "🚨 Critical risk environment - Mining operations strictly prohibited until risk is mitigated", "mining-not-fit"
-
-# Function to get risk category
-def get_risk_category(value):
-    if value < 20:
-        return "MINIMAL", "minimal"
-    elif value < 40:
-        return "LOW", "low"
-    elif value < 60:
-        return "MODERATE", "moderate"
-    elif value < 80:
-        return "HIGH", "high"
-    else:
-        return "EXTREME", "extreme"
+# Resolution of the sensitivity heat maps (both are evaluated in one vectorized pass)
+SENSITIVITY_FACTORS = np.linspace(0.5, 1.5, 101)
+INTERACTION_RESOLUTION = 200
 
 # Function to create heat maps
 def create_heat_maps(risk_percentage, contributions, rainfall, snowfall, wind_speed, temperature, 
-                    elevation, fracture_spacing, slope_angle):
+                    elevation, fracture_spacing, slope_angle, fracture_orientation=45, rock_type="Limestone",
+                    image_analysis=None):
     
     # Create parameter sensitivity heatmap
-    parameters = ['Rainfall', 'Snowfall', 'Wind Speed', 'Temperature', 'Elevation', 
-                  'Fracture Spacing', 'Slope Angle']
-    
-    # Generate sensitivity matrix (how risk changes with parameter variations)
-    sensitivity_matrix = []
-    base_params = [rainfall, snowfall, wind_speed, temperature, elevation, fracture_spacing, slope_angle]
-    
-    for i, param in enumerate(parameters):
-        sensitivity_row = []
-        for j, variation in enumerate(np.linspace(0.5, 1.5, 10)):  # Vary from 50% to 150% of original
-            modified_params = base_params.copy()
-            modified_params[i] = modified_params[i] * variation
-            
-            # Calculate risk with modified parameter
-            modified_risk, _, _, _ = calculate_risk(
-                modified_params[0], modified_params[1], modified_params[2], 
-                modified_params[3], modified_params[4], modified_params[5], 
-                45, modified_params[6], "Limestone", {}
-            )
-            sensitivity_row.append(modified_risk)
-        sensitivity_matrix.append(sensitivity_row)
+    parameters = [label for label, _ in SENSITIVITY_PARAMETERS]
+    
+    # Generate sensitivity matrix (how risk changes with parameter variations from 50% to 150%)
+    sensitivity_base = {
+        "rainfall": rainfall, "snowfall": snowfall, "wind_speed": wind_speed,
+        "temperature": temperature, "elevation": elevation, "fracture_spacing": fracture_spacing,
+        "fracture_orientation": 45, "slope_angle": slope_angle, "rock_type": "Limestone"
+    }
+    sensitivity_matrix = sweep_factors(sensitivity_base, SENSITIVITY_FACTORS)
     
     # Create parameter sensitivity heatmap
     fig_sensitivity = go.Figure(data=go.Heatmap(
         z=sensitivity_matrix,
-        x=[f"{v:.1f}x" for v in np.linspace(0.5, 1.5, 10)],
+        x=SENSITIVITY_FACTORS,
         y=parameters,
         colorscale='RdYlBu_r',
-        colorbar=dict(title="Risk Level (%)")
+        colorbar=dict(title="Risk Level (%)"),
+        hovertemplate="%{y} × %{x:.2f}: %{z:.1f}%<extra></extra>"
     ))
     
     fig_sensitivity.update_layout(
         title="Parameter Sensitivity Heat Map",
         xaxis_title="Parameter Variation Factor",
+        xaxis=dict(ticksuffix="x"),
         yaxis_title="Parameters",
         height=500
     )
     
+    # Create rainfall × slope angle interaction heatmap for the current site conditions
+    interaction_base = dict(sensitivity_base, fracture_orientation=fracture_orientation, rock_type=rock_type,
+                            **(image_analysis or {}))
+    rainfall_values = np.linspace(0, 100, INTERACTION_RESOLUTION)
+    slope_values = np.linspace(0, 90, INTERACTION_RESOLUTION)
+    interaction_matrix = interaction_map(interaction_base, "rainfall", rainfall_values, "slope_angle", slope_values)
+    
+    fig_interaction = go.Figure(data=go.Heatmap(
+        z=interaction_matrix,
+        x=rainfall_values,
+        y=slope_values,
+        colorscale='RdYlBu_r',
+        colorbar=dict(title="Risk Level (%)"),
+        hovertemplate="Rainfall %{x:.0f} mm, Slope %{y:.0f}°: %{z:.1f}%<extra></extra>"
+    ))
+    fig_interaction.add_trace(go.Scatter(
+        x=[rainfall], y=[slope_angle], mode="markers", name="Current conditions",
+        marker=dict(color="white", size=12, line=dict(color="black", width=2))
+    ))
+    
+    fig_interaction.update_layout(
+        title="Rainfall × Slope Angle Interaction Heat Map",
+        xaxis_title="Rainfall (mm/24h)",
+        yaxis_title="Slope Angle (°)",
+        height=500,
+        showlegend=False
+    )
+    
     # Create risk correlation heatmap
     correlation_data = []
     correlation_labels = list(contributions.keys())
@@ -1014,13 +875,18 @@ def create_heat_maps(risk_percentage, contributions, rainfall, snowfall, wind_sp
         height=500
     )
     
-    return fig_sensitivity, fig_correlation, fig_geo, fig_time
+    return fig_sensitivity, fig_interaction, fig_correlation, fig_geo, fig_time
 
-# Function to create analysis graph
-def create_analysis_graph(contributions, risk_percentage):
+# Function to create analysis graph (figures are cached across sessions; treat them as read-only)
+@memoize("analysis_graph", lambda contributions, risk_percentage, signed=False: (
+    tuple((factor, quantize(value)) for factor, value in contributions.items()), quantize(risk_percentage), signed
+))
+def create_analysis_graph(contributions, risk_percentage, signed=False):
+    # Signed contributions are model explanations in percentage points (negative = stabilizing);
+    # the radar shows their magnitude
     # Prepare data for the radar chart
     factors = list(contributions.keys())
-    values = list(contributions.values())
+    values = [abs(value) for value in contributions.values()] if signed else list(contributions.values())
     
     # Create radar chart
     fig = go.Figure()
@@ -1038,10 +904,10 @@ def create_analysis_graph(contributions, risk_percentage):
         polar=dict(
             radialaxis=dict(
                 visible=True,
-                range=[0, 100]
+                range=[0, max(values + [1]) * 1.1] if signed else [0, 100]
             )),
         showlegend=False,
-        title="Risk Factor Analysis",
+        title="Model Risk Drivers (|percentage points|)" if signed else "Risk Factor Analysis",
         height=400
     )
     
@@ -1056,7 +922,9 @@ def create_analysis_graph(contributions, risk_percentage):
     # Color mapping based on values
     colors = []
     for val in values_sorted:
-        if val < 20:
+        if signed:
+            colors.append('#e53e3e' if val > 0 else '#48bb78')
+        elif val < 20:
             colors.append('#48bb78')
         elif val < 40:
             colors.append('#4299e1')
@@ -1072,17 +940,25 @@ def create_analysis_graph(contributions, risk_percentage):
         y=values_sorted,
         marker_color=colors,
         text=values_sorted,
-        texttemplate='%{text:.0f}%',
+        texttemplate='%{text:+.1f}' if signed else '%{text:.0f}%',
         textposition='auto',
     ))
     
-    fig2.update_layout(
-        title="Risk Factor Contributions",
-        xaxis_title="Factors",
-        yaxis_title="Contribution (%)",
-        yaxis=dict(range=[0, 100]),
-        height=400
-    )
+    if signed:
+        fig2.update_layout(
+            title="Model Risk Factor Contributions",
+            xaxis_title="Factors",
+            yaxis_title="Change in risk (percentage points)",
+            height=400
+        )
+    else:
+        fig2.update_layout(
+            title="Risk Factor Contributions",
+            xaxis_title="Factors",
+            yaxis_title="Contribution (%)",
+            yaxis=dict(range=[0, 100]),
+            height=400
+        )
     
     # Create risk gauge
     fig3 = go.Figure(go.Indicator(
@@ -1186,14 +1062,13 @@ with st.form("risk_assessment_form"):
         uploaded_file = st.file_uploader("Upload an image of the slope for analysis", type=['jpg', 'jpeg', 'png'])
         
         if uploaded_file is not None:
-            # Store the uploaded image
-            st.session_state.uploaded_image = uploaded_file
-            # Analyze the image
-            st.session_state.image_analysis = analyze_image(uploaded_file)
+            # Analyze the image and keep only its content hash in the session
+            digest, preview, st.session_state.image_analysis = analyze_image(uploaded_file)
+            st.session_state.uploaded_image = digest
             
-            # Display the uploaded image
-            image = Image.open(uploaded_file)
-            st.image(image, caption="📷 Uploaded Slope Image", use_column_width=True)
+            # Display the uploaded image (cached downscaled preview)
+            if preview is not None:
+                st.image(preview, caption="📷 Uploaded Slope Image", use_column_width=True)
             
             # Display image analysis results
             st.markdown("#### 🔍 Image Analysis Results")
@@ -1201,22 +1076,115 @@ with st.form("risk_assessment_form"):
             for factor, value in st.session_state.image_analysis.items():
                 st.write(f"**{factor.replace('_', ' ').title()}**: {value}%")
             st.markdown('</div>', unsafe_allow_html=True)
+            
+            # Change detection against an earlier photo of the same face
+            previous_file = st.file_uploader(
+                "Earlier photo of the same face (optional, flags new rockfall scars)", type=['jpg', 'jpeg', 'png']
+            )
+            change = detect_change(previous_file, uploaded_file) if previous_file is not None else None
+            if change is not None and st.session_state.image_analysis:
+                st.session_state.image_analysis["new_detachment"] = change["new_detachment"]
+                metrics = change["metrics"]
+                if change["new_detachment"]:
+                    st.error(f"🚨 New detachment: a fresh scar covers {metrics['scar_area_share']:.1%} of the view "
+                             f"({metrics['scar_tiles']} tiles); new detachment score {change['new_detachment']}%")
+                else:
+                    st.success(f"✅ No new scar since the earlier photo ({metrics['changed_area_share']:.1%} of the view changed)")
+                fig_change = px.imshow(
+                    change["difference"], color_continuous_scale="RdBu_r", zmin=-4, zmax=4,
+                    labels={"color": "Change (σ)"}, title="Tile differences (red: lighter, blue: darker)"
+                )
+                fig_change.add_contour(z=change["scar"].astype(np.int8), showscale=False, hoverinfo="skip",
+                                       contours={"start": 0.5, "end": 0.5, "coloring": "lines"},
+                                       line={"color": "black", "width": 2})
+                fig_change.update_layout(height=300, margin={"l": 0, "r": 0, "t": 40, "b": 0})
+                fig_change.update_xaxes(showticklabels=False)
+                fig_change.update_yaxes(showticklabels=False)
+                st.plotly_chart(fig_change, use_container_width=True)
         else:
             st.session_state.uploaded_image = None
             st.session_state.image_analysis = {}
         st.markdown('</div>', unsafe_allow_html=True)
         
+        # Uncertainty propagation toggle
+        monte_carlo = st.checkbox(
+            f"🎲 Propagate input uncertainty (Monte Carlo, {MONTE_CARLO_SAMPLES:,} samples)",
+            value=False,
+            help="Samples typical gauge, scanline and image analysis errors around the inputs "
+                 "and reports the empirical confidence instead of the fixed heuristic."
+        )
+        
+        # Prediction engine selection
+        prediction_engine = st.radio(
+            "🧠 Prediction engine",
+            [HEURISTIC_ENGINE, MODEL_ENGINE],
+            horizontal=True,
+            help="The heuristic formula weighs each factor by hand; the Random Forest model "
+                 "is the classifier trained by train_model.py (model/rockfall_model.pkl)."
+        )
+        
+        with st.expander("🌲 Site properties used by the Random Forest model"):
+            site = {
+                "Aspect_deg": st.slider("Slope Aspect (°)", 0, 359, int(DEFAULT_SITE["Aspect_deg"])),
+                "Distance_to_fault_km": st.slider("Distance to Fault (km)", 0.0, 5.0, DEFAULT_SITE["Distance_to_fault_km"], 0.1),
+                "Rock_size": st.slider("Rock Size (m)", 0.1, 3.0, DEFAULT_SITE["Rock_size"], 0.1),
+                "Rock_volume": st.slider("Rock Volume (m³)", 0.1, 4.0, DEFAULT_SITE["Rock_volume"], 0.1),
+                "Energy_released": st.slider("Energy Released (kJ)", 0, 2000, int(DEFAULT_SITE["Energy_released"]), 50),
+                "Soil_Type": st.selectbox("Soil Type", CATEGORICAL_FEATURES["Soil_Type"],
+                                          index=CATEGORICAL_FEATURES["Soil_Type"].index(DEFAULT_SITE["Soil_Type"])),
+                "Vegetation": st.selectbox("Vegetation", CATEGORICAL_FEATURES["Vegetation"],
+                                           index=CATEGORICAL_FEATURES["Vegetation"].index(DEFAULT_SITE["Vegetation"])),
+                "Land_Cover": st.selectbox("Land Cover", CATEGORICAL_FEATURES["Land_Cover"],
+                                           index=CATEGORICAL_FEATURES["Land_Cover"].index(DEFAULT_SITE["Land_Cover"]))
+            }
+        
         # Calculate button
         calculate_btn = st.form_submit_button("🔍 Calculate Risk")
 
 
 # Calculate risk when button is clicked
 if calculate_btn:
-    risk_percentage, risk_level, confidence, contributions = calculate_risk(
-        rainfall, snowfall, wind_speed, temperature, elevation, 
-        fracture_spacing, fracture_orientation, slope_angle, rock_type,
-        st.session_state.image_analysis
-    )
+    # Model-backed prediction (the model is loaded once per process and shared by all sessions;
+    # the registry's active version is served when one is set, and swapped in when it changes)
+    model = None
+    if prediction_engine == MODEL_ENGINE:
+        try:
+            model = serving_model()
+            risk_percentage, risk_level, confidence, contributions = predict_risk(
+                rainfall, snowfall, wind_speed, temperature, elevation,
+                fracture_spacing, fracture_orientation, slope_angle, rock_type,
+                st.session_state.image_analysis, site=site, model=model
+            )
+        except (OSError, ModelSchemaError, RegistryError) as error:
+            st.error(f"❌ Could not use the Random Forest model, falling back to the heuristic: {error}")
+            model = None
+    
+    # Forest models explain themselves: contributions are signed percentage points of risk
+    signed_contributions = model is not None and model.explains
+    
+    if model is None:
+        risk_percentage, risk_level, confidence, contributions = cached_calculate_risk(
+            rainfall, snowfall, wind_speed, temperature, elevation, 
+            fracture_spacing, fracture_orientation, slope_angle, rock_type,
+            st.session_state.image_analysis
+        )
+    
+    # Replace the heuristic confidence with the empirical one when uncertainty is propagated:
+    # the share of samples in the displayed risk level
+    uncertainty = None
+    if monte_carlo and model is not None:
+        st.info("🎲 Monte Carlo uncertainty propagation covers the heuristic formula only.")
+    elif monte_carlo:
+        uncertainty = propagate_uncertainty(
+            default_uncertainty(
+                rainfall, snowfall, wind_speed, temperature, elevation,
+                fracture_spacing, fracture_orientation, slope_angle, rock_type,
+                st.session_state.image_analysis
+            ),
+            n_samples=MONTE_CARLO_SAMPLES,
+            seed=MONTE_CARLO_SEED
+        )
+        confidence = round(100 * uncertainty["level_probabilities"][risk_level])
     
     # Store values in session state
     st.session_state.rainfall = rainfall
@@ -1234,11 +1202,12 @@ if calculate_btn:
     st.markdown('<p class="sub-header">📊 Risk Assessment Results</p>', unsafe_allow_html=True)
     
     # Display uploaded image if available
-    if st.session_state.uploaded_image is not None:
+    cached_upload = (get_upload_cache().lookup(st.session_state.uploaded_image)
+                     if st.session_state.uploaded_image is not None else None)
+    if cached_upload is not None:
         st.markdown("### 📷 Analyzed Slope Image")
         st.markdown('<div class="image-container">', unsafe_allow_html=True)
-        image = Image.open(st.session_state.uploaded_image)
-        st.image(image, caption="🔍 Computer Vision Analysis Complete", use_column_width=True)
+        st.image(cached_upload[0], caption="🔍 Computer Vision Analysis Complete", use_column_width=True)
         st.markdown('</div>', unsafe_allow_html=True)
     
     # Display risk level with appropriate styling
@@ -1251,12 +1220,40 @@ if calculate_btn:
     else:
         st.markdown(f'<div class="risk-low">✅ {risk_percentage:.0f}% {risk_level} RISK<br><small style="font-size: 1.2rem; opacity: 0.9;">Confidence Level: {confidence}%</small></div>', unsafe_allow_html=True)
     
+    # Model load and prediction latency (first prediction includes one-off warm-up)
+    if model is not None:
+        latency = model.latency_stats()
+        steady_state = (f"steady-state p50 {latency['steady_state_p50_ms']:.1f} ms / p99 {latency['steady_state_p99_ms']:.1f} ms "
+                        f"over {latency['steady_state_predictions']} predictions"
+                        if latency["steady_state_predictions"] else "steady-state: no repeat predictions yet")
+        version = f" {latency['version']}" if latency["version"] else ""
+        st.caption(f"🌲 Random Forest{version}: loaded in {latency['load_ms']:.0f} ms · "
+                   f"first prediction {latency['first_prediction_ms']:.1f} ms · {steady_state}")
+        for message in model.load_warnings:
+            st.warning(f"⚠️ {message}")
+    
+    # Display Monte Carlo uncertainty summary
+    if uncertainty is not None:
+        st.markdown("### 🎲 Uncertainty Analysis")
+        percentiles = uncertainty["percentiles"]
+        exceedance = uncertainty["exceedance"]
+        band_cols = st.columns(3)
+        band_cols[0].metric("P5 Risk", f"{percentiles[5]:.1f}%")
+        band_cols[1].metric("Median Risk", f"{percentiles[50]:.1f}%")
+        band_cols[2].metric("P95 Risk", f"{percentiles[95]:.1f}%")
+        exceed_cols = st.columns(3)
+        exceed_cols[0].metric("P(risk ≥ 25%) — Moderate+", f"{exceedance[25]:.1%}")
+        exceed_cols[1].metric("P(risk ≥ 50%) — High+", f"{exceedance[50]:.1%}")
+        exceed_cols[2].metric("P(risk ≥ 75%) — Critical", f"{exceedance[75]:.1%}")
+        st.caption(f"Most likely level across {uncertainty['samples']:,} samples: {uncertainty['risk_level']} "
+                   f"({uncertainty['confidence']:.1f}% of samples).")
+    
     # Mining Feasibility Analysis
     st.markdown("---")
     st.markdown('<p class="sub-header">⛏️ Mining Feasibility Assessment</p>', unsafe_allow_html=True)
     
     # Determine mining feasibility
-    feasibility_status, recommendation_message, feasibility_css = determine_mining_feasibility(risk_level, risk_percentage, confidence)
+    feasibility_status, recommendation_message, feasibility_css = cached_determine_mining_feasibility(risk_level, risk_percentage, confidence)
     
     # Display mining feasibility result
     st.markdown(f'<div class="{feasibility_css}">⛏️ MINING STATUS: {feasibility_status}<br><small style="font-size: 1.2rem; opacity: 0.9;">Risk: {risk_percentage:.0f}% | Confidence: {confidence}%</small></div>', unsafe_allow_html=True)
@@ -1283,7 +1280,7 @@ if calculate_btn:
                 st.markdown(f"<div style='text-align: center; opacity: 0.5; font-size: 1.1rem;'>{emoji} {label}</div>", unsafe_allow_html=True)
     
     # Create analysis graphs
-    radar_fig, bar_fig, gauge_fig = create_analysis_graph(contributions, risk_percentage)
+    radar_fig, bar_fig, gauge_fig = create_analysis_graph(contributions, risk_percentage, signed_contributions)
     
     # Display graphs
     st.markdown("---")
@@ -1309,19 +1306,25 @@ if calculate_btn:
     st.markdown('<div class="heatmap-container">', unsafe_allow_html=True)
     
     # Generate heat maps
-    sensitivity_fig, correlation_fig, geo_fig, time_fig = create_heat_maps(
+    sensitivity_fig, interaction_fig, correlation_fig, geo_fig, time_fig = create_heat_maps(
         risk_percentage, contributions, rainfall, snowfall, wind_speed, 
-        temperature, elevation, fracture_spacing, slope_angle
+        temperature, elevation, fracture_spacing, slope_angle,
+        fracture_orientation, rock_type, st.session_state.image_analysis
     )
     
     # Display heat maps in tabs
-    tab1, tab2, tab3, tab4 = st.tabs(["🎚️ Parameter Sensitivity", "🔗 Factor Correlation", "🌍 Geographical Risk", "⏰ Temporal Patterns"])
+    tab1, tab_interaction, tab2, tab3, tab4 = st.tabs(["🎚️ Parameter Sensitivity", "🌧️ Rainfall × Slope", "🔗 Factor Correlation", "🌍 Geographical Risk", "⏰ Temporal Patterns"])
     
     with tab1:
         st.plotly_chart(sensitivity_fig, use_container_width=True)
         st.markdown("**Parameter Sensitivity Heat Map** shows how changes in each parameter affect overall risk. "
                    "Darker red areas indicate higher risk levels when parameters are increased.")
     
+    with tab_interaction:
+        st.plotly_chart(interaction_fig, use_container_width=True)
+        st.markdown("**Rainfall × Slope Interaction Heat Map** shows the combined effect of rainfall and slope angle "
+                   "for the current site conditions. The marker shows the submitted values.")
+    
     with tab2:
         st.plotly_chart(correlation_fig, use_container_width=True)
         st.markdown("**Factor Correlation Heat Map** displays the relationship between different risk factors. "
@@ -1343,25 +1346,32 @@ if calculate_btn:
     st.markdown("---")
     st.markdown('<p class="sub-header">📋 Risk Factor Contributions</p>', unsafe_allow_html=True)
     
-    # Calculate statistics
-    active_factors = sum(1 for value in contributions.values() if value > 5)  # Consider factors > 5% as active
-    avg_impact = sum(contributions.values()) / len(contributions)
-    max_impact = max(contributions.values())
+    # Calculate statistics (model explanations: percentage points, |value| >= 1 counts as active)
+    if signed_contributions:
+        active_factors = sum(1 for value in contributions.values() if abs(value) >= 1)
+        avg_impact = sum(abs(value) for value in contributions.values()) / len(contributions)
+        max_impact = max(contributions.values())
+        unit, max_label, avg_label = " pts", "Largest Risk Driver", "Average |Impact|"
+    else:
+        active_factors = sum(1 for value in contributions.values() if value > 5)  # Consider factors > 5% as active
+        avg_impact = sum(contributions.values()) / len(contributions)
+        max_impact = max(contributions.values())
+        unit, max_label, avg_label = "%", "Highest Factor", "Average Impact"
     
     # Display statistics
     stat_cols = st.columns(3)
     with stat_cols[0]:
         st.markdown(f"""
         <div class="stats-box">
-            <div class="stats-value">📊 {max_impact:.0f}%</div>
-            <div class="stats-label">Highest Factor</div>
+            <div class="stats-value">📊 {max_impact:.0f}{unit}</div>
+            <div class="stats-label">{max_label}</div>
         </div>
         """, unsafe_allow_html=True)
     with stat_cols[1]:
         st.markdown(f"""
         <div class="stats-box">
-            <div class="stats-value">📈 {avg_impact:.0f}%</div>
-            <div class="stats-label">Average Impact</div>
+            <div class="stats-value">📈 {avg_impact:.0f}{unit}</div>
+            <div class="stats-label">{avg_label}</div>
         </div>
         """, unsafe_allow_html=True)
     with stat_cols[2]:
@@ -1372,19 +1382,35 @@ if calculate_btn:
         </div>
         """, unsafe_allow_html=True)
     
-    # Display each factor with progress bar
-    for factor, value in contributions.items():
-        category, css_class = get_risk_category(value)
+    # Model explanations, largest effect first: red raises the risk, green lowers it
+    if signed_contributions:
+        st.caption("Contributions of the Random Forest's own decision paths, in percentage points "
+                   "relative to its average prediction.")
+        for factor, value in sorted(contributions.items(), key=lambda item: -abs(item[1])):
+            direction, css_class = ("Raises risk", "high") if value > 0 else ("Lowers risk", "low")
+            st.markdown(f"""
+            <div class="factor-box">
+                <div class="factor-label">📌 {factor}</div>
+                <div class="factor-value">{direction} - {value:+.1f} pts</div>
+                <div class="progress-container">
+                    <div class="progress-bar {css_class}" style="width: {min(abs(value), 100)}%">{value:+.1f}</div>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+    else:
+        # Display each factor with progress bar
+        for factor, value in contributions.items():
+            category, css_class = get_risk_category(value)
         
-        st.markdown(f"""
-        <div class="factor-box">
-            <div class="factor-label">📌 {factor}</div>
-            <div class="factor-value">{category} - {value:.0f}% Impact</div>
-            <div class="progress-container">
-                <div class="progress-bar {css_class}" style="width: {value}%">{value:.0f}%</div>
+            st.markdown(f"""
+            <div class="factor-box">
+                <div class="factor-label">📌 {factor}</div>
+                <div class="factor-value">{category} - {value:.0f}% Impact</div>
+                <div class="progress-container">
+                    <div class="progress-bar {css_class}" style="width: {value}%">{value:.0f}%</div>
+                </div>
             </div>
-        </div>
-        """, unsafe_allow_html=True)
+            """, unsafe_allow_html=True)
     
     # Recommended actions
     st.markdown("---")
@@ -1451,7 +1477,10 @@ if calculate_btn:
     if st.session_state.get("enable_sms"):
         to_num = st.session_state.get("alert_to_number", "").strip()
         if to_num:
-            alert_message = build_precaution_message(risk_level, risk_percentage, feasibility_status)
+            alert_message = build_precaution_message(
+                risk_level, risk_percentage, feasibility_status,
+                drivers=contributions if signed_contributions else None
+            )
             ok, err = send_sms_alert(to_num, alert_message)
             if ok:
                 st.success(f"📱 SMS alert sent to {to_num}")
@@ -1461,6 +1490,65 @@ if calculate_btn:
             st.warning("⚠️ SMS alerts enabled, but no recipient number provided.")
 # ... (rest of your dashboard.py code, including all your analysis and graphs) ...
 
+############################################
+# Batch image assessment
+############################################
+
+def batch_result_row(result):
+    """One results table row for a process_batch() result, scored under the form's site conditions."""
+    row = {"Image": result["name"]}
+    if result["error"] is None:
+        risk_percentage, risk_level, _, _ = cached_calculate_risk(
+            rainfall, snowfall, wind_speed, temperature, elevation,
+            fracture_spacing, fracture_orientation, slope_angle, rock_type,
+            result["analysis"]
+        )
+        row.update({"Risk %": round(risk_percentage, 1), "Risk Level": risk_level})
+        row.update({key.replace('_', ' ').title(): value for key, value in result["analysis"].items()})
+    row.update({"Seconds": round(result["seconds"], 2), "Error": result["error"] or ""})
+    return row
+
+
+st.markdown("---")
+st.markdown('<p class="sub-header">🗂️ Batch Image Assessment</p>', unsafe_allow_html=True)
+batch_files = st.file_uploader(
+    "Upload bench photos (several images, or ZIP archives of them)",
+    type=['jpg', 'jpeg', 'png', 'zip'], accept_multiple_files=True, key="batch_upload"
+)
+st.caption(f"Images are analyzed concurrently ({BATCH_WORKERS} workers) and scored with the heuristic formula "
+           "under the site conditions in the form above; photos seen before are served from the image cache.")
+
+if batch_files and st.button("🔍 Assess Batch"):
+    try:
+        images = expand_uploads((batch_file.name, batch_file.getvalue()) for batch_file in batch_files)
+    except ValueError as error:
+        st.error(f"❌ {error}")
+        images = []
+    if images:
+        progress = st.progress(0.0, text=f"Analyzing {len(images)} images...")
+        table = st.empty()
+        rows = []
+        for result in get_upload_cache().process_batch(images):
+            rows.append(batch_result_row(result))
+            progress.progress(len(rows) / len(images), text=f"Analyzed {len(rows)}/{len(images)} images")
+            table.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+        table.empty()
+        st.session_state.batch_results = sorted(rows, key=lambda row: row.get("Risk %", -1), reverse=True)
+
+if st.session_state.batch_results:
+    batch_frame = pd.DataFrame(st.session_state.batch_results)
+    failed = int((batch_frame["Error"] != "").sum())
+    st.markdown(f"#### 📋 {len(batch_frame)} images assessed" + (f" ({failed} could not be analyzed)" if failed else ""))
+    st.dataframe(batch_frame, use_container_width=True, hide_index=True)
+    st.download_button("⬇️ Download results (CSV)", batch_frame.to_csv(index=False), "batch_assessment.csv", "text/csv")
+
+# Assessment cache counters (shared by every session in this process)
+with st.sidebar.expander("⚡ Assessment Cache"):
+    for name, stats in cache_stats().items():
+        st.text(f"{name}: {stats['hits']} hits / {stats['misses']} misses "
+                f"({stats['hit_rate']:.0%}), {stats['evictions']} evicted, "
+                f"{stats['size']}/{stats['maxsize']} entries")
+
 # Add the navigation button at the end
 st.markdown("---")
 st.markdown('<div style="text-align: center; margin-top: 3rem;">', unsafe_allow_html=True)
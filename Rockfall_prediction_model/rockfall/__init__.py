@@ -0,0 +1,18 @@
+"""
+Headless rockfall risk assessment package used by the Streamlit pages and batch tools.
+
+Importing the package only loads the pure-Python scoring engine; NumPy-backed
+modules such as rockfall.batch are imported explicitly by the code that needs them.
+"""
+
+from .engine import (
+    CHANGE_ANALYSIS_KEYS,
+    IMAGE_ANALYSIS_KEYS,
+    IMAGE_INPUT_KEYS,
+    RISK_LEVELS,
+    ROCK_FACTORS,
+    build_precaution_message,
+    calculate_risk,
+    determine_mining_feasibility,
+    get_risk_category
+)
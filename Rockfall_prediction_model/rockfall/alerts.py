@@ -0,0 +1,59 @@
+"""
+SMS alerts through Twilio.
+
+Shared by the dashboard and the headless monitors (monitor_camera.py).
+Credentials come from the TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN and
+TWILIO_FROM_NUMBER environment variables (callers load .env); twilio itself is
+imported only when a client is created, so importing this module is free.
+"""
+
+import os
+
+
+def get_twilio_client():
+    """Return an authenticated Twilio Client if credentials are set, else (None, error)."""
+    account_sid = os.getenv("TWILIO_ACCOUNT_SID")
+    auth_token = os.getenv("TWILIO_AUTH_TOKEN")
+    
+    # Check if credentials are missing or placeholder values
+    if not account_sid or not auth_token:
+        return None, "Missing TWILIO_ACCOUNT_SID or TWILIO_AUTH_TOKEN environment variables"
+    
+    # Check if credentials are still placeholder values
+    if (account_sid == "your_account_sid_here" or 
+        auth_token == "your_auth_token_here"):
+        return None, "Twilio credentials are placeholder values. Please update the .env file with valid credentials."
+    
+    # Check if Account SID has the proper format (starts with 'AC' and is 34 characters)
+    if not account_sid.startswith('AC') or len(account_sid) != 34:
+        return None, "Invalid TWILIO_ACCOUNT_SID format. Should start with 'AC' and be 34 characters long."
+    
+    try:
+        from twilio.rest import Client
+        return Client(account_sid, auth_token), None
+    except Exception as e:
+        return None, f"Failed to create Twilio client: {str(e)}"
+
+
+def get_twilio_from_number():
+    """Get the Twilio sender number from env var TWILIO_FROM_NUMBER."""
+    from_number = os.getenv("TWILIO_FROM_NUMBER")
+    # Check if it's missing or a placeholder value
+    if not from_number or from_number == "+1234567890":
+        return None
+    return from_number
+
+
+def send_sms_alert(to_number: str, message: str):
+    """Send an SMS using Twilio. Returns (ok: bool, error: Optional[str])."""
+    client, err = get_twilio_client()
+    if err:
+        return False, err
+    from_number = get_twilio_from_number()
+    if not from_number:
+        return False, "Missing TWILIO_FROM_NUMBER environment variable"
+    try:
+        client.messages.create(to=to_number, from_=from_number, body=message)
+        return True, None
+    except Exception as e:
+        return False, str(e)
@@ -0,0 +1,254 @@
+"""
+Vectorized rockfall risk scoring.
+
+calculate_risk_batch mirrors engine.calculate_risk operation for operation on
+NumPy arrays, so every row matches the scalar result exactly while scoring tens
+of thousands of slope cells in a single call.
+"""
+
+import numpy as np
+
+from .engine import IMAGE_ANALYSIS_KEYS, IMAGE_INPUT_KEYS, RISK_LEVELS, ROCK_FACTORS
+
+# Columns calculate_risk_batch expects, named after calculate_risk's arguments
+INPUT_COLUMNS = (
+    "rainfall",
+    "snowfall",
+    "wind_speed",
+    "temperature",
+    "elevation",
+    "fracture_spacing",
+    "fracture_orientation",
+    "slope_angle",
+    "rock_type"
+)
+
+# Column order of the contributions matrix (same labels as the scalar dict)
+CONTRIBUTION_LABELS = (
+    "Rainfall Impact",
+    "Snow/Ice Impact",
+    "Fracture Density",
+    "Slope Geometry",
+    "Elevation Effects",
+    "Wind Erosion",
+    "Temperature Effects",
+    "Image Analysis: Slope",
+    "Image Analysis: Fractures",
+    "Image Analysis: New Detachment"
+)
+
+# Base confidence per risk level code (LOW, MODERATE, HIGH, CRITICAL)
+_BASE_CONFIDENCE = np.array([70, 75, 80, 85], dtype=np.int64)
+
+# Factor used for rock types missing from ROCK_FACTORS
+_DEFAULT_ROCK_FACTOR = 50
+
+# Rows scored per pass; small enough for the working arrays to stay in cache
+CHUNK_SIZE = 16384
+
+
+def _column(inputs, name, n):
+    if name not in inputs:
+        raise KeyError(f"calculate_risk_batch: missing input column '{name}'")
+    values = np.asarray(inputs[name])
+    return np.broadcast_to(values, (n,)) if values.shape != (n,) else values
+
+
+def _row_count(inputs):
+    lengths = {np.shape(inputs[name]) for name in (*INPUT_COLUMNS, *IMAGE_INPUT_KEYS) if name in inputs}
+    return np.broadcast_shapes(*lengths, (1,))[0]
+
+
+def _rock_contributions(rock_type, n):
+    """Look up ROCK_FACTORS per row; categorical columns are mapped through their codes."""
+    categorical = getattr(rock_type, "cat", rock_type)
+    if hasattr(categorical, "categories") and hasattr(categorical, "codes"):
+        factors = [ROCK_FACTORS.get(name, _DEFAULT_ROCK_FACTOR) for name in categorical.categories]
+        # code -1 (missing) picks the trailing default
+        table = np.array(factors + [_DEFAULT_ROCK_FACTOR], dtype=np.float64)
+        return np.broadcast_to(table[np.asarray(categorical.codes)], (n,)).copy()
+
+    rock_type = np.broadcast_to(np.asarray(rock_type), (n,))
+    contrib = np.full(n, float(_DEFAULT_ROCK_FACTOR))
+    for name, factor in ROCK_FACTORS.items():
+        contrib[rock_type == name] = factor
+    return contrib
+
+
+def _clipped_ratio(values, scale, out=None):
+    """min(values / scale * 100, 100) without intermediate allocations."""
+    out = np.divide(values, scale, out=out)
+    out *= 100
+    return np.minimum(out, 100, out=out)
+
+
+def _score_chunk(columns, rock_contrib, image_columns, weighted_risk, risk_level_codes,
+                 confidence, contributions):
+    """Score one chunk of rows in place; see calculate_risk_batch for the layout."""
+    n = len(rock_contrib)
+
+    # Image analysis: a row "has an image" when any of its IMAGE_ANALYSIS_KEYS is
+    # present. Rows without one get neutral factors (x * 1.0 and x + 0.0 are exact).
+    image = None
+    still_columns = {key: values for key, values in image_columns.items() if key in IMAGE_ANALYSIS_KEYS}
+    if still_columns:
+        present = {key: ~np.isnan(values) for key, values in still_columns.items()}
+        image_key_count = np.zeros(n, dtype=np.int64)
+        for mask in present.values():
+            image_key_count += mask
+        partial = not all(mask.all() for mask in present.values())
+        has_image = image_key_count > 0 if partial else np.True_
+
+        def image_value(key, default):
+            if key not in still_columns:
+                return np.full(n, float(default))
+            if partial:
+                return np.where(present[key], still_columns[key], default)
+            return still_columns[key]
+
+        def neutral(factor, value):
+            return np.where(has_image, factor, value) if partial else factor
+
+        steepness = image_value("slope_steepness", 50)
+        fractures = image_value("rock_fractures", 50)
+        type_confidence = image_value("rock_type_confidence", 50)
+        image_slope = image_value("slope_steepness", 0)
+        image_fractures = image_value("rock_fractures", 0)
+
+        image = {
+            "count": image_key_count,
+            "modifier": neutral(1.0 + (steepness / 100 - 0.5) * 0.3, 1.0),
+            "spacing_factor": neutral(1.0 - fractures / 200, 1.0),
+            "slope_factor": neutral(1.0 + steepness / 100, 1.0),
+            "rock_factor": neutral(1.0 + (type_confidence / 100 - 0.5) * 0.2, 1.0),
+            "risk": neutral((image_slope * 0.6 + image_fractures * 0.4) * 0.14, 0.0),
+            "slope": neutral(image_slope, np.nan),
+            "fractures": neutral(image_fractures, np.nan),
+        }
+
+    # Change detection is a separate additive term; NaN (no earlier photo) adds 0.0
+    detachment = image_columns.get("new_detachment")
+
+    fracture_spacing = columns["fracture_spacing"]
+    slope_angle = columns["slope_angle"]
+    if image is not None:
+        fracture_spacing = fracture_spacing * image["spacing_factor"]
+        slope_angle = slope_angle * image["slope_factor"]
+
+    (rainfall_contrib, snowfall_contrib, fracture_contrib, slope_contrib,
+     elevation_contrib, wind_contrib, temp_contrib) = contributions[:7]
+
+    # Individual factor contributions (0-100 scale), as in calculate_risk
+    _clipped_ratio(columns["rainfall"], 50, out=rainfall_contrib)
+    _clipped_ratio(columns["snowfall"], 30, out=snowfall_contrib)
+    _clipped_ratio(columns["wind_speed"], 80, out=wind_contrib)
+    _clipped_ratio(columns["elevation"], 2000, out=elevation_contrib)
+    _clipped_ratio(slope_angle, 60, out=slope_contrib)
+
+    # Temperature: max(0, 100 - 2t) is already >= 100 when t <= 0, so capping at
+    # 100 reproduces the freezing branch exactly
+    np.multiply(columns["temperature"], 2, out=temp_contrib)
+    np.subtract(100, temp_contrib, out=temp_contrib)
+    np.maximum(temp_contrib, 0, out=temp_contrib)
+    np.minimum(temp_contrib, 100, out=temp_contrib)
+
+    # Fracture density: closer spacing = higher density = higher risk
+    with np.errstate(divide="ignore"):
+        np.divide(100, fracture_spacing, out=fracture_contrib)
+    fracture_contrib *= 2
+    np.minimum(fracture_contrib, 100, out=fracture_contrib)
+    non_positive = fracture_spacing <= 0
+    if non_positive.any():
+        fracture_contrib[non_positive] = 100
+
+    if image is not None:
+        fracture_contrib *= image["modifier"]
+        slope_contrib *= image["modifier"]
+        rock_contrib = rock_contrib * image["rock_factor"]
+        contributions[7] = image["slope"]
+        contributions[8] = image["fractures"]
+    else:
+        contributions[7:9] = np.nan
+    contributions[9] = np.nan if detachment is None else detachment
+
+    # Weighted risk score (0-100), accumulated in calculate_risk's order
+    np.multiply(rainfall_contrib, 0.12, out=weighted_risk)
+    scratch = np.empty(n)
+    for contrib, weight in (
+        (snowfall_contrib, 0.08),
+        (wind_contrib, 0.05),
+        (temp_contrib, 0.08),
+        (elevation_contrib, 0.08),
+        (fracture_contrib, 0.22),
+        (slope_contrib, 0.18),
+        (rock_contrib, 0.05),
+    ):
+        weighted_risk += np.multiply(contrib, weight, out=scratch)
+
+    if image is not None:
+        weighted_risk += image["risk"]
+    if detachment is not None:
+        weighted_risk += np.multiply(np.nan_to_num(detachment, nan=0.0), 0.2, out=scratch)
+
+    np.maximum(weighted_risk, 0, out=weighted_risk)
+    np.minimum(weighted_risk, 100, out=weighted_risk)
+
+    np.greater_equal(weighted_risk, 25, out=risk_level_codes, casting="unsafe")
+    risk_level_codes += weighted_risk >= 50
+    risk_level_codes += weighted_risk >= 75
+    np.take(_BASE_CONFIDENCE, risk_level_codes, out=confidence)
+    if image is not None:
+        confidence += image["count"] * 2
+
+
+def calculate_risk_batch(inputs, chunk_size=CHUNK_SIZE):
+    """
+    Score many sites at once.
+
+    `inputs` is a DataFrame or a mapping of column name to array-like holding the
+    INPUT_COLUMNS, plus optional per-row image analysis columns named after
+    IMAGE_INPUT_KEYS. A NaN image value means that key is absent for that row;
+    a row with no image values behaves like calculate_risk(..., image_analysis={}),
+    and one with only new_detachment like calculate_risk with just that key.
+    Scalars broadcast against the other columns, and a categorical `rock_type`
+    column is looked up through its codes instead of string comparisons.
+
+    Rows are scored `chunk_size` at a time so the intermediate arrays stay in cache.
+
+    Returns (risk_percentage, risk_level_codes, confidence, contributions): float64,
+    int8 indices into RISK_LEVELS, int64 and an (n, 10) float64 matrix whose columns
+    follow CONTRIBUTION_LABELS (image columns are NaN for rows without the value).
+    """
+    n = _row_count(inputs)
+    columns = {name: _column(inputs, name, n) for name in INPUT_COLUMNS if name != "rock_type"}
+    if "rock_type" not in inputs:
+        raise KeyError("calculate_risk_batch: missing input column 'rock_type'")
+    rock_contrib = _rock_contributions(inputs["rock_type"], n)
+    image_columns = {
+        key: _column(inputs, key, n).astype(np.float64, copy=False)
+        for key in IMAGE_INPUT_KEYS if key in inputs
+    }
+
+    weighted_risk = np.empty(n)
+    risk_level_codes = np.empty(n, dtype=np.int8)
+    confidence = np.empty(n, dtype=np.int64)
+    contributions = np.empty((len(CONTRIBUTION_LABELS), n))
+
+    for start in range(0, n, chunk_size):
+        rows = slice(start, start + chunk_size)
+        _score_chunk(
+            {name: values[rows].astype(np.float64, copy=False) for name, values in columns.items()},
+            rock_contrib[rows],
+            {key: values[rows] for key, values in image_columns.items()},
+            weighted_risk[rows],
+            risk_level_codes[rows],
+            confidence[rows],
+            contributions[:, rows]
+        )
+
+    return weighted_risk, risk_level_codes, confidence, contributions.T
+
+
+def risk_level_names(risk_level_codes):
+    """Map risk level codes from calculate_risk_batch back to their names."""
+    return np.asarray(RISK_LEVELS)[np.asarray(risk_level_codes)]
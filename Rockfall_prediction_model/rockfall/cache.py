@@ -0,0 +1,173 @@
+"""
+Process-wide memoization for repeated risk assessments.
+
+Dashboard sliders are integers and operators resubmit the same conditions all
+the time, so identical assessments are served from bounded LRU caches with a
+time-to-live. Caches are named and shared by every session (and request thread)
+in the process; cache_stats() reports their hit/miss/eviction counters.
+
+Like engine.py this module is pure Python so it can wrap the engine without
+pulling in NumPy.
+"""
+
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .engine import calculate_risk, determine_mining_feasibility
+
+# Defaults for every named cache; override per process through the environment
+DEFAULT_MAXSIZE = int(os.environ.get("ROCKFALL_CACHE_MAXSIZE", 4096))
+DEFAULT_TTL = float(os.environ.get("ROCKFALL_CACHE_TTL", 3600))
+
+# Float inputs are rounded to this many decimals before keying, so float noise
+# from JSON or widgets does not split otherwise identical assessments
+QUANTUM_DIGITS = 6
+
+
+class LRUCache:
+    """Thread-safe LRU cache with a maximum size, a TTL in seconds (0 or None never expires) and usage counters."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        if maxsize < 1:
+            raise ValueError(f"LRUCache: maxsize must be at least 1, got {maxsize}")
+        self.maxsize, self.ttl = maxsize, ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def lookup(self, key):
+        """Return (True, value) for a live entry, else (False, None)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+                self.expirations += 1
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(name, maxsize=None, ttl=None):
+    """Return the process-wide cache called `name`, creating it on first use."""
+    with _caches_lock:
+        if name not in _caches:
+            _caches[name] = LRUCache(
+                DEFAULT_MAXSIZE if maxsize is None else maxsize,
+                DEFAULT_TTL if ttl is None else ttl
+            )
+        return _caches[name]
+
+
+def cache_stats():
+    """Counters of every named cache, keyed by name."""
+    with _caches_lock:
+        caches = dict(_caches)
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+def quantize(value, digits=QUANTUM_DIGITS):
+    """Hashable key part for one input: floats are rounded, everything else passes through."""
+    # Integers need no rounding; 30 and 30.0 already hash and compare equal
+    if isinstance(value, float):
+        return round(value, digits)
+    return value
+
+
+def image_analysis_key(image_analysis):
+    """Key part for an image analysis dict; absent and empty both mean no image."""
+    if not image_analysis:
+        return ()
+    return tuple(sorted((key, quantize(value)) for key, value in image_analysis.items()))
+
+
+def memoize(name, key, copy=None, maxsize=None, ttl=None):
+    """
+    Decorator caching a function in the process-wide cache `name`.
+
+    `key` receives the call's arguments and returns a hashable key. `copy`, when
+    given, is applied to every returned value so callers can never mutate a
+    cached entry. The wrapper exposes the cache as `.cache`.
+    """
+    cache = get_cache(name, maxsize, ttl)
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            cache_key = key(*args, **kwargs)
+            hit, value = cache.lookup(cache_key)
+            if not hit:
+                value = function(*args, **kwargs)
+                cache.put(cache_key, value)
+            return copy(value) if copy is not None else value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+def _risk_key(rainfall, snowfall, wind_speed, temperature, elevation,
+              fracture_spacing, fracture_orientation, slope_angle, rock_type, image_analysis):
+    return (
+        *map(quantize, (rainfall, snowfall, wind_speed, temperature, elevation,
+                        fracture_spacing, fracture_orientation, slope_angle)),
+        rock_type,
+        image_analysis_key(image_analysis)
+    )
+
+
+def _copy_risk(result):
+    risk_percentage, risk_level, confidence, contributions = result
+    return risk_percentage, risk_level, confidence, dict(contributions)
+
+
+# Cached drop-in replacements for the engine functions
+cached_calculate_risk = memoize("calculate_risk", _risk_key, copy=_copy_risk)(calculate_risk)
+
+cached_determine_mining_feasibility = memoize(
+    "determine_mining_feasibility",
+    lambda risk_level, risk_percentage, confidence: (risk_level, quantize(risk_percentage), quantize(confidence))
+)(determine_mining_feasibility)
@@ -0,0 +1,254 @@
+"""
+Change detection between repeat photos of the same slope face.
+
+Benches are photographed again and again from (roughly) the same spot, so a
+rockfall shows up as a difference between consecutive photos: a fresh scar of
+lighter, unweathered rock where vegetation or weathered rock used to be.
+compare_images() turns a before/after pair into tiled difference maps, a
+changed-pixel mask and scar metrics:
+
+1. Both photos are decoded at a reduced scale into working copies of at most
+   CHANGE_PIXELS (see imaging.load_working_image), so a 40-megapixel pair
+   never exists at full size in memory.
+2. The after photo is co-registered to the before photo by phase correlation:
+   the normalized cross-power spectrum of the two Hann-windowed intensity
+   images has its inverse peak at their translation. Both are cropped to their
+   overlap. Translation-only registration suits repeat photos taken from a
+   fixed station or drone waypoint; pairs that do not correlate are rejected.
+3. Intensities are normalized per photo (median and MAD), so exposure and
+   overall lighting changes cancel, and pixels whose normalized difference
+   exceeds CHANGE_SIGMAS robust standard deviations count as changed.
+4. Per-tile statistics (changed share, mean signed difference, vegetation
+   loss) are vectorized reductions over reshaped views, as in rockfall.imaging.
+   A tile is a scar when most of it changed and it got lighter or lost its
+   vegetation; scar tiles without a scar neighbour are discarded as noise.
+
+The pair's new_detachment score (0-100, 0 when no scar is found) is the image
+input calculate_risk reads. detect_changes() compares every photo of a
+sequence with its predecessor. Areas are in photo pixels, or square metres
+when a ground sampling distance is given. The volume proxy assumes a scar's
+depth grows with the square root of its area (V ~ A^1.5, the usual area-volume
+scaling of rock slope failures): it ranks events, it does not measure them.
+"""
+
+import math
+
+import numpy as np
+from PIL import Image
+
+from .imaging import SHADOW_INTENSITY, VEGETATION_THRESHOLD, _LUMA, _score, _tiles, load_working_image, to_array
+
+# Largest working copy compared (pixels); bigger photos are downsampled on decode
+CHANGE_PIXELS = 1 << 22
+
+# Tile side in working-copy pixels
+CHANGE_TILE_PIXELS = 32
+
+# Normalized differences beyond this many robust standard deviations are changes...
+CHANGE_SIGMAS = 4.0
+
+# ...and never below this (in units of each photo's intensity spread)
+MIN_DIFFERENCE = 1.0
+
+# A tile is a scar candidate when this share of its pixels changed...
+TILE_CHANGE_SHARE = 0.5
+
+# ...and it got lighter on average or lost this share of vegetation cover
+VEGETATION_LOSS = 0.25
+
+# Phase correlation peaks below this mean the photos do not show the same view
+MIN_REGISTRATION_PEAK = 0.02
+
+# Largest accepted translation, as a share of the photo's width or height
+MAX_SHIFT = 0.25
+
+# Scar area (share of the overlap) mapped to a new_detachment score of 100
+DETACHMENT_SATURATION = 0.02
+
+# Exponent of the area-volume scaling behind the volume proxy
+AREA_VOLUME_EXPONENT = 1.5
+
+
+class ChangeDetectionError(ValueError):
+    """Raised when two photos cannot be compared (different views or framings)."""
+
+
+def _source_size(source):
+    # (width, height) of an image file or file object without decoding it
+    start = source.tell() if hasattr(source, "tell") else None
+    try:
+        with Image.open(source) as image:
+            return image.size
+    finally:
+        if start is not None:
+            source.seek(start)
+
+
+def load_change_copy(source, max_pixels=CHANGE_PIXELS, size=None):
+    """
+    (rgb, scale): a float32 RGB working copy of a photo and the photo pixels per
+    working-copy pixel. `size`, a (width, height), resamples the copy to match
+    another photo's working copy; the aspect ratios must agree within 2%.
+    """
+    width, height = _source_size(source)
+    image = load_working_image(source, max_pixels)
+    if size is not None and image.size != tuple(size):
+        if abs(math.log((image.width / image.height) / (size[0] / size[1]))) > 0.02:
+            raise ChangeDetectionError(
+                f"the photos have different framings ({width}x{height} vs a {size[0]}x{size[1]} working copy)")
+        image = image.resize(tuple(size), Image.Resampling.BOX)
+    return to_array(image), width / image.width
+
+
+def estimate_shift(reference, moving):
+    """
+    (dy, dx, peak): the sub-pixel translation of `moving` against `reference`,
+    two intensity arrays of one shape, such that moving[y + dy, x + dx] shows
+    reference[y, x]. `peak` is the phase correlation peak height: near 1 for
+    identical views, near 0 for unrelated ones.
+    """
+    height, width = reference.shape
+    window = np.outer(np.hanning(height), np.hanning(width)).astype(np.float32)
+    reference_spectrum = np.fft.rfft2((reference - reference.mean()) * window)
+    cross_power = np.fft.rfft2((moving - moving.mean()) * window)
+    cross_power *= np.conj(reference_spectrum)
+    del reference_spectrum
+    cross_power /= np.abs(cross_power) + 1e-12
+    correlation = np.fft.irfft2(cross_power, s=(height, width))
+    row, col = np.unravel_index(np.argmax(correlation), correlation.shape)
+
+    def refine(before, at, after):
+        # Vertex of the parabola through the peak and its neighbours
+        curvature = before - 2 * at + after
+        return 0.5 * (before - after) / curvature if curvature < 0 else 0.0
+
+    dy = row + refine(correlation[row - 1, col], correlation[row, col], correlation[(row + 1) % height, col])
+    dx = col + refine(correlation[row, col - 1], correlation[row, col], correlation[row, (col + 1) % width])
+    # The correlation is circular: shifts past the middle are negative
+    dy = dy - height if dy > height / 2 else dy
+    dx = dx - width if dx > width / 2 else dx
+    return float(dy), float(dx), float(correlation[row, col])
+
+
+def _normalized(gray):
+    # (gray - median) / robust standard deviation, estimated on every 4th pixel
+    sample = gray[::4, ::4]
+    median = np.median(sample)
+    spread = 1.4826 * np.median(np.abs(sample - median))
+    return (gray - median) / max(float(spread), 1e-3)
+
+
+def _vegetation(rgb, gray):
+    chroma = rgb.sum(axis=2) + 1e-6
+    excess_green = (2 * rgb[..., 1] - rgb[..., 0] - rgb[..., 2]) / chroma
+    return (excess_green > VEGETATION_THRESHOLD) & (gray >= SHADOW_INTENSITY)
+
+
+def compare_arrays(before, after, tile=CHANGE_TILE_PIXELS, scale=1.0, gsd=None):
+    """
+    Change maps and metrics of two RGB working copies of one shape (see
+    compare_images); `scale` is photo pixels per working-copy pixel and `gsd`
+    the ground sampling distance in metres per photo pixel.
+    """
+    if before.shape != after.shape:
+        raise ChangeDetectionError(f"working copies differ in shape: {before.shape} vs {after.shape}")
+    height, width = before.shape[:2]
+    gray_before, gray_after = before @ _LUMA, after @ _LUMA
+
+    dy, dx, peak = estimate_shift(gray_before, gray_after)
+    if peak < MIN_REGISTRATION_PEAK or abs(dy) > MAX_SHIFT * height or abs(dx) > MAX_SHIFT * width:
+        raise ChangeDetectionError(
+            f"the photos do not show the same view (shift {dy:+.1f}, {dx:+.1f} px, correlation peak {peak:.3f})")
+
+    # Integer crop of both copies to their overlap, in the before copy's coordinates
+    row_shift, col_shift = int(round(dy)), int(round(dx))
+    top, left = max(0, -row_shift), max(0, -col_shift)
+    rows = slice(top, min(height, height - row_shift))
+    cols = slice(left, min(width, width - col_shift))
+    shifted = (slice(rows.start + row_shift, rows.stop + row_shift), slice(cols.start + col_shift, cols.stop + col_shift))
+    before, gray_before = before[rows, cols], gray_before[rows, cols]
+    after, gray_after = after[shifted], gray_after[shifted]
+    if min(gray_before.shape) < tile:
+        raise ChangeDetectionError("the photos overlap by less than one tile")
+
+    difference = _normalized(gray_after)
+    difference -= _normalized(gray_before)
+    sample = difference[::4, ::4]
+    noise = 1.4826 * float(np.median(np.abs(sample - np.median(sample))))
+    threshold = max(CHANGE_SIGMAS * noise, MIN_DIFFERENCE)
+    changed = np.abs(difference) > threshold
+
+    def mean(array):
+        return _tiles(array, tile).mean(axis=(2, 3), dtype=np.float32)
+
+    changed_share = mean(changed)
+    mean_difference = mean(difference)
+    vegetation_loss = mean(_vegetation(before, gray_before)) - mean(_vegetation(after, gray_after))
+
+    candidate = (changed_share >= TILE_CHANGE_SHARE) & ((mean_difference > 0) | (vegetation_loss >= VEGETATION_LOSS))
+    padded = np.pad(candidate, 1)
+    supported = padded[:-2, 1:-1] | padded[2:, 1:-1] | padded[1:-1, :-2] | padded[1:-1, 2:]
+    scar = candidate & supported
+
+    overlap_pixels = gray_before.size
+    scar_pixels = float(changed_share[scar].sum()) * tile * tile
+    scar_area_share = scar_pixels / overlap_pixels
+    scar_area_px = scar_pixels * scale * scale
+    scar_area_m2 = scar_area_px * gsd * gsd if gsd else None
+    metrics = {
+        "overlap_share": overlap_pixels / (height * width),
+        "changed_area_share": float(changed.mean()),
+        "scar_tiles": int(scar.sum()),
+        "scar_area_share": scar_area_share,
+        "scar_area_px": scar_area_px,
+        "scar_area_m2": scar_area_m2,
+        "volume_proxy": (scar_area_px if scar_area_m2 is None else scar_area_m2) ** AREA_VOLUME_EXPONENT,
+        "scar_contrast": float(mean_difference[scar].mean()) if scar.any() else 0.0
+    }
+    return {
+        "shift": (dy, dx),
+        "registration_peak": peak,
+        "overlap": (top, left, *gray_before.shape),
+        "scale": scale,
+        "tile": tile,
+        "threshold": threshold,
+        "difference": mean_difference,
+        "changed_share": changed_share,
+        "vegetation_loss": vegetation_loss,
+        "scar": scar,
+        "mask": changed,
+        "metrics": metrics,
+        "new_detachment": max(_score(scar_area_share, DETACHMENT_SATURATION), 1) if scar.any() else 0
+    }
+
+
+def compare_images(before, after, max_pixels=CHANGE_PIXELS, tile=CHANGE_TILE_PIXELS, gsd=None):
+    """
+    Compare two photos (paths or binary file objects) of the same face.
+
+    Returns a dict with the registration ("shift" of the after photo in
+    working-copy pixels, "registration_peak", "overlap" as top, left, height,
+    width in the before copy), the per-tile grids "difference" (mean signed
+    normalized difference; positive is lighter), "changed_share",
+    "vegetation_loss" and "scar" (bool), the overlap's changed-pixel "mask",
+    the scalar "metrics" and the "new_detachment" score.
+
+    Raises ChangeDetectionError for photos that do not show the same view.
+    """
+    before, scale = load_change_copy(before, max_pixels)
+    after, _ = load_change_copy(after, max_pixels, size=(before.shape[1], before.shape[0]))
+    return compare_arrays(before, after, tile, scale, gsd)
+
+
+def detect_changes(sources, max_pixels=CHANGE_PIXELS, tile=CHANGE_TILE_PIXELS, gsd=None):
+    """compare_images() of every photo of a chronological sequence with its predecessor; each photo is decoded once."""
+    results = []
+    previous = None
+    for source in sources:
+        if previous is None:
+            current = load_change_copy(source, max_pixels)
+        else:
+            current = load_change_copy(source, max_pixels, size=(previous[0].shape[1], previous[0].shape[0]))
+            results.append(compare_arrays(previous[0], current[0], tile, previous[1], gsd))
+        previous = current
+    return results
@@ -0,0 +1,169 @@
+"""
+Forest compaction: trade a little recall for a much smaller, faster model.
+
+The shipped forest (100 unlimited-depth trees) is large and slow for a single
+row, which matters on the edge boxes at remote benches. search_compact()
+trains forests over a grid of max_depth and min_samples_leaf and measures
+every n_estimators prefix of each: a forest's first n trees are exactly the
+forest that n_estimators=n with the same random_state would train, so one fit
+per (max_depth, min_samples_leaf) covers the whole tree-count axis. An
+existing forest can be pruned the same way by keeping its first n trees.
+
+Each candidate is scored on a held-out split (event recall, ROC AUC) and
+through measure_model() (artifact size, single-row p99 latency). The report
+keeps the Pareto front of recall vs size vs p99 latency, and
+choose_candidate() picks the smallest front model within a recall tolerance
+of the best and any size or latency budget. compact_model.py is the
+command-line front end.
+"""
+
+import copy
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+from sklearn.metrics import roc_auc_score
+
+from .training import (
+    DEFAULT_CHUNK_ROWS, _save_named, build_estimator, evaluate, load_dataset, measure_model, shuffle_split
+)
+
+# Default search grid; max_depth None grows trees until their leaves are pure
+DEFAULT_N_ESTIMATORS = (10, 25, 50, 100)
+DEFAULT_MAX_DEPTHS = (8, 12, 16, None)
+DEFAULT_MIN_SAMPLES_LEAF = (1, 5, 20)
+
+# Forest kinds whose trees can be truncated (see training.ESTIMATORS)
+FOREST_KINDS = ("random_forest", "extra_trees")
+
+# The chosen model may lose at most this much event recall against the best candidate
+DEFAULT_RECALL_TOLERANCE = 0.01
+
+# Objectives of the Pareto front: (result key, larger is better)
+OBJECTIVES = (("event_recall", True), ("artifact_bytes", False), ("single_row_p99_ms", False))
+
+
+def first_trees(forest, n_estimators):
+    """A shallow copy of a fitted forest keeping only its first `n_estimators` trees."""
+    if n_estimators > len(forest.estimators_):
+        raise ValueError(f"the forest has {len(forest.estimators_)} trees, cannot keep {n_estimators}")
+    pruned = copy.copy(forest)
+    pruned.estimators_ = forest.estimators_[:n_estimators]
+    pruned.n_estimators = n_estimators
+    return pruned
+
+
+def pareto_front(results, objectives=OBJECTIVES):
+    """Indices of the results no other result beats on one objective without losing on another."""
+    scores = np.array([[result[key] if larger else -result[key] for key, larger in objectives]
+                       for result in results], dtype=float)
+    front = []
+    for i, score in enumerate(scores):
+        dominated = np.any(np.all(scores >= score, axis=1) & np.any(scores > score, axis=1))
+        if not dominated:
+            front.append(i)
+    return front
+
+
+def choose_candidate(results, front, recall_tolerance=DEFAULT_RECALL_TOLERANCE, min_recall=None,
+                     max_bytes=None, max_p99_ms=None):
+    """
+    Index of the smallest front candidate within `recall_tolerance` of the
+    best recall that meets the optional budgets, or None if none does.
+    """
+    eligible = [i for i in front
+                if (max_bytes is None or results[i]["artifact_bytes"] <= max_bytes)
+                and (max_p99_ms is None or results[i]["single_row_p99_ms"] <= max_p99_ms)]
+    if not eligible:
+        return None
+    best_recall = max(results[i]["event_recall"] for i in eligible)
+    floor = max(best_recall - recall_tolerance, min_recall or 0)
+    eligible = [i for i in eligible if results[i]["event_recall"] >= floor]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda i: (results[i]["artifact_bytes"], results[i]["single_row_p99_ms"]))
+
+
+def _measure(forest, X_test, y_test, directory):
+    with warnings.catch_warnings():
+        # A loaded base model knows its feature names; the test matrix is bare
+        warnings.simplefilter("ignore", UserWarning)
+        metrics = evaluate(forest, X_test, y_test)
+        roc_auc = roc_auc_score(y_test, forest.predict_proba(X_test)[:, list(forest.classes_).index(1)])
+    path = _save_named(forest, Path(directory) / "candidate.pkl")
+    costs = measure_model(path, X_test)
+    path.unlink()
+    return {"accuracy": metrics["accuracy"], "event_recall": metrics["event_recall"],
+            "roc_auc": float(roc_auc), **costs}
+
+
+def search_compact(data_path, kind="random_forest", n_estimators=DEFAULT_N_ESTIMATORS,
+                   max_depths=DEFAULT_MAX_DEPTHS, min_samples_leaf=DEFAULT_MIN_SAMPLES_LEAF, base_model=None,
+                   max_rows=None, test_size=0.2, chunk_rows=DEFAULT_CHUNK_ROWS, n_jobs=-1, random_state=42):
+    """
+    Measure every grid candidate (and every tree-count prefix of
+    `base_model`, a fitted forest, when given) on one held-out split.
+
+    Returns (results, front, split): one dict per candidate, the indices of
+    the Pareto front and the (X_train, y_train) used for training, so the
+    chosen configuration can be refitted identically by fit_candidate().
+    """
+    if kind not in FOREST_KINDS:
+        raise ValueError(f"compaction needs a forest estimator ({', '.join(FOREST_KINDS)}), got '{kind}'")
+    n_estimators = sorted(set(n_estimators))
+
+    X, y = load_dataset(data_path, chunk_rows)
+    if max_rows and max_rows < len(y):
+        X, _, y, _ = shuffle_split(X, y, 1 - max_rows / len(y), random_state)
+    X_train, X_test, y_train, y_test = shuffle_split(X, y, test_size, random_state)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="rockfall-compact-") as directory:
+        if base_model is not None:
+            for n in [n for n in n_estimators if n < len(base_model.estimators_)] + [len(base_model.estimators_)]:
+                results.append({"source": "model", "n_estimators": n,
+                                "max_depth": base_model.max_depth, "min_samples_leaf": base_model.min_samples_leaf,
+                                "train_seconds": None,
+                                **_measure(first_trees(base_model, n), X_test, y_test, directory)})
+
+        for depth in max_depths:
+            for leaf in min_samples_leaf:
+                forest = build_estimator(n_estimators[-1], n_jobs, random_state, kind).set_params(
+                    max_depth=depth, min_samples_leaf=leaf)
+                start = time.perf_counter()
+                forest.fit(X_train, y_train)
+                train_seconds = time.perf_counter() - start
+                for n in n_estimators:
+                    results.append({"source": "grid", "n_estimators": n, "max_depth": depth, "min_samples_leaf": leaf,
+                                    "train_seconds": train_seconds * n / n_estimators[-1],
+                                    **_measure(first_trees(forest, n), X_test, y_test, directory)})
+                del forest
+    return results, pareto_front(results), (X_train, y_train)
+
+
+def fit_candidate(result, X_train, y_train, kind="random_forest", base_model=None, n_jobs=-1, random_state=42):
+    """The forest a search_compact() result describes (refitted with the search's seed, or pruned from base_model)."""
+    if result["source"] == "model":
+        return first_trees(base_model, result["n_estimators"])
+    forest = build_estimator(result["n_estimators"], n_jobs, random_state, kind).set_params(
+        max_depth=result["max_depth"], min_samples_leaf=result["min_samples_leaf"])
+    return forest.fit(X_train, y_train)
+
+
+def format_candidates(results, front, chosen=None):
+    """Text table of search_compact() results; ★ marks the Pareto front and ▶ the chosen model."""
+    lines = [f"{'':2} {'source':<6} {'trees':>5} {'depth':>5} {'leaf':>4} {'recall':>7} {'roc_auc':>7} "
+             f"{'artifact':>11} {'1-row p99':>10} {'batch/row':>10}"]
+    front = set(front)
+    for i, result in enumerate(results):
+        mark = "▶" if i == chosen else "★" if i in front else ""
+        depth = "∞" if result["max_depth"] is None else result["max_depth"]
+        lines.append(
+            f"{mark:<2} {result['source']:<6} {result['n_estimators']:>5} {depth:>5} {result['min_samples_leaf']:>4} "
+            f"{result['event_recall']:>7.4f} {result['roc_auc']:>7.4f} "
+            f"{result['artifact_bytes'] / 2 ** 20:>7.2f} MiB {result['single_row_p99_ms']:>7.3f} ms "
+            f"{result['batch_us_per_row']:>7.2f} µs"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,217 @@
+"""
+Rockfall risk scoring engine.
+
+Pure-Python scoring logic shared by the Streamlit dashboard, batch jobs and
+workers. This module must stay free of Streamlit, Plotly, Twilio and NumPy so it
+imports in milliseconds without any UI startup cost.
+"""
+
+# Rock type factor (more susceptible rocks have higher risk)
+ROCK_FACTORS = {
+    "Limestone": 80,
+    "Sandstone": 60,
+    "Shale": 70,
+    "Granite": 30,
+    "Basalt": 40
+}
+
+# Risk levels in ascending order; batch results encode them by index
+RISK_LEVELS = ("LOW", "MODERATE", "HIGH", "CRITICAL")
+
+# Keys produced by the image analysis step
+IMAGE_ANALYSIS_KEYS = (
+    "slope_steepness",
+    "rock_fractures",
+    "vegetation_cover",
+    "rock_type_confidence",
+    "erosion_signs"
+)
+
+# Keys produced by change detection between photos of the same face (rockfall.change)
+CHANGE_ANALYSIS_KEYS = ("new_detachment",)
+
+# Every image key calculate_risk reads
+IMAGE_INPUT_KEYS = IMAGE_ANALYSIS_KEYS + CHANGE_ANALYSIS_KEYS
+
+# Function to calculate risk
+def calculate_risk(rainfall, snowfall, wind_speed, temperature, elevation,
+                   fracture_spacing, fracture_orientation, slope_angle, rock_type, image_analysis):
+
+    # Change detection scores are a separate additive term, not part of the still-image analysis
+    image_analysis = image_analysis or {}
+    new_detachment = image_analysis.get("new_detachment")
+    image_analysis = {key: value for key, value in image_analysis.items() if key not in CHANGE_ANALYSIS_KEYS}
+
+    # Adjust parameters based on image analysis if available
+    image_modifier = 1.0
+    if image_analysis:
+        # Use image analysis to adjust parameters
+        image_modifier = 1.0 + (image_analysis.get("slope_steepness", 50) / 100 - 0.5) * 0.3
+        fracture_spacing = fracture_spacing * (1.0 - image_analysis.get("rock_fractures", 50) / 200)
+        slope_angle = slope_angle * (1.0 + image_analysis.get("slope_steepness", 50) / 100)
+
+    # Calculate individual factor contributions (0-100 scale)
+    rainfall_contrib = min(rainfall / 50 * 100, 100)  # 50mm rainfall = 100%
+    snowfall_contrib = min(snowfall / 30 * 100, 100)  # 30cm snowfall = 100%
+    wind_contrib = min(wind_speed / 80 * 100, 100)    # 80km/h wind = 100%
+
+    # Temperature: lower temps increase risk (freeze-thaw cycles)
+    if temperature <= 0:
+        temp_contrib = 100  # Freezing temperatures = maximum risk
+    else:
+        temp_contrib = max(0, 100 - (temperature * 2))  # Higher temps decrease risk
+
+    elevation_contrib = min(elevation / 2000 * 100, 100)  # 2000m elevation = 100%
+
+    # Fracture density: closer spacing = higher density = higher risk
+    fracture_density = 100 / fracture_spacing if fracture_spacing > 0 else 100
+    fracture_contrib = min(fracture_density * 2, 100)  # Scale appropriately
+
+    slope_contrib = min(slope_angle / 60 * 100, 100)  # 60° slope = 100%
+
+    rock_contrib = ROCK_FACTORS.get(rock_type, 50)
+
+    # Apply image analysis modifier
+    if image_analysis:
+        fracture_contrib *= image_modifier
+        slope_contrib *= image_modifier
+        rock_contrib *= (1.0 + (image_analysis.get("rock_type_confidence", 50) / 100 - 0.5) * 0.2)
+
+    # Calculate individual contributions for display (as percentages)
+    contributions = {
+        "Rainfall Impact": rainfall_contrib,
+        "Snow/Ice Impact": snowfall_contrib,
+        "Fracture Density": fracture_contrib,
+        "Slope Geometry": slope_contrib,
+        "Elevation Effects": elevation_contrib,
+        "Wind Erosion": wind_contrib,
+        "Temperature Effects": temp_contrib
+    }
+
+    # Add image analysis factors if available
+    if image_analysis:
+        contributions["Image Analysis: Slope"] = image_analysis.get("slope_steepness", 0)
+        contributions["Image Analysis: Fractures"] = image_analysis.get("rock_fractures", 0)
+    if new_detachment is not None:
+        contributions["Image Analysis: New Detachment"] = new_detachment
+
+    # Calculate weighted risk score (0-100)
+    weights = {
+        'rainfall': 0.12,
+        'snowfall': 0.08,
+        'wind_speed': 0.05,
+        'temperature': 0.08,
+        'elevation': 0.08,
+        'fracture_density': 0.22,
+        'slope_angle': 0.18,
+        'rock_type': 0.05,
+        'image_analysis': 0.14 if image_analysis else 0
+    }
+
+    weighted_risk = (
+        rainfall_contrib * weights['rainfall'] +
+        snowfall_contrib * weights['snowfall'] +
+        wind_contrib * weights['wind_speed'] +
+        temp_contrib * weights['temperature'] +
+        elevation_contrib * weights['elevation'] +
+        fracture_contrib * weights['fracture_density'] +
+        slope_contrib * weights['slope_angle'] +
+        rock_contrib * weights['rock_type']
+    )
+
+    # Add image analysis contribution if available
+    if image_analysis:
+        image_risk = (
+            image_analysis.get("slope_steepness", 0) * 0.6 +
+            image_analysis.get("rock_fractures", 0) * 0.4
+        ) * weights['image_analysis']
+        weighted_risk += image_risk
+
+    # A fresh scar since the previous photo of the face: the blocks around it are loosened too
+    if new_detachment is not None:
+        weighted_risk += new_detachment * 0.2
+
+    # Ensure risk is within bounds
+    weighted_risk = min(max(weighted_risk, 0), 100)
+
+    # Determine risk level
+    if weighted_risk >= 75:
+        risk_level = "CRITICAL"
+        confidence = 85 + (len(image_analysis) * 2 if image_analysis else 0)
+    elif weighted_risk >= 50:
+        risk_level = "HIGH"
+        confidence = 80 + (len(image_analysis) * 2 if image_analysis else 0)
+    elif weighted_risk >= 25:
+        risk_level = "MODERATE"
+        confidence = 75 + (len(image_analysis) * 2 if image_analysis else 0)
+    else:
+        risk_level = "LOW"
+        confidence = 70 + (len(image_analysis) * 2 if image_analysis else 0)
+
+    return weighted_risk, risk_level, confidence, contributions
+
+# Function to determine mining feasibility
+def determine_mining_feasibility(risk_level, risk_percentage, confidence):
+    """
+    Determine mining feasibility based on risk level, percentage, and confidence.
+    Returns: (feasibility_status, recommendation_message, css_class)
+    """
+    if risk_level == "LOW":
+        return "FIT", "✅ Low risk environment - Suitable for mining operations with standard safety protocols", "mining-fit"
+    elif risk_level == "MODERATE":
+        if confidence >= 70:
+            return "FIT", "✅ Moderate risk with high confidence - Mining approved with enhanced monitoring", "mining-fit"
+        else:
+            return "CONDITIONALLY FIT", "⚠️ Moderate risk with lower confidence - Additional geological assessment required before mining", "mining-conditional"
+    elif risk_level == "HIGH":
+        return "NOT FIT", "❌ High risk environment - Mining operations not recommended without major risk mitigation", "mining-not-fit"
+    else:  # CRITICAL
+        return "NOT FIT", "🚨 Critical risk environment - Mining operations strictly prohibited until risk is mitigated", "mining-not-fit"
+
+# Function to get risk category
+def get_risk_category(value):
+    if value < 20:
+        return "MINIMAL", "minimal"
+    elif value < 40:
+        return "LOW", "low"
+    elif value < 60:
+        return "MODERATE", "moderate"
+    elif value < 80:
+        return "HIGH", "high"
+    else:
+        return "EXTREME", "extreme"
+
+# Largest risk drivers named in the SMS text
+SMS_DRIVERS = 3
+
+# Function to build the SMS alert text
+def build_precaution_message(risk_level: str, risk_percentage: float, feasibility_status: str,
+                             drivers: dict = None) -> str:
+    """
+    Return a concise SMS message with risk, mining feasibility, and actionable precautions.
+
+    `drivers` maps factors to signed contributions in percentage points (model
+    explanations); the largest positive ones are named in the message.
+    """
+    base = f"Rockfall Risk: {risk_level} ({risk_percentage:.0f}%). Mining: {feasibility_status}. "
+    if drivers:
+        top = sorted(((value, factor) for factor, value in drivers.items() if value >= 0.5), reverse=True)[:SMS_DRIVERS]
+        if top:
+            base += "Drivers: " + ", ".join(f"{factor} +{value:.0f} pts" for value, factor in top) + ". "
+    if risk_level == "CRITICAL":
+        steps = (
+            "Evacuate immediately; Close access; Notify authorities; Deploy monitoring."
+        )
+    elif risk_level == "HIGH":
+        steps = (
+            "Restrict access; Increase monitoring; Install warning signs; Prepare evacuation plan."
+        )
+    elif risk_level == "MODERATE":
+        steps = (
+            "Maintain monitoring; Set warnings; Inspect bi-weekly; Be vigilant after storms."
+        )
+    else:  # LOW
+        steps = (
+            "Continue standard monitoring; Maintain safety protocols; Review plans quarterly."
+        )
+    return base + "Precautions: " + steps
@@ -0,0 +1,224 @@
+"""
+Cross-validated evaluation of rockfall classifiers.
+
+A missed rockfall costs far more than a false alarm, so a single 80/20 accuracy
+figure is not enough to choose a model. cross_validate() runs stratified
+k-fold and blocked k-fold CV (whole blocks of rows held out together: file
+order for temporally ordered data, or bins of a site column as a spatial
+proxy) and scores the pooled out-of-fold probabilities with ROC and PR
+curves, a calibration curve and the event recall reachable at fixed
+false-alarm rates.
+
+Folds are trained in a process pool. The encoded dataset is written once to
+.npy files that every worker memory-maps, so folds do not pickle the data.
+evaluate_model.py is the command-line front end.
+"""
+
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from sklearn.calibration import calibration_curve
+from sklearn.metrics import (
+    accuracy_score, average_precision_score, brier_score_loss, precision_recall_curve, recall_score,
+    roc_auc_score, roc_curve
+)
+
+from .model import FEATURE_ENCODER
+from .training import DEFAULT_ESTIMATOR, build_estimator
+
+SCHEMES = ("stratified", "blocked")
+
+# False-alarm (false positive) rates at which event recall is reported
+DEFAULT_FALSE_ALARM_RATES = (0.01, 0.05, 0.10, 0.20)
+
+# Curves are resampled onto this many points so reports stay small
+CURVE_POINTS = 101
+CALIBRATION_BINS = 10
+
+
+def stratified_folds(y, n_folds=5, random_state=42):
+    """Fold number of every row, with each class spread evenly over the folds."""
+    rng = np.random.default_rng(random_state)
+    folds = np.empty(len(y), dtype=np.int16)
+    for label in np.unique(y):
+        rows = np.flatnonzero(y == label)
+        rng.shuffle(rows)
+        folds[rows] = np.arange(len(rows)) % n_folds
+    return folds
+
+
+def block_ids(X, block_by="rows", n_blocks=50, encoder=FEATURE_ENCODER):
+    """
+    Block id of every row of an encoded matrix.
+
+    "rows" cuts the dataset into n_blocks contiguous runs in file order
+    (time blocks when rows are chronological); a numeric input name bins that
+    column into n_blocks quantile bins; a categorical input name uses its
+    category.
+    """
+    if block_by == "rows":
+        return (np.arange(len(X)) * n_blocks // max(len(X), 1)).astype(np.int32)
+    if block_by in encoder.numeric:
+        values = X[:, encoder.numeric.index(block_by)]
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, n_blocks + 1)[1:-1]))
+        return np.searchsorted(edges, values, side="right").astype(np.int32)
+    if block_by in encoder.categorical:
+        start = encoder.feature_names.index(f"{block_by}_{encoder.categorical[block_by][0]}")
+        return np.argmax(X[:, start:start + len(encoder.categorical[block_by])], axis=1).astype(np.int32)
+    raise ValueError(f"unknown block column '{block_by}' (use 'rows' or one of {', '.join(encoder.inputs)})")
+
+
+def blocked_folds(blocks, n_folds=5, random_state=42):
+    """Fold number of every row, keeping blocks whole; blocks are shuffled, then packed largest first into the emptiest fold."""
+    ids, sizes = np.unique(blocks, return_counts=True)
+    if len(ids) < n_folds:
+        raise ValueError(f"blocked CV needs at least {n_folds} blocks, got {len(ids)}")
+    order = np.random.default_rng(random_state).permutation(len(ids))
+    order = order[np.argsort(-sizes[order], kind="stable")]
+    fold_of_block = np.empty(len(ids), dtype=np.int16)
+    loads = np.zeros(n_folds, dtype=np.int64)
+    for block in order:
+        fold = int(np.argmin(loads))
+        fold_of_block[block] = fold
+        loads[fold] += sizes[block]
+    return fold_of_block[np.searchsorted(ids, blocks)]
+
+
+def recall_at_false_alarm_rates(y, scores, rates=DEFAULT_FALSE_ALARM_RATES):
+    """Best event recall (and its threshold) with a false-alarm rate at or below each rate."""
+    fpr, tpr, thresholds = roc_curve(y, scores)
+    results = []
+    for rate in rates:
+        # roc_curve's fpr is non-decreasing, so the last point within the rate has the best recall
+        point = np.searchsorted(fpr, rate, side="right") - 1
+        results.append({"false_alarm_rate": rate, "recall": float(tpr[point]),
+                        "threshold": float(min(thresholds[point], 1.0)),
+                        "actual_false_alarm_rate": float(fpr[point])})
+    return results
+
+
+def score_predictions(y, scores, threshold=0.5, rates=DEFAULT_FALSE_ALARM_RATES, curves=True):
+    """Ranking, calibration and thresholded metrics of event probabilities."""
+    predicted = (scores >= threshold).astype(np.int8)
+    metrics = {
+        "rows": int(len(y)),
+        "roc_auc": float(roc_auc_score(y, scores)),
+        "average_precision": float(average_precision_score(y, scores)),
+        "brier": float(brier_score_loss(y, scores)),
+        "accuracy": float(accuracy_score(y, predicted)),
+        "event_recall": float(recall_score(y, predicted, zero_division=0)),
+        "false_alarm_rate": float(np.mean(predicted[y == 0])) if np.any(y == 0) else 0.0,
+        "recall_at_false_alarm": recall_at_false_alarm_rates(y, scores, rates)
+    }
+    if curves:
+        grid = np.linspace(0, 1, CURVE_POINTS)
+        fpr, tpr, _ = roc_curve(y, scores)
+        precision, recall, _ = precision_recall_curve(y, scores)
+        # precision_recall_curve runs from high to low recall; take the best precision at each recall level
+        best_precision = np.maximum.accumulate(precision)
+        observed, predicted_mean = calibration_curve(y, scores, n_bins=CALIBRATION_BINS)
+        metrics["curves"] = {
+            "roc": {"false_alarm_rate": grid.tolist(), "recall": np.interp(grid, fpr, tpr).tolist()},
+            "precision_recall": {"recall": grid.tolist(),
+                                 "precision": np.interp(grid, recall[::-1], best_precision[::-1]).tolist()},
+            "calibration": {"predicted": predicted_mean.tolist(), "observed": observed.tolist()}
+        }
+    return metrics
+
+
+def _fit_fold(data_dir, fold, folds_file, kind, n_estimators, n_jobs, random_state):
+    X = np.load(Path(data_dir) / "X.npy", mmap_mode="r")
+    y = np.load(Path(data_dir) / "y.npy", mmap_mode="r")
+    folds = np.load(Path(data_dir) / folds_file, mmap_mode="r")
+    train, test = np.flatnonzero(folds != fold), np.flatnonzero(folds == fold)
+    estimator = build_estimator(n_estimators, n_jobs, random_state, kind)
+    start = time.perf_counter()
+    estimator.fit(X[train], y[train])
+    train_seconds = time.perf_counter() - start
+    event_column = list(estimator.classes_).index(1)
+    return fold, test, estimator.predict_proba(X[test])[:, event_column], train_seconds
+
+
+def _run_folds(data_dir, folds_file, n_folds, kind, n_estimators, random_state, workers):
+    if workers == 1:
+        for fold in range(n_folds):
+            yield _fit_fold(data_dir, fold, folds_file, kind, n_estimators, -1, random_state)
+        return
+    # One process per fold and one thread each, so the pool does not oversubscribe the cores
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_fit_fold, data_dir, fold, folds_file, kind, n_estimators, 1, random_state)
+                   for fold in range(n_folds)]
+        for future in futures:
+            yield future.result()
+
+
+def cross_validate(X, y, schemes=SCHEMES, n_folds=5, kind=DEFAULT_ESTIMATOR, n_estimators=100,
+                   block_by="rows", n_blocks=50, workers=None, random_state=42,
+                   false_alarm_rates=DEFAULT_FALSE_ALARM_RATES):
+    """
+    Run every CV scheme on an encoded dataset and return a JSON-ready report.
+
+    Each scheme reports per-fold metrics, their mean and standard deviation,
+    and metrics with curves for the pooled out-of-fold probabilities.
+    `workers` defaults to min(n_folds, CPU count).
+    """
+    unknown = set(schemes) - set(SCHEMES)
+    if unknown:
+        raise ValueError(f"unknown CV schemes {sorted(unknown)} (use {', '.join(SCHEMES)})")
+    build_estimator(kind=kind)  # fail on unknown kinds before spawning anything
+    workers = workers or min(n_folds, os.cpu_count() or 1)
+
+    report = {
+        "config": {"rows": int(len(y)), "event_rate": float(np.mean(y)), "n_folds": n_folds, "estimator": kind,
+                   "n_estimators": n_estimators, "block_by": block_by, "n_blocks": n_blocks, "workers": workers,
+                   "random_state": random_state, "false_alarm_rates": list(false_alarm_rates)},
+        "schemes": {}
+    }
+    with tempfile.TemporaryDirectory(prefix="rockfall-cv-") as data_dir:
+        np.save(Path(data_dir) / "X.npy", np.ascontiguousarray(X, dtype=np.float32))
+        np.save(Path(data_dir) / "y.npy", np.asarray(y, dtype=np.int8))
+        for scheme in schemes:
+            start = time.perf_counter()
+            if scheme == "stratified":
+                folds = stratified_folds(y, n_folds, random_state)
+            else:
+                folds = blocked_folds(block_ids(X, block_by, n_blocks), n_folds, random_state)
+            np.save(Path(data_dir) / f"{scheme}_folds.npy", folds)
+
+            out_of_fold = np.empty(len(y))
+            fold_metrics = []
+            for fold, test, scores, train_seconds in _run_folds(data_dir, f"{scheme}_folds.npy", n_folds, kind,
+                                                                 n_estimators, random_state, workers):
+                out_of_fold[test] = scores
+                metrics = score_predictions(y[test], scores, rates=false_alarm_rates, curves=False)
+                fold_metrics.append({"fold": fold, "train_seconds": train_seconds, **metrics})
+
+            summary = {}
+            for name in ("roc_auc", "average_precision", "brier", "accuracy", "event_recall", "train_seconds"):
+                values = np.array([metrics[name] for metrics in fold_metrics])
+                summary[name] = {"mean": float(values.mean()), "std": float(values.std())}
+            report["schemes"][scheme] = {
+                "folds": sorted(fold_metrics, key=lambda metrics: metrics["fold"]),
+                "summary": summary,
+                "pooled": score_predictions(y, out_of_fold, rates=false_alarm_rates),
+                "seconds": time.perf_counter() - start
+            }
+    return report
+
+
+def format_report(report):
+    """Text summary of a cross_validate() report."""
+    lines = []
+    for scheme, result in report["schemes"].items():
+        summary, pooled = result["summary"], result["pooled"]
+        lines.append(f"{scheme} {report['config']['n_folds']}-fold ({result['seconds']:.1f} s):")
+        for name in ("roc_auc", "average_precision", "event_recall", "accuracy", "brier"):
+            lines.append(f"  {name:<18} {summary[name]['mean']:.4f} ± {summary[name]['std']:.4f}")
+        lines.append("  recall at false-alarm rate (pooled): " + ", ".join(
+            f"{point['false_alarm_rate']:.0%} → {point['recall']:.3f}" for point in pooled["recall_at_false_alarm"]
+        ))
+    return "\n".join(lines)
@@ -0,0 +1,143 @@
+"""
+Fixed-schema feature encoding shared by training and inference.
+
+FeatureEncoder maps raw inputs (numeric readings and categorical values such
+as the rock type) into float32 rows in one fixed column order: the numeric
+columns, then one one-hot column per known category, named
+"<column>_<category>". Unlike pd.get_dummies the columns come from the schema,
+not from whichever categories a dataset happens to contain, and the schema is
+saved as JSON next to every model so inference rebuilds exactly the training
+columns.
+
+encode_row() fills a single row in a few microseconds (dashboard, alerts,
+service); encode() fills a matrix column by column for datasets and batches.
+Neither needs pandas, although DataFrames are accepted as column containers.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+SCHEMA_VERSION = 1
+
+
+class FeatureEncoder:
+    """
+    Numeric columns plus one-hot categorical columns, in a fixed order.
+
+    `categorical` maps each categorical column to its categories. Values
+    outside the known categories, and categorical columns an input lacks,
+    leave every one-hot column of that column at 0.
+    """
+
+    def __init__(self, numeric, categorical):
+        self.numeric = tuple(numeric)
+        self.categorical = {name: tuple(categories) for name, categories in categorical.items()}
+        self.feature_names = self.numeric + tuple(
+            f"{name}_{category}" for name, categories in self.categorical.items() for category in categories
+        )
+        self.n_features = len(self.feature_names)
+        # Raw input columns, and where each one's encoded columns start
+        self.inputs = self.numeric + tuple(self.categorical)
+        self._input_starts = np.cumsum(
+            [0] + [1] * len(self.numeric) + [len(categories) for categories in self.categorical.values()]
+        )[:-1]
+
+        # Output column of every (categorical column, category)
+        self._one_hot = {}
+        column = len(self.numeric)
+        for name, categories in self.categorical.items():
+            self._one_hot[name] = {category: column + i for i, category in enumerate(categories)}
+            column += len(categories)
+        self._zeros = np.zeros(self.n_features, dtype=np.float32)
+
+    def __eq__(self, other):
+        return (isinstance(other, FeatureEncoder)
+                and (self.numeric, self.categorical) == (other.numeric, other.categorical))
+
+    def __repr__(self):
+        return f"FeatureEncoder({len(self.numeric)} numeric, {len(self.categorical)} categorical, {self.n_features} features)"
+
+    def encode_row(self, values, out=None):
+        """
+        One float32 row for a mapping of raw column values.
+
+        Every numeric column is required; `out` (a float32 row) is filled
+        instead of allocating when given.
+        """
+        if out is None:
+            row = self._zeros.copy()
+        else:
+            row = out
+            row[len(self.numeric):] = 0
+        row[:len(self.numeric)] = [values[name] for name in self.numeric]
+        for name, columns in self._one_hot.items():
+            column = columns.get(values.get(name))
+            if column is not None:
+                row[column] = 1
+        return row
+
+    def encode(self, columns, out=None):
+        """
+        An (n_rows, n_features) float32 matrix for column-oriented inputs.
+
+        `columns` is a dict of arrays, a DataFrame or a structured array.
+        Categorical columns may hold strings, bytes (e.g. NPY datasets) or
+        pandas categoricals. `out` is filled instead of allocating when given.
+        """
+        names = columns.dtype.names if isinstance(columns, np.ndarray) else columns.keys()
+        n_rows = len(columns[self.numeric[0]]) if self.numeric else len(columns)
+        out = np.empty((n_rows, self.n_features), dtype=np.float32) if out is None else out
+        for i, name in enumerate(self.numeric):
+            out[:, i] = np.asarray(columns[name], dtype=np.float32)
+
+        for name, categories in self.categorical.items():
+            first = self._one_hot[name][categories[0]]
+            block = out[:, first:first + len(categories)]
+            if name not in names:
+                block[:] = 0
+                continue
+            values = columns[name]
+            if hasattr(values, "cat"):
+                # pandas categorical: translate its codes to our category positions once
+                lookup = np.array([categories.index(category) if category in categories else -1
+                                   for category in values.cat.categories] + [-1])
+                positions = lookup[values.cat.codes.to_numpy()]
+                for position in range(len(categories)):
+                    np.equal(positions, position, out=block[:, position], casting="unsafe")
+                continue
+            values = np.asarray(values)
+            for position, category in enumerate(categories):
+                key = category.encode() if values.dtype.kind == "S" else category
+                np.equal(values, key, out=block[:, position], casting="unsafe")
+        return out
+
+    def group_by_input(self, values):
+        """Sum per-feature values (e.g. attributions) of an (n_rows, n_features) array into (n_rows, len(inputs))."""
+        return np.add.reduceat(np.asarray(values), self._input_starts, axis=1)
+
+    def to_dict(self):
+        return {"schema_version": SCHEMA_VERSION, "numeric": list(self.numeric),
+                "categorical": {name: list(categories) for name, categories in self.categorical.items()}}
+
+    @classmethod
+    def from_dict(cls, schema):
+        if schema.get("schema_version") != SCHEMA_VERSION:
+            raise ValueError(f"unsupported feature schema version {schema.get('schema_version')!r}")
+        return cls(schema["numeric"], schema["categorical"])
+
+    def save(self, path):
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2))
+        return path
+
+
+def load_encoder(path):
+    """The FeatureEncoder saved at `path`."""
+    return FeatureEncoder.from_dict(json.loads(Path(path).read_text()))
+
+
+def schema_path(model_path):
+    """Where the feature schema of the model at `model_path` is saved: <model stem>.features.json."""
+    model_path = Path(model_path)
+    return model_path.with_name(model_path.stem + ".features.json")
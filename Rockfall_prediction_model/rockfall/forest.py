@@ -0,0 +1,202 @@
+"""
+Array-compiled RandomForest inference.
+
+compile_forest() flattens every tree of a fitted RandomForestClassifier into
+contiguous NumPy arrays (feature, threshold, left, right, value), so prediction
+needs no scikit-learn and skips its per-call validation and threading overhead,
+which dominates for the 1-100 row calls made by the dashboard and alerting.
+
+Predictions are bit-for-bit equal to RandomForestClassifier.predict_proba: inputs
+are cast to float32 like scikit-learn does, missing values follow each split's
+missing_go_to_left, and tree probabilities are summed in tree order before being
+divided by the number of trees.
+
+contributions() explains a prediction from the same arrays with path-based
+(Saabas) attribution: every split on a row's path credits its feature with the
+change in class probability from the node to the child taken.
+"""
+
+import numpy as np
+
+# Rows traversed per pass; bounds the (trees, rows, classes) leaf value gather
+CHUNK_ROWS = 4096
+
+
+class CompiledForest:
+    """
+    A forest as flat node arrays.
+
+    Node i of the forest splits on `feature[i]` at `threshold[i]` and continues
+    at `left[i]` when the value is <= the threshold (or missing and
+    `missing_left[i]`), else at `right[i]`. Leaves point back at themselves and
+    hold their class probabilities in `value[i]`. `roots` holds each tree's
+    first node.
+    """
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots, max_depth,
+                 classes, feature_names=None, children=None, is_leaf=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes = np.asarray(classes)
+        self.feature_names = None if feature_names is None else tuple(feature_names)
+        self.n_features = int(feature.max()) + 1 if feature_names is None else len(self.feature_names)
+        # Traversal helpers: interleaved (left, right) children and a leaf mask,
+        # passed in when loaded from disk so memory-mapped forests are not copied
+        self._children = np.column_stack([left, right]).ravel() if children is None else children
+        self._is_leaf = left == np.arange(len(left)) if is_leaf is None else is_leaf
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self.arrays().values())
+
+    def arrays(self):
+        """The node arrays by name, e.g. for saving with np.save."""
+        return {
+            "feature": self.feature,
+            "threshold": self.threshold,
+            "left": self.left,
+            "right": self.right,
+            "missing_left": self.missing_left,
+            "value": self.value,
+            "roots": self.roots
+        }
+
+    def traversal_arrays(self):
+        """The derived traversal arrays by name; pass them back as keyword arguments when loading."""
+        return {"children": self._children, "is_leaf": self._is_leaf}
+
+    def apply(self, X):
+        """Leaf node index of every (tree, row): an (n_trees, n_rows) array."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"CompiledForest: expected an (n, {self.n_features}) array, got shape {X.shape}")
+
+        # One entry per (tree, row); only entries still above their leaf are traversed
+        n = len(X)
+        nodes = np.repeat(self.roots, n)
+        active = np.flatnonzero(~self._is_leaf[nodes])
+        current = nodes[active]
+        offsets = (active % n) * self.n_features
+        flat = X.ravel()
+        has_missing = np.isnan(flat).any()
+        while active.size:
+            values = flat[offsets + self.feature[current]]
+            # float32 inputs are compared against float64 thresholds, as in scikit-learn;
+            # NaN fails the comparison and goes right unless the split sends it left
+            go_right = ~(values <= self.threshold[current])
+            if has_missing:
+                go_right &= ~(np.isnan(values) & self.missing_left[current])
+            current = self._children[2 * current + go_right]
+
+            arrived = self._is_leaf[current]
+            if arrived.any():
+                nodes[active[arrived]] = current[arrived]
+                pending = ~arrived
+                active, current, offsets = active[pending], current[pending], offsets[pending]
+        return nodes.reshape(self.n_trees, n)
+
+    def predict_proba(self, X):
+        """Class probabilities, identical to RandomForestClassifier.predict_proba."""
+        X = np.asarray(X, dtype=np.float32)
+        proba = np.empty((len(X), self.value.shape[1]))
+        for start in range(0, len(X), CHUNK_ROWS):
+            rows = slice(start, start + CHUNK_ROWS)
+            leaf_values = self.value[self.apply(X[rows])]
+            # Running sum over trees in order (np.sum would add them pairwise)
+            proba[rows] = np.cumsum(leaf_values, axis=0)[-1]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+    def contributions(self, X, column=-1):
+        """
+        Path-based attribution of predict_proba(X)[:, column].
+
+        Returns (bias, contributions): the forest's mean root probability and
+        an (n_rows, n_features) array, with bias + contributions.sum(axis=1)
+        equal to the predicted probability up to rounding. All (tree, row)
+        paths are walked together, one level per step.
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"CompiledForest: expected an (n, {self.n_features}) array, got shape {X.shape}")
+        values = np.ascontiguousarray(self.value[:, column])
+        contributions = np.zeros(X.shape)
+        for start in range(0, len(X), CHUNK_ROWS):
+            chunk = X[start:start + CHUNK_ROWS]
+            n = len(chunk)
+            flat = chunk.ravel()
+            has_missing = np.isnan(flat).any()
+            current = np.repeat(self.roots, n)
+            offsets = np.tile(np.arange(n) * self.n_features, self.n_trees)
+            pending = ~self._is_leaf[current]
+            current, offsets = current[pending], offsets[pending]
+            totals = np.zeros(n * self.n_features)
+            while current.size:
+                features = self.feature[current]
+                values_at = flat[offsets + features]
+                go_right = ~(values_at <= self.threshold[current])
+                if has_missing:
+                    go_right &= ~(np.isnan(values_at) & self.missing_left[current])
+                child = self._children[2 * current + go_right]
+                totals += np.bincount(offsets + features, weights=values[child] - values[current],
+                                      minlength=totals.size)
+                pending = ~self._is_leaf[child]
+                current, offsets = child[pending], offsets[pending]
+            contributions[start:start + n] = totals.reshape(n, self.n_features)
+        return float(values[self.roots].mean()), contributions / self.n_trees
+
+
+def compile_forest(forest):
+    """
+    Flatten a fitted RandomForestClassifier (or any classifier ensemble of
+    single-output decision trees exposing `estimators_`) into a CompiledForest.
+    """
+    if getattr(forest, "n_outputs_", 1) != 1:
+        raise ValueError("compile_forest: only single-output forests are supported")
+
+    features, thresholds, lefts, rights, missing_lefts, values, roots = [], [], [], [], [], [], []
+    offset = max_depth = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        n_nodes = tree.node_count
+        node_ids = np.arange(offset, offset + n_nodes, dtype=np.int32)
+        is_leaf = tree.children_left == -1
+
+        # Leaves become fixed points: split on feature 0 at +inf and go left to themselves
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+        lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset).astype(np.int32))
+        rights.append(np.where(is_leaf, node_ids, tree.children_right + offset).astype(np.int32))
+        missing = getattr(tree, "missing_go_to_left", np.zeros(n_nodes, dtype=np.uint8))
+        missing_lefts.append(np.where(is_leaf, True, np.asarray(missing, dtype=bool)))
+        values.append(tree.value[:, 0, :])
+        roots.append(offset)
+
+        offset += n_nodes
+        max_depth = max(max_depth, tree.max_depth)
+
+    return CompiledForest(
+        feature=np.ascontiguousarray(np.concatenate(features)),
+        threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+        left=np.ascontiguousarray(np.concatenate(lefts)),
+        right=np.ascontiguousarray(np.concatenate(rights)),
+        missing_left=np.ascontiguousarray(np.concatenate(missing_lefts)),
+        value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+        roots=np.array(roots, dtype=np.int32),
+        max_depth=max_depth,
+        classes=forest.classes_,
+        feature_names=getattr(forest, "feature_names_in_", None)
+    )
@@ -0,0 +1,184 @@
+"""
+CPU-only slope image analysis.
+
+analyze_image() turns a slope photo into the IMAGE_ANALYSIS_KEYS scores
+(0-100) that calculate_risk and the contour map consume. Every score comes
+from per-tile statistics of a bounded-resolution working copy:
+
+- rock_fractures: density of strong intensity edges on bare (non-vegetated,
+  non-shadow) ground;
+- vegetation_cover: share of pixels whose excess-green index 2g - r - b
+  (on chromatic coordinates, so it is insensitive to brightness) marks them
+  as vegetation;
+- erosion_signs: local contrast (texture) of bare ground, the signature of
+  rills, gullies and loose debris;
+- slope_steepness: structure-tensor coherence, i.e. how strongly the gradients
+  of a tile share one orientation, as on bedded or jointed steep faces and
+  the shadows they cast;
+- rock_type_confidence: how much well-lit, sharply textured bare rock is
+  visible to judge the lithology from.
+
+These are photo-based proxies, not measurements: they rank images
+consistently but do not replace surveyed slope angles or scanline fracture
+counts.
+
+The working copy is capped at WORKING_PIXELS. JPEGs (drone photos) are
+decoded directly at a reduced DCT scale, so a 40-megapixel photo never exists
+at full size in memory and is analyzed in a fraction of a second. Tiles are
+reshaped views of the working copy, and every statistic is one vectorized
+reduction over all tiles at once. tile_features() exposes the per-tile grids
+for callers that map them.
+"""
+
+import math
+
+import numpy as np
+from PIL import Image
+
+from .engine import IMAGE_ANALYSIS_KEYS
+
+# Largest working copy analyzed (pixels); bigger images are downsampled on decode
+WORKING_PIXELS = 1 << 20
+
+# Tile side in working-copy pixels
+TILE_PIXELS = 32
+
+# Gradient magnitude (intensity per pixel, intensities in 0-1) counted as an edge
+EDGE_THRESHOLD = 0.06
+
+# Excess-green index above which a pixel counts as vegetation
+VEGETATION_THRESHOLD = 0.08
+
+# Pixels darker than this are shadow: neither vegetation nor visible rock
+SHADOW_INTENSITY = 0.08
+
+# Statistic values mapped to a score of 100
+FRACTURE_SATURATION = 0.35      # edge pixel share of bare ground
+TEXTURE_SATURATION = 0.20       # intensity standard deviation within a tile
+SHARPNESS_SATURATION = 0.05     # mean gradient magnitude
+
+_LUMA = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def load_working_image(source, max_pixels=WORKING_PIXELS):
+    """
+    The image as an RGB PIL image of at most `max_pixels` pixels.
+
+    `source` is a path or a binary file object (e.g. a Streamlit upload); file
+    objects are rewound afterwards so they can be displayed or read again.
+    """
+    start = source.tell() if hasattr(source, "tell") else None
+    try:
+        with Image.open(source) as image:
+            width, height = image.size
+            if width * height > max_pixels:
+                scale = math.sqrt(max_pixels / (width * height))
+                size = (max(int(width * scale), 1), max(int(height * scale), 1))
+                # JPEGs decode at the smallest DCT scale (1/2, 1/4, 1/8) still covering the working size
+                image.draft("RGB", size)
+                image.thumbnail(size, Image.Resampling.BOX, reducing_gap=None)
+            return image.convert("RGB")
+    finally:
+        if start is not None:
+            source.seek(start)
+
+
+def to_array(image):
+    """An (h, w, 3) float32 RGB array in 0-1 of an RGB PIL image."""
+    rgb = np.asarray(image, dtype=np.float32)
+    rgb *= 1 / 255
+    return rgb
+
+
+def load_working_copy(source, max_pixels=WORKING_PIXELS):
+    """An (h, w, 3) float32 RGB array in 0-1 of at most `max_pixels` pixels (see load_working_image)."""
+    return to_array(load_working_image(source, max_pixels))
+
+
+def _tiles(array, tile):
+    # (rows, cols, tile, tile, ...) view of the full tiles of an image-shaped array
+    rows, cols = array.shape[0] // tile, array.shape[1] // tile
+    array = array[:rows * tile, :cols * tile]
+    return array.reshape(rows, tile, cols, tile, *array.shape[2:]).swapaxes(1, 2)
+
+
+def tile_features(rgb, tile=TILE_PIXELS):
+    """
+    Per-tile statistics of an RGB working copy, each a (rows, cols) float32 grid.
+
+    "vegetation", "bare" and "shadow" are pixel shares; "edges" is the edge
+    pixel share of the tile's bare pixels; "texture" the intensity standard
+    deviation; "coherence" the structure-tensor coherence (0 isotropic, 1 one
+    orientation); "sharpness" the mean gradient magnitude.
+    """
+    if rgb.shape[0] < tile + 2 or rgb.shape[1] < tile + 2:
+        raise ValueError(f"image too small to analyze: {rgb.shape[1]}x{rgb.shape[0]} pixels")
+    gray = rgb @ _LUMA
+
+    # Central differences on the interior; the one-pixel border is dropped everywhere
+    gx = (gray[1:-1, 2:] - gray[1:-1, :-2]) * 0.5
+    gy = (gray[2:, 1:-1] - gray[:-2, 1:-1]) * 0.5
+    interior = rgb[1:-1, 1:-1]
+    gray = gray[1:-1, 1:-1]
+    magnitude = np.hypot(gx, gy)
+
+    chroma = interior.sum(axis=2) + 1e-6
+    excess_green = (2 * interior[..., 1] - interior[..., 0] - interior[..., 2]) / chroma
+    shadow = gray < SHADOW_INTENSITY
+    vegetation = (excess_green > VEGETATION_THRESHOLD) & ~shadow
+    bare = ~vegetation & ~shadow
+    edges = (magnitude > EDGE_THRESHOLD) & bare
+
+    def mean(array):
+        return _tiles(array, tile).mean(axis=(2, 3), dtype=np.float32)
+
+    bare_share = mean(bare)
+    mean_gray = mean(gray)
+    jxx, jyy, jxy = mean(gx * gx), mean(gy * gy), mean(gx * gy)
+    energy = jxx + jyy
+    return {
+        "vegetation": mean(vegetation),
+        "bare": bare_share,
+        "shadow": mean(shadow),
+        "edges": np.divide(mean(edges), bare_share, out=np.zeros_like(bare_share), where=bare_share > 0),
+        "texture": np.sqrt(np.maximum(mean(gray * gray) - mean_gray * mean_gray, 0)),
+        "coherence": np.divide(np.sqrt((jxx - jyy) ** 2 + 4 * jxy * jxy), energy,
+                               out=np.zeros_like(energy), where=energy > 1e-12),
+        "energy": energy,
+        "sharpness": mean(magnitude)
+    }
+
+
+def _score(value, saturation):
+    return int(round(100 * min(max(float(value) / saturation, 0.0), 1.0)))
+
+
+def summarize_tiles(tiles):
+    """The IMAGE_ANALYSIS_KEYS scores (ints, 0-100) of tile_features() grids."""
+    bare = tiles["bare"]
+    bare_total = float(bare.sum())
+
+    def bare_weighted(grid):
+        return float((grid * bare).sum()) / bare_total if bare_total else 0.0
+
+    energy_total = float(tiles["energy"].sum())
+    coherence = float((tiles["coherence"] * tiles["energy"]).sum()) / energy_total if energy_total else 0.0
+    bare_share = float(bare.mean())
+    scores = {
+        "slope_steepness": int(round(100 * coherence)),
+        "rock_fractures": _score(bare_weighted(tiles["edges"]), FRACTURE_SATURATION),
+        "vegetation_cover": int(round(100 * float(tiles["vegetation"].mean()))),
+        "rock_type_confidence": _score(bare_share * min(float(tiles["sharpness"].mean()) / SHARPNESS_SATURATION, 1.0), 1.0),
+        "erosion_signs": _score(bare_weighted(tiles["texture"]) * bare_share, TEXTURE_SATURATION)
+    }
+    return {key: scores[key] for key in IMAGE_ANALYSIS_KEYS}
+
+
+def analyze_array(rgb, tile=TILE_PIXELS):
+    """IMAGE_ANALYSIS_KEYS scores of an (h, w, 3) float RGB array in 0-1."""
+    return summarize_tiles(tile_features(rgb, tile))
+
+
+def analyze_image(source, max_pixels=WORKING_PIXELS, tile=TILE_PIXELS):
+    """IMAGE_ANALYSIS_KEYS scores (ints, 0-100) of an image file or file object."""
+    return analyze_array(load_working_copy(source, max_pixels), tile)
@@ -0,0 +1,341 @@
+"""
+Model-backed rockfall prediction with the RandomForest from train_model.py.
+
+The pickle is deserialized once per process by load_model() and shared by every
+Streamlit session and request thread. Its feature names are checked against
+its saved feature schema (FEATURE_ENCODER when it has none) on load, so a model
+trained on a different dataset layout fails loudly instead of scoring shuffled
+inputs.
+
+Dashboard inputs are mapped onto the raw training columns by site_inputs() and
+encoded by the model's FeatureEncoder; the training data has site properties
+the dashboard does not ask for, which fall back to DEFAULT_SITE.
+"""
+
+import collections
+import statistics
+import threading
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from .engine import calculate_risk
+from .features import FeatureEncoder, load_encoder, schema_path
+from .forest import compile_forest
+
+MODEL_PATH = Path(__file__).resolve().parent.parent / "model" / "rockfall_model.pkl"
+
+# Numeric training columns, in dataset order
+NUMERIC_FEATURES = (
+    "Elevation",
+    "Slope",
+    "Aspect_deg",
+    "Distance_to_fault_km",
+    "Rainfall_mm",
+    "Snow_mm",
+    "Temperature_C",
+    "Wind_speed_kmh",
+    "Fracture_Density",
+    "Rock_size",
+    "Rock_volume",
+    "Energy_released"
+)
+
+# Categorical training columns and their categories, one-hot encoded as
+# "<column>_<category>" in this order
+CATEGORICAL_FEATURES = {
+    "Rock_Type": ("Granite", "Sandstone", "Shale"),
+    "Soil_Type": ("Clay", "Loam", "Sand"),
+    "Lithology": ("Igneous", "Metamorphic", "Sedimentary"),
+    "Vegetation": ("Dense", "Moderate", "Sparse"),
+    "Land_Cover": ("Bare", "Forest", "Grassland")
+}
+
+# Label column of the training data (1 = rockfall event)
+TARGET = "Rockfall_Event"
+
+# Encoder for the training columns; models saved without a feature schema use it
+FEATURE_ENCODER = FeatureEncoder(NUMERIC_FEATURES, CATEGORICAL_FEATURES)
+
+# Column order the model was trained on
+FEATURE_NAMES = FEATURE_ENCODER.feature_names
+
+# Site properties the dashboard does not collect, at typical values of the training data
+DEFAULT_SITE = {
+    "Aspect_deg": 180.0,
+    "Distance_to_fault_km": 2.0,
+    "Rock_size": 1.5,
+    "Rock_volume": 2.0,
+    "Energy_released": 1000.0,
+    "Soil_Type": "Loam",
+    "Vegetation": "Moderate",
+    "Land_Cover": "Bare"
+}
+
+# Lithology implied by the dashboard's rock types
+ROCK_LITHOLOGY = {
+    "Limestone": "Sedimentary",
+    "Sandstone": "Sedimentary",
+    "Shale": "Sedimentary",
+    "Granite": "Igneous",
+    "Basalt": "Igneous"
+}
+
+# Display names of the raw inputs in model explanations
+INPUT_LABELS = {
+    "Elevation": "Elevation",
+    "Slope": "Slope Angle",
+    "Aspect_deg": "Slope Aspect",
+    "Distance_to_fault_km": "Fault Distance",
+    "Rainfall_mm": "Rainfall",
+    "Snow_mm": "Snowfall",
+    "Temperature_C": "Temperature",
+    "Wind_speed_kmh": "Wind Speed",
+    "Fracture_Density": "Fracture Density",
+    "Rock_size": "Rock Size",
+    "Rock_volume": "Rock Volume",
+    "Energy_released": "Energy Released",
+    "Rock_Type": "Rock Type",
+    "Soil_Type": "Soil Type",
+    "Lithology": "Lithology",
+    "Vegetation": "Vegetation",
+    "Land_Cover": "Land Cover"
+}
+
+# Steady-state latencies kept for reporting
+LATENCY_WINDOW = 1000
+
+# Largest batch predicted with the compiled forest; scikit-learn's compiled tree
+# loop wins beyond a few hundred rows, and both give identical probabilities
+COMPILED_MAX_ROWS = 256
+
+
+class ModelSchemaError(ValueError):
+    """Raised when a model's feature names do not match the training columns."""
+
+
+class RockfallModel:
+    """
+    A loaded classifier plus its load time and prediction latencies.
+
+    Forests are compiled into flat arrays on load (see rockfall.forest), and
+    calls of up to COMPILED_MAX_ROWS rows skip scikit-learn entirely; larger
+    batches and other estimators use the estimator's own predict_proba.
+    Registry models (see rockfall.registry) may carry only the compiled forest,
+    which then serves every batch size.
+    """
+
+    def __init__(self, estimator, path, load_seconds, load_warnings=(), forest=None, version=None,
+                 encoder=FEATURE_ENCODER):
+        self.estimator = estimator
+        self.encoder = encoder
+        self.path = Path(path)
+        self.load_seconds = load_seconds
+        # e.g. scikit-learn version mismatches reported while unpickling
+        self.load_warnings = list(load_warnings)
+        if forest is None and hasattr(estimator, "estimators_"):
+            forest = compile_forest(estimator)
+        # Forests loaded from the model registry come without an estimator
+        self.forest = forest
+        self.version = version
+        self.first_prediction_seconds = None
+        self._latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        # Column of predict_proba holding the "rockfall event" class
+        classes = estimator.classes_ if estimator is not None else forest.classes
+        self._event_column = list(classes).index(1)
+
+    def predict_proba(self, features):
+        """Probability of a rockfall event for each row of an encoded feature matrix or frame."""
+        start = time.perf_counter()
+        if self.forest is not None and (self.estimator is None or len(features) <= COMPILED_MAX_ROWS):
+            probability = self.forest.predict_proba(features)[:, self._event_column]
+        else:
+            if not isinstance(features, pd.DataFrame):
+                features = pd.DataFrame(features, columns=list(self.encoder.feature_names))
+            probability = self.estimator.predict_proba(features)[:, self._event_column]
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            if self.first_prediction_seconds is None:
+                self.first_prediction_seconds = elapsed
+            else:
+                self._latencies.append(elapsed)
+        return probability
+
+    @property
+    def explains(self):
+        """True when explain() is available (forest models)."""
+        return self.forest is not None
+
+    def explain(self, features):
+        """
+        Path-based attribution of the event probability for each row of an encoded matrix.
+
+        Returns (bias, contributions) with contributions an (n_rows, len(encoder.inputs))
+        array in probability units, one-hot columns summed back into their raw
+        input; bias + contributions.sum(axis=1) is the predicted probability.
+        """
+        if self.forest is None:
+            raise ValueError(f"{type(self.estimator).__name__} models cannot be explained from tree paths")
+        bias, contributions = self.forest.contributions(features, self._event_column)
+        return bias, self.encoder.group_by_input(contributions)
+
+    def latency_stats(self):
+        """Load, first-prediction and steady-state prediction latencies in milliseconds."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            first = self.first_prediction_seconds
+        stats = {
+            "version": self.version,
+            "load_ms": self.load_seconds * 1e3,
+            "first_prediction_ms": first * 1e3 if first is not None else None,
+            "steady_state_predictions": len(latencies),
+            "steady_state_p50_ms": None,
+            "steady_state_p99_ms": None,
+            "steady_state_mean_ms": None
+        }
+        if latencies:
+            stats["steady_state_p50_ms"] = latencies[len(latencies) // 2] * 1e3
+            stats["steady_state_p99_ms"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1e3
+            stats["steady_state_mean_ms"] = statistics.fmean(latencies) * 1e3
+        return stats
+
+
+def check_feature_names(estimator, encoder=FEATURE_ENCODER):
+    """
+    Raise ModelSchemaError unless the estimator was fitted on the encoder's
+    columns, in order, and the encoder only needs known raw columns.
+    """
+    expected = encoder.feature_names
+    fitted = getattr(estimator, "feature_names_in_", None)
+    if fitted is None:
+        raise ModelSchemaError("model was fitted without feature names; retrain it with train_model.py")
+    fitted = tuple(fitted)
+    if fitted != expected:
+        missing = [name for name in expected if name not in fitted]
+        unexpected = [name for name in fitted if name not in expected]
+        detail = f"missing {missing}, unexpected {unexpected}" if missing or unexpected else "columns are reordered"
+        raise ModelSchemaError(f"model features do not match its feature schema: {detail}")
+    unknown = [name for name in encoder.numeric if name not in NUMERIC_FEATURES]
+    if unknown:
+        raise ModelSchemaError(f"model needs numeric inputs the app does not provide: {unknown}")
+
+
+def model_encoder(path):
+    """The feature schema saved next to the model at `path`, else FEATURE_ENCODER."""
+    path = schema_path(path)
+    try:
+        return load_encoder(path) if path.is_file() else FEATURE_ENCODER
+    except (KeyError, ValueError) as error:
+        raise ModelSchemaError(f"unreadable feature schema {path}: {error}") from None
+
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def load_model(path=MODEL_PATH):
+    """
+    Load and validate the model at `path`, once per process.
+
+    Later calls return the same RockfallModel, so every session shares one
+    deserialized forest.
+    """
+    key = Path(path).resolve()
+    with _models_lock:
+        if key not in _models:
+            start = time.perf_counter()
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                estimator = joblib.load(key)
+            encoder = model_encoder(key)
+            check_feature_names(estimator, encoder)
+            messages = list(dict.fromkeys(str(warning.message).splitlines()[0] for warning in caught))
+            _models[key] = RockfallModel(estimator, key, time.perf_counter() - start, messages, encoder=encoder)
+        return _models[key]
+
+
+def site_inputs(rainfall, snowfall, wind_speed, temperature, elevation,
+                fracture_spacing, fracture_orientation, slope_angle, rock_type, site=None):
+    """
+    Raw training column values (numeric readings and categories) for the dashboard inputs.
+
+    Snowfall is converted from cm to mm and fracture spacing (cm) to a density
+    in fractures per metre. Fracture orientation is not a training feature.
+    `site` overrides DEFAULT_SITE; rock types the model never saw (Limestone,
+    Basalt) leave every Rock_Type column at 0 once encoded.
+    """
+    site = {**DEFAULT_SITE, "Lithology": ROCK_LITHOLOGY.get(rock_type, "Sedimentary"), **(site or {})}
+    return {
+        **site,
+        "Elevation": elevation,
+        "Slope": slope_angle,
+        "Rainfall_mm": rainfall,
+        "Snow_mm": snowfall * 10,
+        "Temperature_C": temperature,
+        "Wind_speed_kmh": wind_speed,
+        "Fracture_Density": 100 / fracture_spacing if fracture_spacing > 0 else 100.0,
+        "Rock_Type": rock_type
+    }
+
+
+def site_features(*args, encoder=FEATURE_ENCODER, **kwargs):
+    """One encoded float32 feature row for site_inputs() arguments."""
+    return encoder.encode_row(site_inputs(*args, **kwargs))
+
+
+def feature_matrix(rows):
+    """(n, n_features) float32 matrix from site_features() rows."""
+    return np.vstack(rows) if rows else np.empty((0, len(FEATURE_NAMES)), dtype=np.float32)
+
+
+def model_risk_level(risk_percentage):
+    """Same 25/50/75 boundaries as calculate_risk."""
+    if risk_percentage >= 75:
+        return "CRITICAL"
+    if risk_percentage >= 50:
+        return "HIGH"
+    if risk_percentage >= 25:
+        return "MODERATE"
+    return "LOW"
+
+
+def predict_risk(rainfall, snowfall, wind_speed, temperature, elevation,
+                 fracture_spacing, fracture_orientation, slope_angle, rock_type, image_analysis,
+                 site=None, model=None):
+    """
+    Model-backed counterpart of calculate_risk with the same arguments and return shape.
+
+    The risk percentage is the model's rockfall-event probability p and the
+    confidence is the probability of the more likely class, max(p, 1 - p)
+    as a percentage (for forests, of the tree-averaged probability). For
+    forests the contributions are the model's own path attributions: signed
+    percentage points of risk per input (INPUT_LABELS), relative to the
+    forest's base rate. Other models fall back to the heuristic contributions.
+    """
+    model = model or load_model()
+    features = model.encoder.encode_row(site_inputs(
+        rainfall, snowfall, wind_speed, temperature, elevation,
+        fracture_spacing, fracture_orientation, slope_angle, rock_type, site
+    ))[None, :]
+    probability = float(model.predict_proba(features)[0])
+    risk_percentage = probability * 100
+    confidence = round(max(probability, 1 - probability) * 100)
+
+    if model.explains:
+        _, contributions = model.explain(features)
+        contributions = {
+            INPUT_LABELS.get(name, name): float(value) * 100
+            for name, value in zip(model.encoder.inputs, contributions[0])
+        }
+        return risk_percentage, model_risk_level(risk_percentage), confidence, contributions
+
+    _, _, _, contributions = calculate_risk(
+        rainfall, snowfall, wind_speed, temperature, elevation,
+        fracture_spacing, fracture_orientation, slope_angle, rock_type, image_analysis
+    )
+    return risk_percentage, model_risk_level(risk_percentage), confidence, contributions
@@ -0,0 +1,303 @@
+"""
+Tiled, parallel analysis of large orthomosaics into a georeferenced risk grid.
+
+Drone orthomosaics are 20k x 20k pixels and more, far too large to decode
+whole. analyze_orthomosaic() cuts the raster into square grid cells of
+`cell` source pixels, reads each cell through a windowed reader, block-averages
+it to at most `max_pixels` and scores it with rockfall.imaging, so every cell
+gets its own slope_steepness / rock_fractures / vegetation_cover /
+rock_type_confidence / erosion_signs. Cells are analyzed in a process pool with
+a bounded number of cells in flight; each worker opens the raster once and
+reads only its cells, so peak memory depends on the cell size and the worker
+count, not on the image size.
+
+Readers:
+- NumPy .npy (h, w, 3|4) arrays and uncompressed TIFF/GeoTIFF files are
+  memory-mapped directly;
+- anything else (compressed or tiled GeoTIFF, JPEG2000, ...) needs rasterio,
+  which reads windows natively and is used when installed.
+
+Cells whose pixels are mostly nodata (all-zero, as around an orthomosaic's
+footprint) get NaN scores and are left unscored by score_grid().
+The grid is georeferenced with a GDAL-style geotransform (c, a, b, f, d, e:
+x = c + a * col + b * row, y = f + d * col + e * row) taken from rasterio,
+GeoTIFF tags or a world file (.tfw/.wld next to the image); without one the
+coordinates are pixel coordinates. grid_table() flattens a grid into one row
+per cell with map coordinates, and score_grid() runs the batch risk scorer on
+it. analyze_orthomosaic.py is the command-line front end.
+"""
+
+import importlib.util
+import math
+import mmap
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+import numpy as np
+from PIL import TiffImagePlugin
+
+from .batch import calculate_risk_batch, risk_level_names
+from .engine import IMAGE_ANALYSIS_KEYS
+from .imaging import TILE_PIXELS, summarize_tiles, tile_features
+
+# Grid cell side in source pixels
+DEFAULT_CELL_PIXELS = 1024
+
+# Each cell is block-averaged to at most this many pixels before analysis
+DEFAULT_CELL_ANALYSIS_PIXELS = 1 << 18
+
+# Cells with more than this share of all-zero pixels are nodata
+NODATA_SHARE = 0.5
+
+# Cells in flight per worker; bounds memory and keeps every worker busy
+_CELLS_PER_WORKER = 2
+
+# GeoTIFF ModelPixelScale and ModelTiepoint tags
+_PIXEL_SCALE_TAG = 33550
+_TIEPOINT_TAG = 33922
+
+# Pixel-coordinate geotransform used when the image has no georeferencing
+IDENTITY_TRANSFORM = (0.0, 1.0, 0.0, 0.0, 0.0, 1.0)
+
+
+class OrthomosaicError(ValueError):
+    """Raised for rasters that cannot be read window by window."""
+
+
+def _world_file_transform(path):
+    # World file (image.tfw for image.tif, or image.wld): a, d, b, e and the
+    # centre (C, F) of the upper-left pixel
+    suffix = path.suffix
+    candidates = [path.with_suffix(suffix[:2] + suffix[-1] + "w")] if len(suffix) >= 3 else []
+    for world in candidates + [path.with_suffix(".wld")]:
+        if world.is_file():
+            a, d, b, e, c, f = (float(value) for value in world.read_text().split()[:6])
+            return (c - a / 2 - b / 2, a, b, f - d / 2 - e / 2, d, e)
+    return None
+
+
+class _MemmapRaster:
+    """
+    Memory-mapped NumPy array or uncompressed, top-down, interleaved TIFF.
+
+    Each read copies its window out of the mapping and then releases the
+    mapped pages, so a worker's resident memory stays at one window however
+    much of the file it has read.
+    """
+
+    def __init__(self, path):
+        self.crs = None
+        self.transform = None
+        if path.suffix.lower() == ".npy":
+            with open(path, "rb") as header:
+                version = np.lib.format.read_magic(header)
+                read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                               else np.lib.format.read_array_header_2_0)
+                shape, fortran_order, dtype = read_header(header)
+                offset = header.tell()
+            if fortran_order or dtype != np.uint8:
+                raise OrthomosaicError(f"{path.name}: expected a C-ordered uint8 array, got {dtype}")
+        else:
+            try:
+                # Opened directly, not through Image.open: only the header is read, and
+                # Image.open would refuse huge images as decompression bombs
+                image = TiffImagePlugin.TiffImageFile(path)
+            except (OSError, SyntaxError):
+                raise OrthomosaicError(
+                    f"{path.name} is neither a .npy array nor a TIFF; install rasterio for other formats"
+                ) from None
+            with image:
+                tiles = image.tile
+                if (image.mode not in ("RGB", "RGBA") or len(tiles) != 1
+                        or tiles[0][0] != "raw" or tuple(tiles[0][1]) != (0, 0, *image.size)
+                        or tiles[0][3][0] != image.mode or tiles[0][3][1:] not in ((0, 1), (0,))):
+                    raise OrthomosaicError(
+                        f"{path.name} cannot be memory-mapped (only .npy and uncompressed TIFFs can); "
+                        "install rasterio for windowed reads of other formats"
+                    )
+                scale, tiepoint = image.tag_v2.get(_PIXEL_SCALE_TAG), image.tag_v2.get(_TIEPOINT_TAG)
+                if scale and tiepoint:
+                    column, row, _, x, y, _ = tiepoint[:6]
+                    self.transform = (x - column * scale[0], scale[0], 0.0, y + row * scale[1], 0.0, -scale[1])
+                width, height = image.size
+                shape, offset = (height, width, len(image.mode)), tiles[0][2]
+        if len(shape) != 3 or shape[2] not in (3, 4):
+            raise OrthomosaicError(f"{path.name}: expected an (h, w, 3) or (h, w, 4) image, got {shape}")
+
+        with open(path, "rb") as raster:
+            self._map = mmap.mmap(raster.fileno(), 0, access=mmap.ACCESS_READ)
+        self.pixels = np.ndarray(shape, dtype=np.uint8, buffer=self._map, offset=offset)
+        self.height, self.width = shape[:2]
+        self.transform = self.transform or _world_file_transform(path)
+
+    def read(self, row, col, height, width):
+        window = np.array(self.pixels[row:row + height, col:col + width, :3])
+        if hasattr(mmap, "MADV_DONTNEED"):
+            # Clean file-backed pages: dropping them only unmaps them (the page cache keeps them)
+            self._map.madvise(mmap.MADV_DONTNEED)
+        return window
+
+
+class _RasterioRaster:
+    """Any raster rasterio reads, through windowed reads of bands 1-3."""
+
+    def __init__(self, path):
+        import rasterio
+        from rasterio.windows import Window
+        self._window = Window
+        self._dataset = rasterio.open(path)
+        if self._dataset.count < 3:
+            raise OrthomosaicError(f"{path.name}: expected at least 3 bands (RGB), got {self._dataset.count}")
+        self.height, self.width = self._dataset.height, self._dataset.width
+        self.crs = self._dataset.crs.to_string() if self._dataset.crs else None
+        transform = self._dataset.transform
+        self.transform = None if transform.is_identity else tuple(transform.to_gdal())
+
+    def read(self, row, col, height, width):
+        return np.moveaxis(self._dataset.read((1, 2, 3), window=self._window(col, row, width, height)), 0, -1)
+
+
+def open_raster(path):
+    """A windowed reader for `path`: memory-mapped when possible, else through rasterio."""
+    path = Path(path)
+    try:
+        return _MemmapRaster(path)
+    except OrthomosaicError:
+        if importlib.util.find_spec("rasterio") is None:
+            raise
+    return _RasterioRaster(path)
+
+
+# Readers opened by this process, so every cell a worker analyzes reuses one
+# reader; keyed by modification time too, so a rewritten file is reopened
+_rasters = {}
+
+
+def _raster(path):
+    key = (path, os.stat(path).st_mtime_ns)
+    if key not in _rasters:
+        _rasters[key] = open_raster(path)
+    return _rasters[key]
+
+
+def _block_mean(pixels, factor):
+    if factor == 1:
+        return pixels.astype(np.float32)
+    height, width = pixels.shape[0] // factor * factor, pixels.shape[1] // factor * factor
+    blocks = pixels[:height, :width].reshape(height // factor, factor, width // factor, factor, pixels.shape[2])
+    return blocks.mean(axis=(1, 3), dtype=np.float32)
+
+
+def analyze_cell(path, row, col, height, width, max_pixels=DEFAULT_CELL_ANALYSIS_PIXELS):
+    """(scores or None, valid pixel share) of one window of the raster at `path`."""
+    pixels = _raster(str(path)).read(row, col, height, width)
+    valid = float(np.any(pixels != 0, axis=2).mean())
+    factor = max(1, math.ceil(math.sqrt(height * width / max_pixels)))
+    if valid < 1 - NODATA_SHARE or min(height, width) // factor < TILE_PIXELS + 2:
+        return None, valid
+    rgb = _block_mean(pixels, factor)
+    rgb *= 1 / (np.iinfo(pixels.dtype).max if pixels.dtype.kind in "ui" else 1)
+    return summarize_tiles(tile_features(rgb)), valid
+
+
+def _cells(height, width, cell):
+    for row in range(0, height, cell):
+        for col in range(0, width, cell):
+            yield row // cell, col // cell, (row, col, min(cell, height - row), min(cell, width - col))
+
+
+def _run_cells(path, cells, max_pixels, workers):
+    """Yield (grid row, grid col, result) for every cell, with at most workers * _CELLS_PER_WORKER in flight."""
+    if workers == 1:
+        for grid_row, grid_col, window in cells:
+            yield grid_row, grid_col, analyze_cell(path, *window, max_pixels)
+        return
+    cells = iter(cells)
+    pending = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            for grid_row, grid_col, window in cells:
+                pending[pool.submit(analyze_cell, path, *window, max_pixels)] = (grid_row, grid_col)
+                if len(pending) >= workers * _CELLS_PER_WORKER:
+                    break
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield (*pending.pop(future), future.result())
+
+
+def analyze_orthomosaic(path, cell=DEFAULT_CELL_PIXELS, max_pixels=DEFAULT_CELL_ANALYSIS_PIXELS, workers=None,
+                        progress=None):
+    """
+    Per-cell image analysis of a large raster.
+
+    Returns a dict with one (rows, cols) float32 grid per IMAGE_ANALYSIS_KEYS
+    key (NaN for nodata cells) plus "valid" (share of non-nodata pixels), and
+    "width", "height", "cell", "transform" (the image's geotransform, or None),
+    "cell_transform" (the geotransform of the grid itself) and "crs".
+    `progress`, when given, is called with (cells done, total cells).
+    """
+    raster = open_raster(path)
+    rows, cols = math.ceil(raster.height / cell), math.ceil(raster.width / cell)
+    workers = workers or min(os.cpu_count() or 1, rows * cols)
+    grid = {key: np.full((rows, cols), np.nan, dtype=np.float32) for key in (*IMAGE_ANALYSIS_KEYS, "valid")}
+
+    for done, (grid_row, grid_col, (scores, valid)) in enumerate(
+            _run_cells(str(path), _cells(raster.height, raster.width, cell), max_pixels, workers), 1):
+        grid["valid"][grid_row, grid_col] = valid
+        for key, value in (scores or {}).items():
+            grid[key][grid_row, grid_col] = value
+        if progress is not None:
+            progress(done, rows * cols)
+
+    c, a, b, f, d, e = raster.transform or IDENTITY_TRANSFORM
+    grid.update(width=raster.width, height=raster.height, cell=cell, crs=raster.crs, transform=raster.transform,
+                cell_transform=(c, a * cell, b * cell, f, d * cell, e * cell))
+    return grid
+
+
+def grid_table(grid):
+    """
+    One row per grid cell: grid_row, grid_col, the cell centre's map
+    coordinates x and y, its pixel window and every grid value.
+    """
+    rows, cols = grid["valid"].shape
+    grid_row, grid_col = (index.ravel() for index in np.indices((rows, cols)))
+    cell = grid["cell"]
+    pixel_row = grid_row * cell
+    pixel_col = grid_col * cell
+    # Centre of each (possibly clipped) cell, in pixels
+    centre_row = (pixel_row + np.minimum(pixel_row + cell, grid["height"])) / 2
+    centre_col = (pixel_col + np.minimum(pixel_col + cell, grid["width"])) / 2
+    c, a, b, f, d, e = grid["transform"] or IDENTITY_TRANSFORM
+    return {
+        "grid_row": grid_row,
+        "grid_col": grid_col,
+        "x": c + a * centre_col + b * centre_row,
+        "y": f + d * centre_col + e * centre_row,
+        "pixel_row": pixel_row,
+        "pixel_col": pixel_col,
+        **{key: grid[key].ravel() for key in (*IMAGE_ANALYSIS_KEYS, "valid")}
+    }
+
+
+def score_grid(table, site):
+    """
+    Add risk_percentage, risk_level and confidence columns to a grid_table(),
+    scoring every cell with calculate_risk_batch under the site conditions
+    `site` (calculate_risk's arguments; scalars apply to every cell). Nodata
+    cells get NaN risk_percentage and confidence and an empty risk_level.
+    """
+    risk_percentage, risk_level_codes, confidence, _ = calculate_risk_batch({**site, **{
+        key: table[key] for key in IMAGE_ANALYSIS_KEYS
+    }})
+    # Outside the footprint there is no slope to score, not a slope without an image
+    nodata = np.isnan(table[IMAGE_ANALYSIS_KEYS[0]])
+    risk_percentage[nodata] = np.nan
+    risk_level = risk_level_names(risk_level_codes)
+    risk_level[nodata] = ""
+    confidence = confidence.astype(np.float64)
+    confidence[nodata] = np.nan
+    return {**table, "risk_percentage": risk_percentage, "risk_level": risk_level, "confidence": confidence}
@@ -0,0 +1,116 @@
+"""
+Wall-time and peak memory (RSS) measurement for pipeline stages.
+
+On Linux the kernel's peak RSS counter (VmHWM) is reset at the start of each
+stage, so every stage reports its own peak. Elsewhere the lifetime peak from
+getrusage is reported instead, and on platforms without the resource module
+memory is simply not reported.
+"""
+
+import contextlib
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_STATUS = "/proc/self/status"
+_SMAPS_ROLLUP = "/proc/self/smaps_rollup"
+_CLEAR_REFS = "/proc/self/clear_refs"
+
+
+def _status_kb(field):
+    try:
+        with open(_STATUS) as status:
+            for line in status:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def current_rss():
+    """Resident set size in bytes, or None when unavailable."""
+    kb = _status_kb("VmRSS")
+    return kb * 1024 if kb is not None else None
+
+
+def memory_usage():
+    """
+    RSS, PSS and shared bytes of this process (None where unavailable).
+
+    PSS (proportional set size) splits shared pages between the processes
+    mapping them, so summing it over workers gives their real footprint.
+    """
+    usage = {"rss_bytes": current_rss(), "pss_bytes": None, "shared_bytes": None}
+    try:
+        with open(_SMAPS_ROLLUP) as rollup:
+            fields = dict(line.split(":", 1) for line in rollup if ":" in line)
+    except OSError:
+        return usage
+    kb = {name: int(value.split()[0]) for name, value in fields.items() if value.strip().endswith("kB")}
+    usage["pss_bytes"] = kb.get("Pss", 0) * 1024
+    usage["shared_bytes"] = (kb.get("Shared_Clean", 0) + kb.get("Shared_Dirty", 0)) * 1024
+    return usage
+
+
+def peak_rss():
+    """Peak resident set size in bytes since the last reset_peak_rss(), or None."""
+    kb = _status_kb("VmHWM")
+    if kb is not None:
+        return kb * 1024
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def reset_peak_rss():
+    """Reset the peak RSS counter to the current RSS; returns False where that is unsupported."""
+    try:
+        with open(_CLEAR_REFS, "w") as clear_refs:
+            clear_refs.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class StageReport:
+    """Collects wall time and peak RSS per named stage."""
+
+    def __init__(self):
+        self.stages = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        per_stage = reset_peak_rss()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append({
+                "stage": name,
+                "seconds": time.perf_counter() - start,
+                "peak_rss_bytes": peak_rss(),
+                "peak_is_per_stage": per_stage
+            })
+
+    def as_dict(self):
+        return {"stages": list(self.stages), "total_seconds": sum(stage["seconds"] for stage in self.stages)}
+
+    def format(self):
+        lines = [f"{'stage':<14} {'wall time':>10} {'peak RSS':>11}"]
+        for stage in self.stages:
+            peak = stage["peak_rss_bytes"]
+            peak_text = f"{peak / 2 ** 20:,.1f} MiB" if peak is not None else "n/a"
+            if peak is not None and not stage["peak_is_per_stage"]:
+                peak_text += "*"
+            lines.append(f"{stage['stage']:<14} {stage['seconds']:>8.2f} s {peak_text:>11}")
+        lines.append(f"{'total':<14} {self.as_dict()['total_seconds']:>8.2f} s")
+        if any(not stage["peak_is_per_stage"] for stage in self.stages):
+            lines.append("* peak since process start (per-stage reset unsupported here)")
+        return "\n".join(lines)
@@ -0,0 +1,228 @@
+"""
+Versioned model registry with memory-mapped loading and hot-swap.
+
+Every published model is an immutable version directory (v0001, v0002, ...)
+holding metadata.json (feature schema, metrics, training data hash, ...) and
+the model itself. Forests are stored as their compiled node arrays, one
+uncompressed .npy file each, and loaded with mmap_mode="r": no unpickling, no
+scikit-learn import, and every worker process maps the same page cache pages
+instead of holding a private copy of the forest. Other estimators fall back to
+a pickle.
+
+The ACTIVE file names the version being served. activate() replaces it
+atomically, and ModelRegistry.current() notices the change within
+POLL_SECONDS and swaps the new model in without a restart; requests already
+holding the previous model finish with it.
+
+The registry location comes from ROCKFALL_MODEL_REGISTRY (default
+model/registry); manage_models.py is the command-line front end.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+from .features import FeatureEncoder
+from .forest import CompiledForest, compile_forest
+from .model import FEATURE_ENCODER, MODEL_PATH, ModelSchemaError, RockfallModel, check_feature_names, load_model
+
+REGISTRY_PATH = Path(os.environ.get("ROCKFALL_MODEL_REGISTRY", MODEL_PATH.parent / "registry"))
+
+# How often current() re-reads the ACTIVE pointer
+POLL_SECONDS = float(os.environ.get("ROCKFALL_REGISTRY_POLL", 5))
+
+ACTIVE_FILE = "ACTIVE"
+METADATA_FILE = "metadata.json"
+PICKLE_FILE = "estimator.pkl"
+
+# Block size used to hash training data
+_HASH_BLOCK_BYTES = 1 << 20
+
+
+class RegistryError(ValueError):
+    """Raised for unknown versions or an empty registry."""
+
+
+def file_sha256(path):
+    """Hex SHA-256 of a file, read in blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as data:
+        while block := data.read(_HASH_BLOCK_BYTES):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _json_safe(metrics):
+    # Keep what JSON can hold (the text classification report included)
+    return {name: value for name, value in (metrics or {}).items()
+            if isinstance(value, (str, int, float, bool, list, dict, type(None)))}
+
+
+class ModelRegistry:
+    """A registry directory: publish, list, activate and load model versions."""
+
+    def __init__(self, root=REGISTRY_PATH, poll_seconds=POLL_SECONDS):
+        self.root = Path(root)
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._current = None        # (version, RockfallModel)
+        self._checked_at = None
+
+    def versions(self):
+        """Published versions, oldest first."""
+        if not self.root.is_dir():
+            return []
+        return sorted(path.name for path in self.root.glob("v[0-9]*") if (path / METADATA_FILE).is_file())
+
+    def metadata(self, version):
+        path = self.root / version / METADATA_FILE
+        if not path.is_file():
+            raise RegistryError(f"unknown model version '{version}' in {self.root}")
+        return json.loads(path.read_text())
+
+    def active_version(self):
+        """The version named by the ACTIVE file, or None."""
+        try:
+            return (self.root / ACTIVE_FILE).read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def publish(self, estimator, metrics=None, data_path=None, activate=False, note=None,
+                encoder=FEATURE_ENCODER):
+        """
+        Store a fitted estimator and its feature schema as the next version
+        and return its name.
+
+        The version directory is written under a temporary name and renamed
+        into place, so readers never see a partial version.
+        """
+        check_feature_names(estimator, encoder)
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(dir=self.root, prefix=".staging-"))
+        try:
+            metadata = {
+                "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                "estimator": type(estimator).__name__,
+                "feature_names": list(encoder.feature_names),
+                "feature_schema": encoder.to_dict(),
+                "classes": np.asarray(estimator.classes_).tolist(),
+                "metrics": _json_safe(metrics),
+                "data_path": str(data_path) if data_path is not None else None,
+                "data_sha256": file_sha256(data_path) if data_path is not None else None,
+                "note": note
+            }
+            if hasattr(estimator, "estimators_"):
+                forest = compile_forest(estimator)
+                arrays = {**forest.arrays(), **forest.traversal_arrays()}
+                for name, array in arrays.items():
+                    np.save(staging / f"{name}.npy", np.ascontiguousarray(array))
+                metadata.update(format="arrays", arrays=sorted(arrays), n_trees=forest.n_trees,
+                                max_depth=forest.max_depth, nbytes=int(sum(a.nbytes for a in arrays.values())))
+            else:
+                joblib.dump(estimator, staging / PICKLE_FILE)
+                metadata.update(format="pickle")
+
+            with self._lock:
+                existing = self.versions()
+                version = f"v{int(existing[-1][1:]) + 1 if existing else 1:04d}"
+                metadata["version"] = version
+                (staging / METADATA_FILE).write_text(json.dumps(metadata, indent=2))
+                staging.rename(self.root / version)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        """Atomically point ACTIVE at `version`; serving processes pick it up on their next poll."""
+        self.metadata(version)  # fail on unknown versions
+        descriptor, temporary = tempfile.mkstemp(dir=self.root, prefix=".active-")
+        with os.fdopen(descriptor, "w") as pointer:
+            pointer.write(version + "\n")
+        os.replace(temporary, self.root / ACTIVE_FILE)
+
+    def load(self, version=None, mmap=True):
+        """
+        A RockfallModel for `version` (default: the active one).
+
+        Array-format forests are memory-mapped read-only unless mmap is False.
+        """
+        version = version or self.active_version()
+        if version is None:
+            raise RegistryError(f"no active model version in {self.root}")
+        metadata = self.metadata(version)
+        try:
+            encoder = FeatureEncoder.from_dict(metadata["feature_schema"])
+        except (KeyError, ValueError) as error:
+            raise ModelSchemaError(f"model version {version} has no usable feature schema: {error}") from None
+        if tuple(metadata["feature_names"]) != encoder.feature_names:
+            raise ModelSchemaError(f"model version {version}: feature names do not match its feature schema")
+
+        directory = self.root / version
+        start = time.perf_counter()
+        if metadata["format"] == "arrays":
+            arrays = {name: np.load(directory / f"{name}.npy", mmap_mode="r" if mmap else None)
+                      for name in metadata["arrays"]}
+            forest = CompiledForest(**arrays, max_depth=metadata["max_depth"],
+                                    classes=metadata["classes"], feature_names=metadata["feature_names"])
+            return RockfallModel(None, directory, time.perf_counter() - start, forest=forest, version=version,
+                                 encoder=encoder)
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            estimator = joblib.load(directory / PICKLE_FILE)
+        check_feature_names(estimator, encoder)
+        messages = list(dict.fromkeys(str(warning.message).splitlines()[0] for warning in caught))
+        return RockfallModel(estimator, directory, time.perf_counter() - start, messages, version=version,
+                             encoder=encoder)
+
+    def current(self):
+        """
+        The served model, reloaded when ACTIVE changes.
+
+        The pointer is re-read at most every poll_seconds. A swap replaces one
+        reference, so callers already holding the previous model keep using it.
+        """
+        now = time.monotonic()
+        if self._current is not None and now - self._checked_at < self.poll_seconds:
+            return self._current[1]
+        with self._lock:
+            if self._current is None or now - self._checked_at >= self.poll_seconds:
+                version = self.active_version()
+                if self._current is None or self._current[0] != version:
+                    self._current = (version, self.load(version))
+                self._checked_at = now
+            return self._current[1]
+
+
+_registries = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(root=REGISTRY_PATH):
+    """The process-wide ModelRegistry for `root`."""
+    key = Path(root).resolve()
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = ModelRegistry(key)
+        return _registries[key]
+
+
+def serving_model(root=REGISTRY_PATH):
+    """The registry's active model, or the model/rockfall_model.pkl pickle when nothing is active."""
+    registry = get_registry(root)
+    if registry.active_version() is None:
+        return load_model()
+    return registry.current()
@@ -0,0 +1,66 @@
+"""
+Vectorized sensitivity sweeps over the rockfall risk model.
+
+Every sweep is flattened into one calculate_risk_batch call, so raising the
+resolution of the dashboard heat maps costs almost nothing extra.
+"""
+
+import numpy as np
+
+from .batch import calculate_risk_batch
+
+# Parameters shown in the "Parameter Sensitivity" heat map: (label, input column)
+SENSITIVITY_PARAMETERS = (
+    ("Rainfall", "rainfall"),
+    ("Snowfall", "snowfall"),
+    ("Wind Speed", "wind_speed"),
+    ("Temperature", "temperature"),
+    ("Elevation", "elevation"),
+    ("Fracture Spacing", "fracture_spacing"),
+    ("Slope Angle", "slope_angle")
+)
+
+
+def _risk(columns):
+    risk_percentage, _, _, _ = calculate_risk_batch(columns)
+    return risk_percentage
+
+
+def sweep_factors(base, factors, parameters=None):
+    """
+    Risk with each parameter scaled by each variation factor, one at a time.
+
+    `base` maps calculate_risk_batch input columns (and optional image analysis
+    keys) to scalar values. `parameters` defaults to the columns in
+    SENSITIVITY_PARAMETERS; other columns broadcast from `base`. Returns a
+    (len(parameters), len(factors)) array.
+    """
+    if parameters is None:
+        parameters = [column for _, column in SENSITIVITY_PARAMETERS]
+    factors = np.asarray(factors, dtype=np.float64)
+    rows = len(parameters) * len(factors)
+
+    columns = dict(base)
+    for i, name in enumerate(parameters):
+        values = np.full(rows, base[name], dtype=np.float64)
+        values[i * len(factors):(i + 1) * len(factors)] *= factors
+        columns[name] = values
+
+    return _risk(columns).reshape(len(parameters), len(factors))
+
+
+def interaction_map(base, x_parameter, x_values, y_parameter, y_values):
+    """
+    Risk over a grid of two parameters with everything else held at `base`.
+
+    Returns a (len(y_values), len(x_values)) array, ready for a heat map with
+    x_values along the columns.
+    """
+    x_values = np.asarray(x_values, dtype=np.float64)
+    y_values = np.asarray(y_values, dtype=np.float64)
+
+    columns = dict(base)
+    columns[x_parameter] = np.tile(x_values, len(y_values))
+    columns[y_parameter] = np.repeat(y_values, len(x_values))
+
+    return _risk(columns).reshape(len(y_values), len(x_values))
@@ -0,0 +1,301 @@
+"""
+HTTP scoring service for the rockfall risk engine.
+
+Endpoints:
+    GET  /health       -> liveness probe
+    GET  /cache/stats  -> hit/miss/eviction counters of this worker's assessment caches
+    GET  /model        -> served model version, load/prediction latency and this worker's RSS/PSS
+    POST /score        -> one site (JSON object), scored with the cached calculate_risk
+    POST /score/batch  -> many sites (JSON rows or CSV), scored with calculate_risk_batch
+    POST /score/model  -> one site scored with the served model (optional "site" object
+                          overriding DEFAULT_SITE); forests return their path attributions
+                          as contributions; follows registry hot-swaps
+
+Each site uses calculate_risk's argument names as fields. Image analysis values
+may be given as a nested "image_analysis" object or as flat columns named after
+IMAGE_INPUT_KEYS. Batch responses are column-oriented JSON, or CSV when the
+request sends `Accept: text/csv`.
+
+Run with gunicorn (see gunicorn.conf.py, which preloads the app once per master):
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import csv
+import io
+
+import numpy as np
+from flask import Flask, Response, jsonify, request
+
+from .batch import CONTRIBUTION_LABELS, INPUT_COLUMNS, calculate_risk_batch
+from .cache import cache_stats, cached_calculate_risk, cached_determine_mining_feasibility
+from .engine import IMAGE_INPUT_KEYS, RISK_LEVELS, determine_mining_feasibility
+from .model import CATEGORICAL_FEATURES, DEFAULT_SITE, ModelSchemaError, predict_risk
+from .profiling import memory_usage
+from .registry import RegistryError, serving_model
+
+NUMERIC_COLUMNS = tuple(name for name in INPUT_COLUMNS if name != "rock_type")
+
+# Fields a /score/model "site" object may override: DEFAULT_SITE plus the lithology
+# (the rock type comes from the top-level "rock_type" field)
+SITE_FIELDS = tuple(DEFAULT_SITE) + ("Lithology",)
+
+# Largest batch accepted per request
+MAX_BATCH_ROWS = 100_000
+
+
+class ScoringInputError(ValueError):
+    """Raised when a request body cannot be turned into engine inputs."""
+
+
+def _number(row, name):
+    if name not in row:
+        raise ScoringInputError(f"missing field '{name}'")
+    value = row[name]
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ScoringInputError(f"field '{name}' must be a number, got {value!r}") from None
+    return value
+
+
+def _row_image_analysis(row):
+    image_analysis = row.get("image_analysis")
+    if image_analysis is None:
+        image_analysis = {key: row[key] for key in IMAGE_INPUT_KEYS if row.get(key) not in (None, "")}
+    if not isinstance(image_analysis, dict):
+        raise ScoringInputError("field 'image_analysis' must be an object")
+    return {key: _number(image_analysis, key) for key in image_analysis}
+
+
+def _site(row):
+    site = row.get("site")
+    if site is None:
+        return {}
+    if not isinstance(site, dict):
+        raise ScoringInputError("field 'site' must be an object")
+    unknown = [name for name in site if name not in SITE_FIELDS]
+    if unknown:
+        raise ScoringInputError(f"unknown site field(s) {', '.join(map(repr, unknown))}; "
+                                f"expected some of {', '.join(SITE_FIELDS)}")
+    checked = {}
+    for name, value in site.items():
+        if name in CATEGORICAL_FEATURES:
+            if value not in CATEGORICAL_FEATURES[name]:
+                raise ScoringInputError(f"site field '{name}' must be one of "
+                                        f"{', '.join(CATEGORICAL_FEATURES[name])}, got {value!r}")
+            checked[name] = value
+        else:
+            checked[name] = _number(site, name)
+    return checked
+
+
+def score_site(row):
+    """Score one site dict with calculate_risk and attach mining feasibility."""
+    if not isinstance(row, dict):
+        raise ScoringInputError("request body must be a JSON object")
+    if "rock_type" not in row:
+        raise ScoringInputError("missing field 'rock_type'")
+
+    risk_percentage, risk_level, confidence, contributions = cached_calculate_risk(
+        *(_number(row, name) for name in NUMERIC_COLUMNS),
+        str(row["rock_type"]),
+        _row_image_analysis(row)
+    )
+    feasibility_status, recommendation, _ = cached_determine_mining_feasibility(
+        risk_level, risk_percentage, confidence
+    )
+    return {
+        "risk_percentage": risk_percentage,
+        "risk_level": risk_level,
+        "confidence": confidence,
+        "contributions": contributions,
+        "mining_feasibility": feasibility_status,
+        "recommendation": recommendation
+    }
+
+
+def score_site_model(row, model):
+    """Score one site dict with the model; calculate_risk's fields plus an optional "site" object."""
+    if not isinstance(row, dict):
+        raise ScoringInputError("request body must be a JSON object")
+    if "rock_type" not in row:
+        raise ScoringInputError("missing field 'rock_type'")
+    site = _site(row)
+
+    risk_percentage, risk_level, confidence, contributions = predict_risk(
+        *(_number(row, name) for name in NUMERIC_COLUMNS),
+        str(row["rock_type"]),
+        _row_image_analysis(row),
+        site=site,
+        model=model
+    )
+    return {
+        "risk_percentage": risk_percentage,
+        "risk_level": risk_level,
+        "confidence": confidence,
+        "contributions": contributions,
+        "model_version": model.version
+    }
+
+
+def _columns_from_rows(rows):
+    """Turn a list of site dicts (JSON) or CSV records into calculate_risk_batch columns."""
+    columns = {}
+    for name in INPUT_COLUMNS:
+        try:
+            values = [row[name] for row in rows]
+        except KeyError:
+            raise ScoringInputError(f"missing field '{name}'") from None
+        if name == "rock_type":
+            columns[name] = np.array([str(value) for value in values])
+            continue
+        try:
+            columns[name] = np.array(values, dtype=np.float64)
+        except (TypeError, ValueError) as exc:
+            raise ScoringInputError(f"invalid value for '{name}': {exc}") from None
+        if np.isnan(columns[name]).any():
+            raise ScoringInputError(f"field '{name}' must be a number in every row")
+
+    nested = [{} if row.get("image_analysis") is None else row["image_analysis"] for row in rows]
+    if not all(isinstance(image, dict) for image in nested):
+        raise ScoringInputError("field 'image_analysis' must be an object")
+    for key in IMAGE_INPUT_KEYS:
+        values = [image.get(key, row.get(key)) for row, image in zip(rows, nested)]
+        if any(value not in (None, "") for value in values):
+            try:
+                columns[key] = np.array(
+                    [np.nan if value in (None, "") else value for value in values], dtype=np.float64
+                )
+            except (TypeError, ValueError) as exc:
+                raise ScoringInputError(f"invalid value for '{key}': {exc}") from None
+    return columns
+
+
+def _read_batch():
+    if request.mimetype == "text/csv":
+        reader = csv.DictReader(io.StringIO(request.get_data(as_text=True)))
+        return list(reader)
+    body = request.get_json(silent=True)
+    if isinstance(body, dict):
+        body = body.get("rows")
+    if not isinstance(body, list) or not all(isinstance(row, dict) for row in body):
+        raise ScoringInputError("batch body must be CSV or a JSON list of objects (optionally under 'rows')")
+    return body
+
+
+# Mining feasibility per (risk level code, confidence >= 70), wrapping
+# determine_mining_feasibility so the batch path cannot drift from it
+_FEASIBILITY = {
+    (code, high_confidence): determine_mining_feasibility(level, 0, 70 if high_confidence else 0)[0]
+    for code, level in enumerate(RISK_LEVELS)
+    for high_confidence in (False, True)
+}
+
+
+def score_batch(columns):
+    """Score calculate_risk_batch columns and return column-oriented results."""
+    risk_percentage, risk_level_codes, confidence, contributions = calculate_risk_batch(columns)
+    feasibility = np.empty(len(risk_percentage), dtype=object)
+    high_confidence = confidence >= 70
+    for (code, high), status in _FEASIBILITY.items():
+        feasibility[(risk_level_codes == code) & (high_confidence == high)] = status
+    return {
+        "risk_percentage": risk_percentage,
+        "risk_level": np.asarray(RISK_LEVELS)[risk_level_codes],
+        "confidence": confidence,
+        "mining_feasibility": feasibility,
+        "contributions": contributions
+    }
+
+
+def _batch_json(results):
+    contributions = np.where(np.isnan(results["contributions"]), None, results["contributions"])
+    return {
+        "count": len(results["risk_percentage"]),
+        "risk_percentage": results["risk_percentage"].tolist(),
+        "risk_level": results["risk_level"].tolist(),
+        "confidence": results["confidence"].tolist(),
+        "mining_feasibility": results["mining_feasibility"].tolist(),
+        "contribution_labels": list(CONTRIBUTION_LABELS),
+        "contributions": contributions.tolist()
+    }
+
+
+def _batch_csv(results):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["risk_percentage", "risk_level", "confidence", "mining_feasibility", *CONTRIBUTION_LABELS])
+    rows = zip(
+        results["risk_percentage"].tolist(),
+        results["risk_level"].tolist(),
+        results["confidence"].tolist(),
+        results["mining_feasibility"].tolist(),
+        results["contributions"].tolist()
+    )
+    for *summary, contributions in rows:
+        # NaN (no image for this row) is written as an empty cell
+        writer.writerow([*summary, *("" if value != value else value for value in contributions)])
+    return buffer.getvalue()
+
+
+def create_app(max_batch_rows=MAX_BATCH_ROWS):
+    """Build the Flask app; everything heavy is imported and warmed here, once per process."""
+    app = Flask(__name__)
+    app.config["MAX_BATCH_ROWS"] = max_batch_rows
+
+    # Warm the NumPy code paths so the first request after fork is not slower
+    score_batch({**{name: [0.0] for name in NUMERIC_COLUMNS}, "rock_type": ["Granite"]})
+
+    @app.errorhandler(ScoringInputError)
+    def bad_input(error):
+        return jsonify(error=str(error)), 400
+
+    @app.get("/health")
+    def health():
+        return jsonify(status="ok")
+
+    @app.get("/cache/stats")
+    def cache_stats_endpoint():
+        return jsonify(cache_stats())
+
+    def model_or_503():
+        try:
+            return serving_model(), None
+        except (OSError, ModelSchemaError, RegistryError) as error:
+            return None, (jsonify(error=f"model unavailable: {error}"), 503)
+
+    @app.get("/model")
+    def model_endpoint():
+        model, failure = model_or_503()
+        if failure:
+            return failure
+        return jsonify(path=str(model.path), **model.latency_stats(), **memory_usage())
+
+    @app.post("/score/model")
+    def score_model():
+        model, failure = model_or_503()
+        if failure:
+            return failure
+        return jsonify(score_site_model(request.get_json(silent=True), model))
+
+    @app.post("/score")
+    def score():
+        body = request.get_json(silent=True)
+        if body is None:
+            raise ScoringInputError("request body must be a JSON object")
+        return jsonify(score_site(body))
+
+    @app.post("/score/batch")
+    def score_batch_endpoint():
+        rows = _read_batch()
+        if len(rows) > app.config["MAX_BATCH_ROWS"]:
+            return jsonify(error=f"batch too large: {len(rows)} rows (max {app.config['MAX_BATCH_ROWS']})"), 413
+        if not rows:
+            return jsonify(count=0)
+        results = score_batch(_columns_from_rows(rows))
+        if request.accept_mimetypes.best == "text/csv":
+            return Response(_batch_csv(results), mimetype="text/csv")
+        return jsonify(_batch_json(results))
+
+    return app
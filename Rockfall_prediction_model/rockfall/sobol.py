@@ -0,0 +1,227 @@
+"""
+Global variance-based (Sobol) sensitivity analysis of the rockfall risk model.
+
+Inputs are drawn from the distributions in rockfall.uncertainty and combined
+with Saltelli's scheme: two independent sample matrices A and B plus, for each
+varied input, A with that column taken from B. First-order indices use the
+Saltelli (2010) estimator and total-order indices Jansen's estimator.
+
+Samples are generated and scored in independent blocks, optionally across a
+process pool. Each block only returns a handful of running sums, so memory is
+bounded by the block size, and a time budget simply stops submitting blocks.
+"""
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from .batch import calculate_risk_batch
+from .engine import ROCK_FACTORS
+from .uncertainty import Choice, Uniform
+
+# Rows per block; each block costs (k + 2) model evaluations per row
+BLOCK_SIZE = 16_384
+
+# Blocks kept in flight per worker so the pool never starves
+_BLOCKS_PER_WORKER = 2
+
+
+def default_problem():
+    """Uniform distributions over the dashboard's input slider ranges, all rock types equally likely."""
+    return {
+        "rainfall": Uniform(0, 100),
+        "snowfall": Uniform(0, 50),
+        "wind_speed": Uniform(0, 100),
+        "temperature": Uniform(-20, 40),
+        "elevation": Uniform(0, 3000),
+        "fracture_spacing": Uniform(1, 200),
+        "fracture_orientation": Uniform(0, 90),
+        "slope_angle": Uniform(0, 90),
+        "rock_type": Choice(dict.fromkeys(ROCK_FACTORS, 1))
+    }
+
+
+def risk_model(columns):
+    """Heuristic risk score; any picklable callable mapping columns to scores can replace it."""
+    risk_percentage, _, _, _ = calculate_risk_batch(columns)
+    return risk_percentage
+
+
+def _sample(spec, rng, size):
+    # Categorical inputs are sampled as codes so scoring can skip string comparisons
+    if isinstance(spec, Choice):
+        codes = rng.choice(len(spec.values), size, p=spec.probabilities)
+        return pd.Categorical.from_codes(codes, categories=spec.values)
+    return spec.sample(rng, size)
+
+
+def _block_sums(model, problem, varied, size, seed):
+    """Running sums for one Saltelli block: [n, sum f, sum f², first-order sums..., total-order sums...]."""
+    rng = np.random.default_rng(seed)
+    a = {name: _sample(spec, rng, size) if name in varied else spec for name, spec in problem.items()}
+    b = {name: _sample(problem[name], rng, size) for name in varied}
+
+    f_a = model(a)
+    f_b = model({**a, **b})
+    sums = [size, f_a.sum() + f_b.sum(), np.square(f_a).sum() + np.square(f_b).sum()]
+    first, total = [], []
+    for name in varied:
+        f_ab = model({**a, name: b[name]})
+        first.append(np.dot(f_b, f_ab - f_a))
+        total.append(np.square(f_a - f_ab).sum())
+    return np.array(sums + first + total)
+
+
+def _indices(sums, k):
+    """First- and total-order indices from (possibly merged) block sums."""
+    n, total_sum, total_squares = sums[0], sums[1], sums[2]
+    variance = total_squares / (2 * n) - (total_sum / (2 * n)) ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        first_order = sums[3:3 + k] / n / variance
+        total_order = sums[3 + k:] / (2 * n) / variance
+    return first_order, total_order
+
+
+def _checkpoint(sums, varied):
+    first_order, total_order = _indices(sums, len(varied))
+    return {
+        "samples": int(sums[0]),
+        "evaluations": int(sums[0]) * (len(varied) + 2),
+        "first_order": dict(zip(varied, first_order.tolist())),
+        "total_order": dict(zip(varied, total_order.tolist())),
+    }
+
+
+def _run_blocks(model, problem, varied, n_blocks, block_size, seed, workers, deadline):
+    """Yield block sums in block order until all blocks ran or the deadline passed."""
+    seeds = np.random.SeedSequence(seed).spawn(n_blocks)
+    if workers == 1:
+        for block_seed in seeds:
+            if deadline is not None and time.perf_counter() > deadline:
+                return
+            yield _block_sums(model, problem, varied, block_size, block_seed)
+        return
+
+    results, pending, submitted, next_block = {}, {}, 0, 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while next_block < n_blocks:
+            out_of_time = deadline is not None and time.perf_counter() > deadline
+            while not out_of_time and submitted < n_blocks and len(pending) < workers * _BLOCKS_PER_WORKER:
+                future = pool.submit(_block_sums, model, problem, varied, block_size, seeds[submitted])
+                pending[future] = submitted
+                submitted += 1
+            if not pending:
+                return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[pending.pop(future)] = future.result()
+            # Hand back completed blocks in order so convergence is reproducible
+            while next_block in results:
+                yield results.pop(next_block)
+                next_block += 1
+
+
+def sobol_indices(problem=None, n_samples=65_536, model=risk_model, block_size=BLOCK_SIZE,
+                  workers=None, time_budget=None, seed=None):
+    """
+    Estimate first- and total-order Sobol indices.
+
+    `problem` maps calculate_risk_batch input columns (and optional image analysis
+    keys) to distributions from rockfall.uncertainty or fixed values; it defaults
+    to default_problem(). Every input with a distribution is analysed. `n_samples`
+    is the base sample size N (rounded up to whole blocks), so the model is
+    evaluated N * (k + 2) times for k varied inputs. `model` maps a dict of columns to an array of scores and must
+    be picklable (a module-level function) when `workers` > 1.
+
+    `workers` defaults to the CPU count; with `time_budget` (seconds) no new
+    blocks start once it is spent and the estimate uses the completed blocks.
+
+    Returns a dict with the varied input names, `first_order` and `total_order`
+    indices with standard errors from the spread between blocks, the samples
+    and evaluations actually used, the elapsed time, whether the time budget
+    cut the run short, and a `convergence` list of the indices after
+    1, 2, 4, ... blocks.
+    """
+    problem = default_problem() if problem is None else dict(problem)
+    varied = [name for name, spec in problem.items() if hasattr(spec, "sample")]
+    if not varied:
+        raise ValueError("sobol_indices: problem has no input with a distribution")
+    k = len(varied)
+    workers = workers or os.cpu_count() or 1
+    n_blocks = max(1, -(-n_samples // block_size))
+
+    start = time.perf_counter()
+    deadline = start + time_budget if time_budget is not None else None
+    merged = np.zeros(3 + 2 * k)
+    block_first, block_total, convergence = [], [], []
+    for count, sums in enumerate(_run_blocks(model, problem, varied, n_blocks, block_size, seed, workers, deadline), 1):
+        merged += sums
+        first_order, total_order = _indices(sums, k)
+        block_first.append(first_order)
+        block_total.append(total_order)
+        # Checkpoints after 1, 2, 4, ... blocks
+        if count & (count - 1) == 0:
+            convergence.append(_checkpoint(merged, varied))
+    elapsed = time.perf_counter() - start
+
+    blocks = len(block_first)
+    if not blocks:
+        raise TimeoutError("sobol_indices: time budget ran out before the first block finished")
+    final = _checkpoint(merged, varied)
+    if convergence[-1]["samples"] != final["samples"]:
+        convergence.append(final)
+
+    # Standard errors from the spread of the per-block estimates
+    if blocks > 1:
+        first_se = np.std(block_first, axis=0, ddof=1) / np.sqrt(blocks)
+        total_se = np.std(block_total, axis=0, ddof=1) / np.sqrt(blocks)
+    else:
+        first_se = total_se = np.full(k, np.nan)
+
+    return {
+        "inputs": varied,
+        **final,
+        "first_order_se": dict(zip(varied, first_se.tolist())),
+        "total_order_se": dict(zip(varied, total_se.tolist())),
+        "elapsed": elapsed,
+        "truncated": blocks < n_blocks,
+        "convergence": convergence
+    }
+
+
+def convergence_report(result):
+    """
+    Plain-text table of how the indices settle as samples grow.
+
+    One row per convergence checkpoint, with the largest change in any index
+    since the previous checkpoint; once that drops below the standard errors
+    more samples buy little.
+    """
+    inputs = result["inputs"]
+    width = max(len(name) for name in inputs)
+    lines = [
+        f"Sobol indices from {result['samples']:,} samples ({result['evaluations']:,} evaluations) "
+        f"in {result['elapsed']:.2f} s" + (" — stopped by time budget" if result["truncated"] else ""),
+        "",
+        f"{'input':<{width}} {'S1':>8} {'±':>7} {'ST':>8} {'±':>7}",
+    ]
+    for name in inputs:
+        lines.append(
+            f"{name:<{width}} {result['first_order'][name]:>8.4f} {result['first_order_se'][name]:>7.4f} "
+            f"{result['total_order'][name]:>8.4f} {result['total_order_se'][name]:>7.4f}"
+        )
+
+    lines += ["", f"{'samples':>12} {'max |ΔS1|':>10} {'max |ΔST|':>10}"]
+    previous = None
+    for checkpoint in result["convergence"]:
+        if previous is None:
+            change_first = change_total = "—"
+        else:
+            change_first = f"{max(abs(checkpoint['first_order'][n] - previous['first_order'][n]) for n in inputs):.4f}"
+            change_total = f"{max(abs(checkpoint['total_order'][n] - previous['total_order'][n]) for n in inputs):.4f}"
+        lines.append(f"{checkpoint['samples']:>12,} {change_first:>10} {change_total:>10}")
+        previous = checkpoint
+    return "\n".join(lines)
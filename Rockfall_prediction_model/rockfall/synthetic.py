@@ -0,0 +1,243 @@
+"""
+Synthetic rockfall datasets for training and scaling studies.
+
+Rows have the same columns as the training data (NUMERIC_FEATURES, the
+CATEGORICAL_FEATURES columns and Rockfall_Event). Features are drawn
+independently from ranges that cover the original dataset, and labels come
+from RockfallPhysics: a logistic model over physically motivated terms (slope
+driving force, pore pressure from rain, freeze-thaw, fracturing, fault
+proximity, lithology, root reinforcement, ...) whose weights are configurable.
+
+Everything is generated and written chunk by chunk, so memory stays constant
+from a thousand rows to a hundred million. CSV (written with pyarrow when it is
+installed), NPY (a structured array written incrementally) and Parquet (needs
+pyarrow) outputs are supported.
+"""
+
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .model import CATEGORICAL_FEATURES, NUMERIC_FEATURES, TARGET
+
+# Rows generated per chunk
+DEFAULT_CHUNK_ROWS = 250_000
+
+# Weights of the physical terms in logit space; every term is scaled to roughly [0, 1]
+DEFAULT_WEIGHTS = {
+    "slope": 3.0,           # tan(slope) relative to a 60° face
+    "pore_pressure": 2.0,   # 24h rainfall relative to 50 mm
+    "freeze_thaw": 1.5,     # snow cover while the temperature hovers around 0 °C
+    "fracturing": 2.5,      # fracture density relative to 20 per metre
+    "fault_proximity": 1.0, # decays with distance to the nearest fault
+    "wind": 0.3,            # wind loading on loose blocks
+    "lithology": 1.0,       # rock type susceptibility (ROCK_SUSCEPTIBILITY)
+    "soil": 0.5,            # soil swelling/erodibility (SOIL_SUSCEPTIBILITY)
+    "vegetation": 1.0,      # root reinforcement (VEGETATION_REINFORCEMENT), stabilizing
+    "land_cover": 0.5,      # exposure of the face (LAND_COVER_EXPOSURE)
+    "block_size": 0.5       # larger detached volumes are likelier to be recorded
+}
+
+ROCK_SUSCEPTIBILITY = {"Granite": 0.2, "Sandstone": 0.6, "Shale": 1.0}
+SOIL_SUSCEPTIBILITY = {"Clay": 1.0, "Loam": 0.3, "Sand": 0.6}
+VEGETATION_REINFORCEMENT = {"Dense": 1.0, "Moderate": 0.5, "Sparse": 0.0}
+LAND_COVER_EXPOSURE = {"Bare": 1.0, "Forest": 0.0, "Grassland": 0.4}
+
+# Rows used to calibrate the logistic intercept to the requested event rate
+_CALIBRATION_ROWS = 200_000
+
+
+def _table(column, values):
+    return np.array([values[category] for category in CATEGORICAL_FEATURES[column]], dtype=np.float32)
+
+
+def sample_features(rng, n):
+    """
+    n rows of features: float32 arrays for NUMERIC_FEATURES and int8 category
+    codes (indices into CATEGORICAL_FEATURES) for the categorical columns.
+    """
+    columns = {
+        "Elevation": rng.uniform(100, 600, n),
+        "Slope": rng.uniform(20, 60, n),
+        "Aspect_deg": rng.uniform(0, 360, n),
+        "Distance_to_fault_km": rng.uniform(0.1, 5, n),
+        "Rainfall_mm": np.minimum(rng.gamma(1.5, 10, n), 50),
+        "Snow_mm": np.minimum(rng.exponential(4, n), 16),
+        "Temperature_C": np.clip(rng.normal(14, 9, n), -5, 35),
+        "Wind_speed_kmh": rng.normal(12, 8, n),
+        "Fracture_Density": rng.uniform(0, 20, n),
+        "Rock_size": rng.uniform(0.2, 3, n),
+        "Rock_volume": rng.uniform(0.1, 4, n),
+        "Energy_released": rng.uniform(50, 2000, n)
+    }
+    columns = {name: values.astype(np.float32) for name, values in columns.items()}
+    for name, categories in CATEGORICAL_FEATURES.items():
+        columns[name] = rng.integers(0, len(categories), n, dtype=np.int8)
+    return columns
+
+
+class RockfallPhysics:
+    """
+    Logistic label model: P(event) = sigmoid(sharpness * (score - threshold)).
+
+    `weights` overrides entries of DEFAULT_WEIGHTS. The threshold is calibrated
+    so that about `event_rate` of rows are events (0.5 gives a balanced
+    dataset); `sharpness` sets how noisy labels are near the boundary.
+    """
+
+    def __init__(self, weights=None, event_rate=0.5, sharpness=4.0, seed=0):
+        unknown = set(weights or {}) - set(DEFAULT_WEIGHTS)
+        if unknown:
+            raise ValueError(f"RockfallPhysics: unknown weights {sorted(unknown)}")
+        if not 0 < event_rate < 1:
+            raise ValueError(f"RockfallPhysics: event_rate must be in (0, 1), got {event_rate}")
+        self.weights = {**DEFAULT_WEIGHTS, **(weights or {})}
+        self.event_rate = event_rate
+        self.sharpness = sharpness
+        self.threshold = self._calibrate(np.random.default_rng(seed))
+
+    def score(self, columns):
+        """Weighted sum of the physical terms (higher = less stable)."""
+        w = self.weights
+        slope = np.tan(np.radians(columns["Slope"])) / math.tan(math.radians(60))
+        temperature = columns["Temperature_C"]
+        terms = (
+            (w["slope"], slope),
+            (w["pore_pressure"], columns["Rainfall_mm"] / 50),
+            (w["freeze_thaw"], np.minimum(columns["Snow_mm"] / 16, 1) * np.exp(-np.square(temperature / 5))),
+            (w["fracturing"], columns["Fracture_Density"] / 20),
+            (w["fault_proximity"], np.exp(-columns["Distance_to_fault_km"] / 1.5)),
+            (w["wind"], np.clip(columns["Wind_speed_kmh"], 0, None) / 40),
+            (w["lithology"], _table("Rock_Type", ROCK_SUSCEPTIBILITY)[columns["Rock_Type"]]),
+            (w["soil"], _table("Soil_Type", SOIL_SUSCEPTIBILITY)[columns["Soil_Type"]]),
+            (-w["vegetation"], _table("Vegetation", VEGETATION_REINFORCEMENT)[columns["Vegetation"]]),
+            (w["land_cover"], _table("Land_Cover", LAND_COVER_EXPOSURE)[columns["Land_Cover"]]),
+            (w["block_size"], columns["Rock_volume"] / 4)
+        )
+        score = np.zeros(len(slope), dtype=np.float64)
+        for weight, term in terms:
+            score += weight * term
+        return score
+
+    def probability(self, columns):
+        return 1 / (1 + np.exp(-self.sharpness * (self.score(columns) - self.threshold)))
+
+    def sample_labels(self, rng, columns):
+        return (rng.random(len(columns["Slope"])) < self.probability(columns)).astype(np.int8)
+
+    def _calibrate(self, rng):
+        # Bisect the threshold so the mean event probability matches event_rate
+        score = self.score(sample_features(rng, _CALIBRATION_ROWS))
+        low, high = score.min() - 10, score.max() + 10
+        for _ in range(60):
+            self.threshold = (low + high) / 2
+            rate = np.mean(1 / (1 + np.exp(-self.sharpness * (score - self.threshold))))
+            low, high = (self.threshold, high) if rate > self.event_rate else (low, self.threshold)
+        return self.threshold
+
+
+def generate_chunks(n_rows, chunk_rows=DEFAULT_CHUNK_ROWS, seed=None, physics=None):
+    """Yield dicts of column arrays (features plus TARGET), at most chunk_rows rows each."""
+    physics = physics or RockfallPhysics()
+    for chunk_seed, start in zip(np.random.SeedSequence(seed).spawn(-(-n_rows // chunk_rows)),
+                                 range(0, n_rows, chunk_rows)):
+        rng = np.random.default_rng(chunk_seed)
+        columns = sample_features(rng, min(chunk_rows, n_rows - start))
+        columns[TARGET] = physics.sample_labels(rng, columns)
+        yield columns
+
+
+def _to_frame(columns):
+    frame = pd.DataFrame({name: columns[name] for name in NUMERIC_FEATURES})
+    for name, categories in CATEGORICAL_FEATURES.items():
+        frame[name] = pd.Categorical.from_codes(columns[name], categories=list(categories))
+    frame[TARGET] = columns[TARGET]
+    return frame
+
+
+def npy_dtype():
+    """Structured dtype of NPY output: float32 numerics, byte-string categories, int8 label."""
+    fields = [(name, np.float32) for name in NUMERIC_FEATURES]
+    fields += [(name, f"S{max(map(len, categories))}") for name, categories in CATEGORICAL_FEATURES.items()]
+    fields.append((TARGET, np.int8))
+    return np.dtype(fields)
+
+
+def _write_csv(path, chunks):
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+    except ImportError:
+        # pandas fallback, roughly ten times slower than pyarrow's writer
+        with open(path, "w", newline="") as output:
+            for i, columns in enumerate(chunks):
+                _to_frame(columns).to_csv(output, header=i == 0, index=False)
+        return
+
+    writer = None
+    try:
+        for columns in chunks:
+            table = pa.Table.from_pandas(_to_frame(columns), preserve_index=False)
+            if writer is None:
+                options = pa_csv.WriteOptions(quoting_style="needed")
+                writer = pa_csv.CSVWriter(str(path), table.schema, write_options=options)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _write_npy(path, chunks, n_rows):
+    dtype = npy_dtype()
+    with open(path, "wb") as output:
+        header = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (n_rows,)}
+        np.lib.format.write_array_header_2_0(output, header)
+        for columns in chunks:
+            records = np.empty(len(columns[TARGET]), dtype=dtype)
+            for name in NUMERIC_FEATURES:
+                records[name] = columns[name]
+            for name, categories in CATEGORICAL_FEATURES.items():
+                records[name] = np.array([category.encode() for category in categories])[columns[name]]
+            records[TARGET] = columns[TARGET]
+            output.write(records.tobytes())
+
+
+def _write_parquet(path, chunks):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet output needs pyarrow: pip install pyarrow") from None
+
+    writer = None
+    try:
+        for columns in chunks:
+            table = pa.Table.from_pandas(_to_frame(columns), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def write_dataset(path, n_rows, chunk_rows=DEFAULT_CHUNK_ROWS, seed=None, physics=None):
+    """
+    Generate n_rows rows and stream them to `path`; the format follows the
+    suffix (.csv, .npy or .parquet). Returns the path.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    chunks = generate_chunks(n_rows, chunk_rows, seed, physics)
+    suffix = path.suffix.lower()
+    if suffix == ".csv":
+        _write_csv(path, chunks)
+    elif suffix == ".npy":
+        _write_npy(path, chunks, n_rows)
+    elif suffix == ".parquet":
+        _write_parquet(path, chunks)
+    else:
+        raise ValueError(f"write_dataset: unsupported output format '{path.suffix}' (use .csv, .npy or .parquet)")
+    return path
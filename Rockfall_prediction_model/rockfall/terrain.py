@@ -0,0 +1,208 @@
+"""
+Synthetic mine terrain for the contour map page.
+
+generate_terrain_data() builds an elevation grid from the five image analysis
+scores (terrain shape, fracture and erosion patterns, benches, vegetation
+texture and 4-octave fractal noise), with its noise seeded from the scores, so
+one analysis always gives the same terrain. terrain() serves it from a
+process-wide bounded cache keyed on the seed string and the grid resolution:
+reruns, page navigations and other sessions with the same analysis skip the
+generation entirely. Cached arrays are shared, so they are read-only, and each
+entry keeps how long it took to generate so callers can report miss latency.
+"""
+
+import hashlib
+import time
+
+import numpy as np
+from scipy.ndimage import zoom
+
+from .cache import get_cache
+
+# Grid points per side
+TERRAIN_RESOLUTION = 100
+
+# Terrains kept in memory (three 100 x 100 float64 grids are 240 KB)
+TERRAIN_CACHE_ENTRIES = 64
+
+# Order of the scores in the seed string
+IMAGE_ANALYSIS_ORDER = ("slope_steepness", "rock_fractures", "vegetation_cover", "erosion_signs", "rock_type_confidence")
+
+
+def terrain_seed(image_analysis):
+    """(seed string, seed) of an image analysis: its five scores, and the noise seed hashed from them."""
+    seed_string = "_".join(str(image_analysis.get(key, 50)) for key in IMAGE_ANALYSIS_ORDER)
+    return seed_string, int(hashlib.md5(seed_string.encode()).hexdigest()[:8], 16)
+
+
+# Function to generate realistic mine-like terrain data
+def generate_terrain_data(image_analysis, resolution=TERRAIN_RESOLUTION):
+    """X, Y (km) and Z (elevation, m) grids of resolution x resolution points for an image analysis."""
+    # Get values from session state
+    slope_steepness = image_analysis.get('slope_steepness', 50) 
+    rock_fractures = image_analysis.get('rock_fractures', 50)   
+    vegetation_cover = image_analysis.get('vegetation_cover', 50)
+    erosion_signs = image_analysis.get('erosion_signs', 50)
+    rock_type_confidence = image_analysis.get('rock_type_confidence', 50)
+    
+    # Create a unique seed based on the image analysis values; a private generator
+    # keeps concurrent sessions from interleaving draws on NumPy's global one
+    _, seed = terrain_seed(image_analysis)
+    rng = np.random.RandomState(seed)
+    
+    x = np.linspace(-5, 5, resolution)
+    y = np.linspace(-5, 5, resolution)
+    X, Y = np.meshgrid(x, y)
+    
+    # Base elevation - mines typically have significant elevation changes
+    base_elevation = 800  # Higher base for mine-like terrain
+    
+    # 1. PRIMARY TERRAIN SHAPE (Most significant factor)
+    # Slope steepness determines the overall mountain shape
+    steepness_factor = 0.5 + (slope_steepness / 100) * 2.0
+    
+    # Create a central peak or ridge based on slope
+    if slope_steepness > 70:
+        # Steep mountain peak
+        Z = base_elevation + 300 * steepness_factor * np.exp(-(X**2 + Y**2)/2)
+    elif slope_steepness > 40:
+        # Ridgeline terrain
+        ridge_angle = (rock_fractures / 100) * np.pi  # Fractures influence ridge orientation
+        Z = base_elevation + 200 * np.exp(-((X*np.cos(ridge_angle) + Y*np.sin(ridge_angle))**2)/1.5)
+    else:
+        # Gentle slopes - more plateau-like
+        Z = base_elevation + 100 * np.exp(-(X**2 + Y**2)/3)
+    
+    # 2. ROCK FRACTURE PATTERNS (Creates realistic mine terrain features)
+    fracture_intensity = rock_fractures / 100
+    
+    # Add fault lines and fracture patterns
+    if rock_fractures > 30:
+        # Multiple fracture lines at different angles
+        for i in range(int(3 + fracture_intensity * 5)):
+            angle = (i / max(1, int(3 + fracture_intensity * 5))) * np.pi
+            fracture_line = 20 * fracture_intensity * np.sin(5*(X*np.cos(angle) + Y*np.sin(angle)))
+            Z += fracture_line * np.exp(-((X*np.cos(angle) + Y*np.sin(angle))**2)/4)
+    
+    # 3. EROSION PATTERNS (Valleys, gullies, drainage patterns)
+    erosion_intensity = erosion_signs / 100
+    
+    if erosion_signs > 40:
+        # Create dendritic drainage patterns (like real terrain)
+        for freq in [2, 3, 4]:
+            erosion_valley = -50 * erosion_intensity * (
+                np.sin(freq*X) * np.cos(freq*Y/2) + 
+                np.sin(freq*Y) * np.cos(freq*X/2)
+            )
+            Z += erosion_valley * np.exp(-(X**2 + Y**2)/6)
+    
+    # 4. BENCHES AND TERRACES (Typical in mining areas)
+    # Rock confidence influences how structured the benches are
+    if rock_type_confidence > 60:
+        # Create stepped bench patterns
+        bench_spacing = 1.0 + (100 - slope_steepness) / 50
+        bench_pattern = 30 * (rock_type_confidence / 100) * (
+            np.sin(X * bench_spacing) * np.sin(Y * bench_spacing)
+        )
+        Z += bench_pattern * np.exp(-(X**2 + Y**2)/8)
+    
+    # 5. VEGETATION SMOOTHING AND SURFACE TEXTURE
+    vegetation_smoothing = vegetation_cover / 100
+    
+    # Vegetation smooths sharp edges but adds micro-topography
+    if vegetation_cover > 30:
+        # Smoothing effect
+        smooth_noise = rng.normal(0, 5 * (1 - vegetation_smoothing), Z.shape)
+        Z += smooth_noise
+        
+        # Add gentle rolling hills from root systems
+        if vegetation_cover > 60:
+            micro_topography = 8 * vegetation_smoothing * (
+                np.sin(8*X) * np.cos(8*Y) + 
+                np.sin(6*Y) * np.cos(6*X)
+            )
+            Z += micro_topography * np.exp(-(X**2 + Y**2)/10)
+    
+    # 6. MINING-SPECIFIC FEATURES
+    # Add pit-like depressions or waste rock piles based on analysis
+    mining_feature_intensity = (slope_steepness + rock_fractures) / 200
+    
+    # Potential open pit depression
+    if slope_steepness > 60 and rock_fractures > 50:
+        pit_depth = -80 * mining_feature_intensity
+        pit = pit_depth * np.exp(-(X**2 + Y**2)/1.2)
+        Z += pit
+    
+    # Waste rock piles or spoil tips
+    if erosion_signs > 70:
+        waste_pile = 40 * mining_feature_intensity * np.exp(-((X-2)**2 + (Y-2)**2)/1.5)
+        Z += waste_pile
+    
+    # 7. FIXED FRACTAL NOISE GENERATION (Proper array sizing)
+    fractal_noise = np.zeros(Z.shape)
+    target_shape = Z.shape
+    
+    for octave in range(4):
+        scale_factor = 2 ** octave
+        # Calculate the base shape for this octave
+        base_shape = (max(1, target_shape[0] // scale_factor), 
+                     max(1, target_shape[1] // scale_factor))
+        
+        # Generate noise for this octave
+        octave_noise = rng.normal(0, 3.0/(octave+1), base_shape)
+        
+        # Resize to target shape using proper interpolation
+        if base_shape != target_shape:
+            # Calculate zoom factors
+            zoom_factors = (target_shape[0] / base_shape[0], 
+                          target_shape[1] / base_shape[1])
+            octave_noise_resized = zoom(octave_noise, zoom_factors, order=1)
+            
+            # Ensure the resized array matches the target shape exactly
+            if octave_noise_resized.shape != target_shape:
+                # Trim if larger
+                octave_noise_resized = octave_noise_resized[:target_shape[0], :target_shape[1]]
+                # Pad if smaller (shouldn't happen with zoom, but just in case)
+                if octave_noise_resized.shape != target_shape:
+                    pad_rows = target_shape[0] - octave_noise_resized.shape[0]
+                    pad_cols = target_shape[1] - octave_noise_resized.shape[1]
+                    octave_noise_resized = np.pad(octave_noise_resized, 
+                                                ((0, pad_rows), (0, pad_cols)), 
+                                                mode='edge')
+        else:
+            octave_noise_resized = octave_noise
+        
+        fractal_noise += octave_noise_resized
+    
+    # Apply fractal noise with vegetation smoothing
+    Z += fractal_noise * (1 - vegetation_smoothing * 0.5)
+    
+    # Ensure realistic elevation range for mine terrain
+    Z = np.maximum(Z, 600)  # Minimum elevation
+    Z = np.minimum(Z, 1200) # Maximum elevation
+    
+    return X, Y, Z
+
+
+# Named process-wide cache, so the dashboard's cache_stats() shows it
+_terrain_cache = get_cache("terrain", TERRAIN_CACHE_ENTRIES, 0)
+
+
+def terrain(image_analysis, resolution=TERRAIN_RESOLUTION):
+    """
+    (X, Y, Z, hit, seconds): generate_terrain_data() served from the
+    process-wide cache. The arrays are read-only; `hit` tells whether the
+    generation was skipped and `seconds` is how long the entry took to generate.
+    """
+    key = (terrain_seed(image_analysis)[0], resolution)
+    hit, entry = _terrain_cache.lookup(key)
+    if not hit:
+        start = time.perf_counter()
+        grids = generate_terrain_data(image_analysis, resolution)
+        seconds = time.perf_counter() - start
+        for grid in grids:
+            grid.setflags(write=False)
+        entry = (*grids, seconds)
+        _terrain_cache.put(key, entry)
+    X, Y, Z, seconds = entry
+    return X, Y, Z, hit, seconds
@@ -0,0 +1,380 @@
+"""
+Memory-efficient training pipeline for the rockfall model.
+
+The dataset (CSV, or NPY/Parquet from rockfall.synthetic) is streamed in chunks
+with explicit compact dtypes (float32 numerics, fixed-category categoricals,
+int8 target) and encoded by the fixed-schema FEATURE_ENCODER straight into one
+preallocated float32 design matrix, the layout scikit-learn's trees use
+internally, so no float64 or one-hot DataFrame copy of the data is ever
+materialized. The train/test split shuffles that matrix in place and hands out
+views. Every saved model gets its feature schema next to it
+(<model>.features.json), which inference encodes with.
+
+The estimator is pluggable (ESTIMATORS): the RandomForest the app ships with,
+or HistGradientBoosting, which trains on binned features and gives a much
+smaller artifact. compare_estimators() trains several on the same split and
+measures what matters for serving: artifact size, load time, single-row and
+batch latency through RockfallModel, and event recall.
+
+update_model() folds a newly labeled batch into an existing model without
+retraining on the full history: forests grow extra trees fitted on the batch
+only (warm start) and HistGradientBoosting continues boosting on it, so the
+cost scales with the batch. Every update is written as a new versioned file.
+
+train_model.py and update_model.py are the command-line front ends.
+"""
+
+import os
+import re
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import ExtraTreesClassifier, HistGradientBoostingClassifier, RandomForestClassifier
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, recall_score
+
+from .features import schema_path
+from .model import FEATURE_ENCODER, TARGET, RockfallModel, model_encoder
+from .profiling import StageReport
+
+# Rows parsed per CSV chunk
+DEFAULT_CHUNK_ROWS = 500_000
+
+# Block size used to count lines before loading
+_COUNT_BLOCK_BYTES = 1 << 20
+
+# Estimator factories by name: f(n_estimators, n_jobs, random_state). n_estimators
+# is the number of trees, or of boosting iterations for HistGradientBoosting
+# (which parallelizes with OpenMP and ignores n_jobs).
+ESTIMATORS = {
+    "random_forest": lambda n_estimators, n_jobs, random_state: RandomForestClassifier(
+        n_estimators=n_estimators, n_jobs=n_jobs, random_state=random_state),
+    "extra_trees": lambda n_estimators, n_jobs, random_state: ExtraTreesClassifier(
+        n_estimators=n_estimators, n_jobs=n_jobs, random_state=random_state),
+    "hist_gradient_boosting": lambda n_estimators, n_jobs, random_state: HistGradientBoostingClassifier(
+        max_iter=n_estimators, early_stopping=False, random_state=random_state)
+}
+DEFAULT_ESTIMATOR = "random_forest"
+
+# Trees (or boosting iterations) added per incremental update
+DEFAULT_UPDATE_ESTIMATORS = 10
+
+# Calls timed per artifact by measure_model
+SINGLE_ROW_CALLS = 200
+BATCH_ROWS = 10_000
+
+
+def dataset_dtypes(encoder=FEATURE_ENCODER):
+    """pandas dtypes for every dataset column: float32 numerics, fixed categories, int8 target."""
+    dtypes = {name: np.float32 for name in encoder.numeric}
+    dtypes.update({name: pd.CategoricalDtype(categories) for name, categories in encoder.categorical.items()})
+    dtypes[TARGET] = np.int8
+    return dtypes
+
+
+def count_rows(path):
+    """Upper bound on the number of data rows in a CSV (lines minus the header)."""
+    lines, last = 0, b"\n"
+    with open(path, "rb") as data:
+        while block := data.read(_COUNT_BLOCK_BYTES):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def _dataset_reader(path, chunk_rows, encoder):
+    """(column names, row count upper bound, chunk iterator) for a CSV, NPY or Parquet dataset."""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".npy":
+        records = np.load(path, mmap_mode="r")
+        if records.dtype.names is None:
+            raise ValueError(f"{path}: expected a structured array with named columns")
+        chunks = (records[start:start + chunk_rows] for start in range(0, len(records), chunk_rows))
+        return records.dtype.names, len(records), chunks
+    if suffix == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Reading Parquet datasets needs pyarrow: pip install pyarrow") from None
+        parquet = pq.ParquetFile(path)
+        chunks = (batch.to_pandas() for batch in parquet.iter_batches(batch_size=chunk_rows))
+        return parquet.schema_arrow.names, parquet.metadata.num_rows, chunks
+
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = {name: dtype for name, dtype in dataset_dtypes(encoder).items() if name in header}
+    chunks = pd.read_csv(path, usecols=list(dtypes), dtype=dtypes, chunksize=chunk_rows)
+    return header, count_rows(path), chunks
+
+
+def load_dataset(path, chunk_rows=DEFAULT_CHUNK_ROWS, encoder=FEATURE_ENCODER):
+    """
+    Stream a dataset into (X, y): a float32 matrix encoded by `encoder` and int8 labels.
+
+    CSV, NPY (structured array) and Parquet files are read by suffix. Only the
+    numeric feature columns and the target are required; categorical columns
+    a dataset lacks, or categories outside the schema, leave their one-hot
+    columns at 0. Memory beyond X and y is bounded by `chunk_rows`.
+    """
+    names, capacity, chunks = _dataset_reader(path, chunk_rows, encoder)
+    missing = [name for name in (*encoder.numeric, TARGET) if name not in names]
+    if missing:
+        raise ValueError(f"{path}: missing required columns {missing}")
+
+    X = np.empty((capacity, encoder.n_features), dtype=np.float32)
+    y = np.empty(capacity, dtype=np.int8)
+    filled = 0
+    for chunk in chunks:
+        rows = slice(filled, filled + len(chunk))
+        encoder.encode(chunk, out=X[rows])
+        y[rows] = np.asarray(chunk[TARGET])
+        filled += len(chunk)
+    return X[:filled], y[:filled]
+
+
+def shuffle_split(X, y, test_size=0.2, random_state=42):
+    """Shuffle X and y in place with the same permutation and split them into views."""
+    np.random.default_rng(random_state).shuffle(X)
+    np.random.default_rng(random_state).shuffle(y)
+    n_test = int(np.ceil(len(y) * test_size))
+    n_train = len(y) - n_test
+    return X[:n_train], X[n_train:], y[:n_train], y[n_train:]
+
+
+def build_estimator(n_estimators=100, n_jobs=-1, random_state=42, kind=DEFAULT_ESTIMATOR):
+    """A fresh estimator of the given ESTIMATORS kind, using every core by default."""
+    if kind not in ESTIMATORS:
+        raise ValueError(f"unknown estimator '{kind}' (choose from {', '.join(ESTIMATORS)})")
+    return ESTIMATORS[kind](n_estimators, n_jobs, random_state)
+
+
+def evaluate(estimator, X_test, y_test):
+    """Accuracy, recall for the rockfall class and the classic text reports."""
+    y_pred = estimator.predict(X_test)
+    return {
+        "accuracy": float(accuracy_score(y_test, y_pred)),
+        "event_recall": float(recall_score(y_test, y_pred, pos_label=1, zero_division=0)),
+        "classification_report": classification_report(y_test, y_pred, zero_division=0),
+        "confusion_matrix": confusion_matrix(y_test, y_pred).tolist()
+    }
+
+
+def _atomic_write(path, write):
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    os.close(descriptor)
+    try:
+        write(temporary)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def save_model(estimator, path, encoder=FEATURE_ENCODER):
+    """
+    Dump the model and its feature schema (schema_path(path)) next to `path`
+    and atomically move them into place, schema first.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _atomic_write(schema_path(path), encoder.save)
+    _atomic_write(path, lambda temporary: joblib.dump(estimator, temporary))
+    return path
+
+
+def measure_model(path, X, single_row_calls=SINGLE_ROW_CALLS, batch_rows=BATCH_ROWS):
+    """
+    Serving costs of the artifact at `path`: file size, load time (unpickling
+    plus forest compilation, as load_model does) and RockfallModel.predict_proba
+    latency for single rows and for one batch of `batch_rows` rows of X.
+    """
+    path = Path(path)
+    start = time.perf_counter()
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        estimator = joblib.load(path)
+    unpickle_seconds = time.perf_counter() - start
+    model = RockfallModel(estimator, path, unpickle_seconds)
+    load_seconds = time.perf_counter() - start
+
+    # The first call pays one-off costs and is reported by RockfallModel separately
+    for i in range(single_row_calls + 1):
+        model.predict_proba(X[i % len(X)][None, :])
+    latency = model.latency_stats()
+
+    batch = X[:batch_rows]
+    batch_start = time.perf_counter()
+    model.predict_proba(batch)
+    batch_seconds = time.perf_counter() - batch_start
+    return {
+        "artifact_bytes": path.stat().st_size,
+        "load_seconds": load_seconds,
+        "unpickle_seconds": unpickle_seconds,
+        "single_row_p50_ms": latency["steady_state_p50_ms"],
+        "single_row_p99_ms": latency["steady_state_p99_ms"],
+        "batch_rows": len(batch),
+        "batch_ms": batch_seconds * 1e3,
+        "batch_us_per_row": batch_seconds / max(len(batch), 1) * 1e6
+    }
+
+
+def _fit(kind, X_train, y_train, n_estimators, n_jobs, random_state):
+    estimator = build_estimator(n_estimators, n_jobs, random_state, kind)
+    estimator.fit(X_train, y_train)
+    return estimator
+
+
+def _save_named(estimator, path, encoder=FEATURE_ENCODER):
+    # Fitted on a bare matrix to avoid a DataFrame copy; record the column names
+    # so the model loader can validate them (after evaluation, which also passes
+    # bare matrices)
+    estimator.feature_names_in_ = np.asarray(encoder.feature_names, dtype=object)
+    return save_model(estimator, path, encoder)
+
+
+def run_pipeline(data_path, output_path, chunk_rows=DEFAULT_CHUNK_ROWS, test_size=0.2,
+                 n_estimators=100, n_jobs=-1, random_state=42, report=None, kind=DEFAULT_ESTIMATOR):
+    """
+    Load, split, train, evaluate and save, timing each stage in `report`.
+
+    Returns (estimator, metrics, report) where report is a StageReport.
+    """
+    report = report or StageReport()
+
+    with report.stage("load"):
+        X, y = load_dataset(data_path, chunk_rows)
+    with report.stage("split"):
+        X_train, X_test, y_train, y_test = shuffle_split(X, y, test_size, random_state)
+    with report.stage("train"):
+        estimator = _fit(kind, X_train, y_train, n_estimators, n_jobs, random_state)
+    with report.stage("evaluate"):
+        metrics = evaluate(estimator, X_test, y_test)
+    with report.stage("save"):
+        _save_named(estimator, output_path)
+
+    metrics.update(estimator=kind, rows=len(y), train_rows=len(y_train), test_rows=len(y_test),
+                   dataset_bytes=X.nbytes + y.nbytes)
+    return estimator, metrics, report
+
+
+def compare_estimators(data_path, output_dir, kinds=tuple(ESTIMATORS), chunk_rows=DEFAULT_CHUNK_ROWS,
+                       test_size=0.2, n_estimators=100, n_jobs=-1, random_state=42):
+    """
+    Train every estimator kind on the same split and save each to
+    `output_dir`/rockfall_<kind>.pkl.
+
+    Returns one dict per kind with train time, accuracy, event recall and the
+    measure_model() serving costs.
+    """
+    for kind in kinds:
+        build_estimator(kind=kind)  # fail on unknown kinds before loading anything
+    X, y = load_dataset(data_path, chunk_rows)
+    X_train, X_test, y_train, y_test = shuffle_split(X, y, test_size, random_state)
+
+    results = []
+    for kind in kinds:
+        start = time.perf_counter()
+        estimator = _fit(kind, X_train, y_train, n_estimators, n_jobs, random_state)
+        train_seconds = time.perf_counter() - start
+        metrics = evaluate(estimator, X_test, y_test)
+        path = _save_named(estimator, Path(output_dir) / f"rockfall_{kind}.pkl")
+        del estimator
+        results.append({
+            "estimator": kind,
+            "path": str(path),
+            "train_seconds": train_seconds,
+            "accuracy": metrics["accuracy"],
+            "event_recall": metrics["event_recall"],
+            **measure_model(path, X_test)
+        })
+    return results
+
+
+def format_comparison(results):
+    """Text table of compare_estimators() results."""
+    lines = [f"{'estimator':<24} {'train':>9} {'artifact':>11} {'load':>9} {'1-row p50':>10} "
+             f"{'1-row p99':>10} {'batch/row':>10} {'accuracy':>9} {'recall':>7}"]
+    for result in results:
+        lines.append(
+            f"{result['estimator']:<24} {result['train_seconds']:>7.2f} s "
+            f"{result['artifact_bytes'] / 2 ** 20:>7.1f} MiB {result['load_seconds'] * 1e3:>6.0f} ms "
+            f"{result['single_row_p50_ms']:>7.3f} ms {result['single_row_p99_ms']:>7.3f} ms "
+            f"{result['batch_us_per_row']:>7.2f} µs {result['accuracy']:>9.4f} {result['event_recall']:>7.4f}"
+        )
+    return "\n".join(lines)
+
+
+def versioned_path(path):
+    """
+    The next free versioned file next to `path`: model/rockfall_model.pkl (or
+    any rockfall_model.vN.pkl) gives model/rockfall_model.v<highest N + 1>.pkl.
+    """
+    path = Path(path)
+    stem = re.sub(r"\.v\d+$", "", path.stem)
+    pattern = re.compile(rf"{re.escape(stem)}\.v(\d+){re.escape(path.suffix)}")
+    versions = [int(match.group(1)) for candidate in path.parent.glob(f"{stem}.v*{path.suffix}")
+                if (match := pattern.fullmatch(candidate.name))]
+    return path.with_name(f"{stem}.v{max(versions, default=0) + 1}{path.suffix}")
+
+
+def update_model(model_path, batch_path, output_path=None, n_estimators=DEFAULT_UPDATE_ESTIMATORS,
+                 max_estimators=None, n_jobs=-1, eval_path=None, chunk_rows=DEFAULT_CHUNK_ROWS, report=None):
+    """
+    Fold the labeled rows of `batch_path` into the model at `model_path`.
+
+    Forests get `n_estimators` new trees fitted on the batch (warm start), and
+    with `max_estimators` only the newest trees are kept, so the model follows
+    recent conditions; HistGradientBoosting runs `n_estimators` more boosting
+    iterations on the batch. The batch must contain both events and
+    non-events. The result goes to `output_path`, by default the next
+    versioned_path() of `model_path`, never over the original.
+
+    Returns (estimator, metrics, report); metrics are measured on `eval_path`
+    when given.
+    """
+    report = report or StageReport()
+    output_path = Path(output_path) if output_path else versioned_path(model_path)
+
+    with report.stage("load model"):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            estimator = joblib.load(model_path)
+        encoder = model_encoder(model_path)
+    with report.stage("load batch"):
+        X, y = load_dataset(batch_path, chunk_rows, encoder)
+    classes = np.unique(y)
+    if not np.array_equal(classes, estimator.classes_):
+        raise ValueError(f"{batch_path}: an update batch needs every class {estimator.classes_.tolist()}, "
+                         f"got {classes.tolist()}")
+
+    with report.stage("update"):
+        if hasattr(estimator, "estimators_"):
+            previous = len(estimator.estimators_)
+            estimator.set_params(warm_start=True, n_estimators=previous + n_estimators, n_jobs=n_jobs)
+        elif isinstance(estimator, HistGradientBoostingClassifier):
+            previous = estimator.n_iter_
+            estimator.set_params(warm_start=True, max_iter=previous + n_estimators, early_stopping=False)
+        else:
+            raise ValueError(f"{type(estimator).__name__} does not support incremental updates")
+        estimator.fit(X, y)
+        estimator.set_params(warm_start=False)
+        if max_estimators and hasattr(estimator, "estimators_") and len(estimator.estimators_) > max_estimators:
+            estimator.estimators_ = estimator.estimators_[-max_estimators:]
+            estimator.n_estimators = max_estimators
+
+    metrics = {}
+    if eval_path is not None:
+        with report.stage("evaluate"):
+            metrics = evaluate(estimator, *load_dataset(eval_path, chunk_rows, encoder))
+    with report.stage("save"):
+        _save_named(estimator, output_path, encoder)
+
+    size = len(estimator.estimators_) if hasattr(estimator, "estimators_") else estimator.n_iter_
+    metrics.update(base_model=str(model_path), output=str(output_path), batch_rows=len(y),
+                   previous_size=previous, size=size)
+    return estimator, metrics, report
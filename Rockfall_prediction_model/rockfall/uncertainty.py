@@ -0,0 +1,165 @@
+"""
+Monte Carlo uncertainty propagation through the rockfall risk model.
+
+Each input of calculate_risk is described by a distribution (or a fixed value).
+Samples are drawn and scored in fixed-size chunks with calculate_risk_batch, and
+results are accumulated into a fine histogram of the (0-100) risk score, so
+memory stays bounded no matter how many samples are drawn.
+"""
+
+import numpy as np
+
+from .batch import calculate_risk_batch
+from .engine import CHANGE_ANALYSIS_KEYS, RISK_LEVELS
+
+# Risk level boundaries reported as exceedance probabilities
+RISK_BOUNDARIES = (25, 50, 75)
+
+# Histogram resolution for percentiles: 0.01 risk points
+HISTOGRAM_BINS = 10_000
+
+DEFAULT_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+class Normal:
+    """Normal distribution, optionally truncated to [low, high] by clipping."""
+
+    def __init__(self, mean, sd, low=None, high=None):
+        self.mean, self.sd, self.low, self.high = mean, sd, low, high
+
+    def sample(self, rng, size):
+        values = rng.normal(self.mean, self.sd, size)
+        if self.low is not None or self.high is not None:
+            np.clip(values, self.low, self.high, out=values)
+        return values
+
+
+class LogNormal:
+    """Log-normal distribution given by its median and coefficient of variation."""
+
+    def __init__(self, median, cv):
+        self.median, self.cv = median, cv
+
+    def sample(self, rng, size):
+        sigma = np.sqrt(np.log1p(self.cv ** 2))
+        return self.median * np.exp(rng.normal(0.0, sigma, size))
+
+
+class Uniform:
+    """Uniform distribution on [low, high)."""
+
+    def __init__(self, low, high):
+        self.low, self.high = low, high
+
+    def sample(self, rng, size):
+        return rng.uniform(self.low, self.high, size)
+
+
+class Triangular:
+    """Triangular distribution with the given low, mode and high."""
+
+    def __init__(self, low, mode, high):
+        self.low, self.mode, self.high = low, mode, high
+
+    def sample(self, rng, size):
+        return rng.triangular(self.low, self.mode, self.high, size)
+
+
+class Choice:
+    """Categorical distribution, e.g. Choice({"Limestone": 0.7, "Shale": 0.3})."""
+
+    def __init__(self, probabilities):
+        self.values = np.asarray(list(probabilities))
+        weights = np.asarray(list(probabilities.values()), dtype=np.float64)
+        self.probabilities = weights / weights.sum()
+
+    def sample(self, rng, size):
+        return self.values[rng.choice(len(self.values), size, p=self.probabilities)]
+
+
+def _draw(spec, rng, size):
+    # Plain values (numbers, rock type names) are held fixed
+    return spec.sample(rng, size) if hasattr(spec, "sample") else spec
+
+
+def default_uncertainty(rainfall, snowfall, wind_speed, temperature, elevation,
+                        fracture_spacing, fracture_orientation, slope_angle, rock_type, image_analysis):
+    """
+    Typical field uncertainty around point readings, in calculate_risk's argument order.
+
+    Gauge readings get normal errors (10% rain/snow, 15% wind, ±1.5 °C), fracture
+    spacing from sparse scanlines is log-normal with 30% CV, and image analysis
+    percentages carry ±10 points. Change detection scores (CHANGE_ANALYSIS_KEYS)
+    are held fixed: a 0 means no scar was found, not a reading near 0.
+    """
+    distributions = {
+        "rainfall": Normal(rainfall, max(0.1 * rainfall, 1.0), low=0),
+        "snowfall": Normal(snowfall, max(0.1 * snowfall, 1.0), low=0),
+        "wind_speed": Normal(wind_speed, max(0.15 * wind_speed, 2.0), low=0),
+        "temperature": Normal(temperature, 1.5),
+        "elevation": Normal(elevation, 10.0, low=0),
+        "fracture_spacing": LogNormal(max(fracture_spacing, 1), 0.3),
+        "fracture_orientation": Normal(fracture_orientation, 5.0, low=0, high=90),
+        "slope_angle": Normal(slope_angle, 2.0, low=0, high=90),
+        "rock_type": rock_type
+    }
+    for key, value in (image_analysis or {}).items():
+        distributions[key] = value if key in CHANGE_ANALYSIS_KEYS else Normal(value, 10.0, low=0, high=100)
+    return distributions
+
+
+def propagate_uncertainty(distributions, n_samples=100_000, chunk_size=65_536, seed=None,
+                          percentiles=DEFAULT_PERCENTILES):
+    """
+    Propagate input distributions through calculate_risk_batch.
+
+    `distributions` maps calculate_risk_batch input columns (and optional image
+    analysis keys) to distributions from this module or fixed values. Memory is
+    bounded by `chunk_size`; `n_samples` only affects run time.
+
+    Returns a dict with the sample count, mean and standard deviation of the risk
+    score, the requested `percentiles` (0.01-point resolution), the probability
+    of exceeding each RISK_BOUNDARIES value, the probability of each risk level,
+    the most likely risk level and an empirical confidence: the percentage of
+    samples that fall in that level.
+    """
+    rng = np.random.default_rng(seed)
+    histogram = np.zeros(HISTOGRAM_BINS, dtype=np.int64)
+    level_counts = np.zeros(len(RISK_LEVELS), dtype=np.int64)
+    total = total_squares = 0.0
+
+    for start in range(0, n_samples, chunk_size):
+        size = min(chunk_size, n_samples - start)
+        columns = {name: _draw(spec, rng, size) for name, spec in distributions.items()}
+        risk, codes, _, _ = calculate_risk_batch(columns)
+
+        bins = (risk * (HISTOGRAM_BINS / 100)).astype(np.int64)
+        np.minimum(bins, HISTOGRAM_BINS - 1, out=bins)
+        histogram += np.bincount(bins, minlength=HISTOGRAM_BINS)
+        level_counts += np.bincount(codes, minlength=len(RISK_LEVELS))
+        total += risk.sum()
+        total_squares += np.square(risk).sum()
+
+    mean = total / n_samples
+    cumulative = np.cumsum(histogram)
+    bin_width = 100 / HISTOGRAM_BINS
+    percentile_values = {
+        q: float((np.searchsorted(cumulative, q / 100 * n_samples) + 0.5) * bin_width) for q in percentiles
+    }
+    # Level codes count scores >= 25/50/75 exactly, so exceedance needs no histogram
+    exceedance = {
+        boundary: float(level_counts[i + 1:].sum() / n_samples) for i, boundary in enumerate(RISK_BOUNDARIES)
+    }
+    level_probabilities = {level: float(count / n_samples) for level, count in zip(RISK_LEVELS, level_counts)}
+    most_likely = RISK_LEVELS[int(np.argmax(level_counts))]
+
+    return {
+        "samples": n_samples,
+        "mean": float(mean),
+        "std": float(np.sqrt(max(total_squares / n_samples - mean ** 2, 0.0))),
+        "percentiles": percentile_values,
+        "exceedance": exceedance,
+        "level_probabilities": level_probabilities,
+        "risk_level": most_likely,
+        "confidence": 100 * level_probabilities[most_likely]
+    }
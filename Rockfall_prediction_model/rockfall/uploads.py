@@ -0,0 +1,259 @@
+"""
+Content-addressed cache of uploaded slope images.
+
+An upload is identified by the SHA-256 of its bytes. Its downscaled preview
+(JPEG bytes, ready for st.image) and its image analysis are computed once,
+from a single reduced-scale decode, and then served by content hash: from a
+bounded in-memory LRU cache shared by every session in the process, else from
+an on-disk store that survives restarts and is shared by every worker. Reruns,
+re-uploads of the same photo and other sessions uploading it cost a lookup,
+and the analysis of a given photo never changes.
+
+On disk every upload is a directory <root>/<first two hex digits>/<hash>
+holding preview.jpg and analysis.v<ANALYSIS_VERSION>.json, each written
+atomically. Bump ANALYSIS_VERSION when rockfall.imaging changes so stale
+analyses are recomputed. prune() keeps the store under its byte budget by
+removing the least recently written uploads.
+
+process_batch() runs many uploads (expand_uploads() unpacks ZIP archives)
+through a thread pool and yields each result as it completes. Decoding and
+resampling in PIL and the NumPy reductions release the GIL, so images are
+analyzed concurrently and a batch takes roughly as long as its slowest image
+per worker; archive members are read by the worker that analyzes them, with a
+bounded number in flight, and a corrupt or encrypted member only fails its own
+result.
+
+The store lives in cache/uploads unless ROCKFALL_UPLOAD_CACHE says otherwise;
+ROCKFALL_UPLOAD_CACHE_BYTES bounds it (default 512 MiB), and
+ROCKFALL_BATCH_WORKERS sets the batch thread count (default: CPU count).
+"""
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from PIL import Image, ImageOps
+
+from .cache import get_cache
+from .imaging import analyze_array, load_working_image, to_array
+
+UPLOAD_CACHE_PATH = Path(os.environ.get(
+    "ROCKFALL_UPLOAD_CACHE", Path(__file__).resolve().parent.parent / "cache" / "uploads"
+))
+MAX_DISK_BYTES = int(os.environ.get("ROCKFALL_UPLOAD_CACHE_BYTES", 512 * 2 ** 20))
+
+# Uploads kept in memory (a preview is a few hundred KiB of JPEG)
+MEMORY_ENTRIES = 64
+
+# Version of the analysis stored on disk; bump when rockfall.imaging changes
+ANALYSIS_VERSION = 1
+
+PREVIEW_QUALITY = 85
+
+# prune() runs after this many new uploads are stored
+PRUNE_EVERY = 16
+
+BATCH_WORKERS = int(os.environ.get("ROCKFALL_BATCH_WORKERS", os.cpu_count() or 1))
+
+# Uploads in flight per batch worker
+_UPLOADS_PER_WORKER = 2
+
+IMAGE_SUFFIXES = (".jpg", ".jpeg", ".png", ".tif", ".tiff")
+
+# Larger archive members are rejected instead of being read into memory
+MAX_ARCHIVE_MEMBER_BYTES = 256 * 2 ** 20
+
+
+def content_hash(data):
+    """Hex SHA-256 of an upload's bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _atomic_write_bytes(path, data):
+    descriptor, temporary = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as output:
+            output.write(data)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def expand_uploads(uploads):
+    """
+    (name, read) for every image among `uploads`, (name, bytes) pairs, where
+    read() returns the image's bytes. ZIP archives contribute their image
+    members, named "<archive>/<member>" and read on demand.
+
+    Raises ValueError for corrupt archives.
+    """
+    images = []
+    for name, data in uploads:
+        if not name.lower().endswith(".zip"):
+            images.append((name, lambda data=data: data))
+            continue
+        try:
+            archive = zipfile.ZipFile(io.BytesIO(data))
+        except zipfile.BadZipFile:
+            raise ValueError(f"{name} is not a valid ZIP archive") from None
+        for info in archive.infolist():
+            member = info.filename
+            if info.is_dir() or member.startswith("__MACOSX/") or not member.lower().endswith(IMAGE_SUFFIXES):
+                continue
+            if info.file_size > MAX_ARCHIVE_MEMBER_BYTES:
+                raise ValueError(f"{name}/{member} is larger than {MAX_ARCHIVE_MEMBER_BYTES // 2 ** 20} MiB")
+            images.append((f"{name}/{member}", lambda archive=archive, info=info: archive.read(info)))
+    return images
+
+
+class UploadCache:
+    """Previews and analyses of uploads by content hash: memory LRU in front of a disk store."""
+
+    def __init__(self, root=UPLOAD_CACHE_PATH, max_disk_bytes=MAX_DISK_BYTES, memory_entries=MEMORY_ENTRIES):
+        self.root = Path(root)
+        self.max_disk_bytes = max_disk_bytes
+        # Named process-wide caches, so the dashboard's cache_stats() shows them
+        self.previews = get_cache("upload_previews", memory_entries, 0)
+        self.analyses = get_cache("upload_analyses", memory_entries * 16, 0)
+        self._lock = threading.Lock()
+        self._stored = 0
+
+    def _directory(self, digest):
+        return self.root / digest[:2] / digest
+
+    def _read(self, digest):
+        # (preview, analysis) from disk; either may be None
+        directory = self._directory(digest)
+        try:
+            preview = (directory / "preview.jpg").read_bytes()
+        except FileNotFoundError:
+            preview = None
+        try:
+            analysis = json.loads((directory / f"analysis.v{ANALYSIS_VERSION}.json").read_text())
+        except (FileNotFoundError, ValueError):
+            analysis = None
+        return preview, analysis
+
+    def _write(self, digest, preview, analysis):
+        directory = self._directory(digest)
+        directory.mkdir(parents=True, exist_ok=True)
+        _atomic_write_bytes(directory / "preview.jpg", preview)
+        _atomic_write_bytes(directory / f"analysis.v{ANALYSIS_VERSION}.json", json.dumps(analysis).encode())
+        with self._lock:
+            self._stored += 1
+            due = self._stored % PRUNE_EVERY == 0
+        if due:
+            self.prune()
+
+    def lookup(self, digest):
+        """(preview, analysis) of a known upload, or None; promotes disk entries into memory."""
+        hit_preview, preview = self.previews.lookup(digest)
+        hit_analysis, analysis = self.analyses.lookup(digest)
+        if not (hit_preview and hit_analysis):
+            preview, analysis = self._read(digest)
+            if preview is None or analysis is None:
+                return None
+            self.previews.put(digest, preview)
+            self.analyses.put(digest, analysis)
+        return preview, dict(analysis)
+
+    def process(self, data, digest=None):
+        """
+        (digest, preview, analysis) of an upload's bytes, computed on the first
+        sight of its content and served from the cache afterwards.
+
+        Raises OSError (PIL's UnidentifiedImageError included) for unreadable
+        images and ValueError for images too small to analyze.
+        """
+        digest = digest or content_hash(data)
+        cached = self.lookup(digest)
+        if cached is not None:
+            return (digest, *cached)
+
+        # One reduced-scale decode serves both the preview and the analysis
+        image = load_working_image(io.BytesIO(data))
+        analysis = analyze_array(to_array(image))
+        buffer = io.BytesIO()
+        ImageOps.exif_transpose(image).save(buffer, format="JPEG", quality=PREVIEW_QUALITY)
+        preview = buffer.getvalue()
+
+        self.previews.put(digest, preview)
+        self.analyses.put(digest, analysis)
+        self._write(digest, preview, analysis)
+        return digest, preview, dict(analysis)
+
+    def _process_timed(self, read):
+        # Archive members are read (and inflated) here, on the worker, so corrupt
+        # or encrypted members fail their own row rather than the whole batch
+        start = time.perf_counter()
+        try:
+            digest, _, analysis = self.process(read())
+            error = None
+        except (OSError, ValueError, EOFError, RuntimeError, zlib.error, zipfile.BadZipFile,
+                Image.DecompressionBombError) as failure:
+            digest, analysis, error = None, {}, str(failure) or type(failure).__name__
+        return digest, analysis, error, time.perf_counter() - start
+
+    def process_batch(self, images, workers=BATCH_WORKERS):
+        """
+        Yield a result dict per image of `images`, (name, read) pairs as from
+        expand_uploads(), in completion order: index, name, digest, analysis,
+        error (None, or why the image could not be read or analyzed) and seconds.
+        """
+        images = iter(enumerate(images))
+        pending = {}
+        with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="upload") as pool:
+            while True:
+                for index, (name, read) in images:
+                    pending[pool.submit(self._process_timed, read)] = (index, name)
+                    if len(pending) >= workers * _UPLOADS_PER_WORKER:
+                        break
+                if not pending:
+                    return
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, name = pending.pop(future)
+                    digest, analysis, error, seconds = future.result()
+                    yield {"index": index, "name": name, "digest": digest, "analysis": analysis,
+                           "error": error, "seconds": seconds}
+
+    def prune(self, max_bytes=None):
+        """Remove the least recently written uploads until the store fits in `max_bytes`; returns the count removed."""
+        max_bytes = self.max_disk_bytes if max_bytes is None else max_bytes
+        entries = []
+        for directory in self.root.glob("??/*"):
+            files = [path.stat() for path in directory.iterdir() if path.is_file()]
+            if files:
+                entries.append((max(stat.st_mtime for stat in files), sum(stat.st_size for stat in files), directory))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, directory in sorted(entries, key=lambda entry: entry[0]):
+            if total <= max_bytes:
+                break
+            shutil.rmtree(directory, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+_upload_caches = {}
+_upload_caches_lock = threading.Lock()
+
+
+def get_upload_cache(root=UPLOAD_CACHE_PATH):
+    """The process-wide UploadCache for `root`."""
+    key = Path(root).resolve()
+    with _upload_caches_lock:
+        if key not in _upload_caches:
+            _upload_caches[key] = UploadCache(key)
+        return _upload_caches[key]
@@ -1,52 +1,89 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-import joblib
-import os
-
-# Define path and filename
-path = r"C:/Users/dhrit/Downloads/rockfall_prototype/data/"
-filename = "balanced_synthetic_rockfall_data.csv"
-
-# Load dataset
-file_path = os.path.join(path, filename)
-df = pd.read_csv(file_path)
-
-# Possible categorical columns
-possible_categorical_cols = ["Rock_Type", "Soil_Type", "Lithology", "Vegetation", "Land_Cover"]
-
-# Only keep the ones that exist in this dataset
-categorical_cols = [col for col in possible_categorical_cols if col in df.columns]
-
-# One-hot encode categorical columns
-df = pd.get_dummies(df, columns=categorical_cols)
-
-# Features and Target
-X = df.drop(columns=["Rockfall_Event"])
-y = df["Rockfall_Event"]
-
-# Train-test split
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Train Random Forest
-model = RandomForestClassifier(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
-
-# Predictions
-y_pred = model.predict(X_test)
-
-# Evaluation
-accuracy = accuracy_score(y_test, y_pred)
-print("✅ Model trained successfully!")
-print(f"🎯 Accuracy: {accuracy:.4f}")
-print("\n📊 Classification Report:\n", classification_report(y_test, y_pred))
-print("🧩 Confusion Matrix:\n", confusion_matrix(y_test, y_pred))
-
-# Save model
-model_path = r"C:/Users/dhrit/Downloads/rockfall_prototype/model/rockfall_model.pkl"
-os.makedirs(os.path.dirname(model_path), exist_ok=True)  # create folder if not exists
-joblib.dump(model, model_path)
-
-print("\n💾 Model saved at:", model_path)
-print("🔑 Features used:", X.columns.tolist())
+import argparse
+import json
+from pathlib import Path
+
+from rockfall.features import schema_path
+from rockfall.model import FEATURE_NAMES, MODEL_PATH
+from rockfall.training import (
+    DEFAULT_CHUNK_ROWS, DEFAULT_ESTIMATOR, ESTIMATORS, compare_estimators, format_comparison, run_pipeline
+)
+
+# Default dataset location, next to this script
+DATA_PATH = Path(__file__).resolve().parent / "data" / "balanced_synthetic_rockfall_data.csv"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the rockfall model from a dataset (CSV, NPY or Parquet).")
+    parser.add_argument("--data", type=Path, default=DATA_PATH, help="dataset file (default: %(default)s)")
+    parser.add_argument("--output", type=Path, default=MODEL_PATH,
+                        help="model file, or directory for --compare (default: %(default)s)")
+    parser.add_argument("--estimator", choices=ESTIMATORS, default=DEFAULT_ESTIMATOR)
+    parser.add_argument("--compare", nargs="*", choices=ESTIMATORS, metavar="ESTIMATOR",
+                        help="train these estimators (default: all) on the same split and compare them; "
+                             f"models are saved to the --output directory. Choices: {', '.join(ESTIMATORS)}")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="CSV rows parsed per chunk")
+    parser.add_argument("--test-size", type=float, default=0.2)
+    parser.add_argument("--n-estimators", type=int, default=100, help="trees, or boosting iterations")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="training threads (-1 = all cores)")
+    parser.add_argument("--random-state", type=int, default=42)
+    parser.add_argument("--report", type=Path, help="also write the metrics and stage report as JSON")
+    return parser.parse_args()
+
+
+def compare(args):
+    output_dir = args.output.parent if args.output.suffix == ".pkl" else args.output
+    results = compare_estimators(
+        args.data, output_dir,
+        kinds=args.compare or tuple(ESTIMATORS),
+        chunk_rows=args.chunk_rows,
+        test_size=args.test_size,
+        n_estimators=args.n_estimators,
+        n_jobs=args.n_jobs,
+        random_state=args.random_state
+    )
+    print("⚖️ Estimator comparison (latencies through RockfallModel.predict_proba):\n")
+    print(format_comparison(results))
+    for result in results:
+        print(f"💾 {result['estimator']}: {result['path']}")
+
+    if args.report:
+        args.report.write_text(json.dumps({"comparison": results}, indent=2))
+        print("📝 Report written to:", args.report)
+
+
+def main():
+    args = parse_args()
+    if args.compare is not None:
+        compare(args)
+        return
+
+    model, metrics, report = run_pipeline(
+        args.data, args.output,
+        chunk_rows=args.chunk_rows,
+        test_size=args.test_size,
+        n_estimators=args.n_estimators,
+        n_jobs=args.n_jobs,
+        random_state=args.random_state,
+        kind=args.estimator
+    )
+
+    # Evaluation
+    print(f"✅ Model trained successfully! ({metrics['estimator']})")
+    print(f"📦 Rows: {metrics['rows']:,} ({metrics['dataset_bytes'] / 2 ** 20:,.1f} MiB in memory)")
+    print(f"🎯 Accuracy: {metrics['accuracy']:.4f}")
+    print(f"🚨 Rockfall event recall: {metrics['event_recall']:.4f}")
+    print("\n📊 Classification Report:\n", metrics["classification_report"])
+    print("🧩 Confusion Matrix:\n", metrics["confusion_matrix"])
+    print("\n⏱️ Stages:\n" + report.format())
+
+    print("\n💾 Model saved at:", args.output)
+    print("🧾 Feature schema saved at:", schema_path(args.output))
+    print("🔑 Features used:", list(FEATURE_NAMES))
+
+    if args.report:
+        args.report.write_text(json.dumps({**metrics, **report.as_dict()}, indent=2))
+        print("📝 Report written to:", args.report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import json
+from pathlib import Path
+
+from rockfall.model import MODEL_PATH
+from rockfall.training import DEFAULT_CHUNK_ROWS, DEFAULT_UPDATE_ESTIMATORS, update_model
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Fold newly labeled rockfall rows into an existing model without full retraining."
+    )
+    parser.add_argument("batch", type=Path, help="labeled rows to add (CSV, NPY or Parquet, training columns)")
+    parser.add_argument("--model", type=Path, default=MODEL_PATH, help="model to update (default: %(default)s)")
+    parser.add_argument("--output", type=Path,
+                        help="updated model file (default: next <model>.vN.pkl next to --model)")
+    parser.add_argument("--n-estimators", type=int, default=DEFAULT_UPDATE_ESTIMATORS,
+                        help="trees (forests) or boosting iterations to add (default: %(default)s)")
+    parser.add_argument("--max-estimators", type=int,
+                        help="forests only: keep at most this many trees, dropping the oldest")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="training threads (-1 = all cores)")
+    parser.add_argument("--eval", type=Path, help="labeled dataset to evaluate the updated model on")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--report", type=Path, help="also write the metrics and stage report as JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    model, metrics, report = update_model(
+        args.model, args.batch,
+        output_path=args.output,
+        n_estimators=args.n_estimators,
+        max_estimators=args.max_estimators,
+        n_jobs=args.n_jobs,
+        eval_path=args.eval,
+        chunk_rows=args.chunk_rows
+    )
+
+    print(f"✅ Model updated with {metrics['batch_rows']:,} rows "
+          f"({metrics['previous_size']} → {metrics['size']} {type(model).__name__} members)")
+    if "accuracy" in metrics:
+        print(f"🎯 Accuracy: {metrics['accuracy']:.4f}")
+        print(f"🚨 Rockfall event recall: {metrics['event_recall']:.4f}")
+    print("\n⏱️ Stages:\n" + report.format())
+    print("\n💾 Model saved at:", metrics["output"])
+
+    if args.report:
+        metrics.pop("classification_report", None)
+        args.report.write_text(json.dumps({**metrics, **report.as_dict()}, indent=2))
+        print("📝 Report written to:", args.report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+"""
+WSGI entry point for the rockfall scoring service.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from rockfall.service import create_app
+
+app = create_app()